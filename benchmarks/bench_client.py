@@ -0,0 +1,66 @@
+'''
+Size and time of client side pages (JSON for mockdown.js) against the HTML pages of the same mocks.
+
+Run from the repository root: python -m benchmarks.bench_client
+'''
+import argparse
+import gzip
+import io
+import tempfile
+import time
+
+import yaml
+
+from mockdown import clientside
+from mockdown import corpus
+from mockdown import loader
+from mockdown.mockdown import MockGenerator
+
+
+def html(document):
+    with io.StringIO() as out:
+        MockGenerator(document, out).generate()
+        return out.getvalue()
+
+
+def client(document):
+    return clientside.page(clientside.encode(document))
+
+
+def measure(render, documents, repeat):
+    seconds = []
+
+    for i in range(repeat):
+        start = time.perf_counter()
+        pages = [render(document).encode() for document in documents]
+        seconds.append(time.perf_counter() - start)
+
+    return min(seconds), sum(map(len, pages)), sum(len(gzip.compress(page)) for page in pages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pages', type=int, default=5)
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f'{"shape":>8} {"mode":>7} {"render (s)":>11} {"KiB":>9} {"gzip KiB":>9}')
+
+    for shape in ('mixed', 'table'):
+        with tempfile.TemporaryDirectory() as folder:
+            sizes = dict(rows=args.rows) if shape == 'table' else {}
+            documents = []
+
+            for path in corpus.write_corpus(folder, args.pages, args.seed, shape, **sizes):
+                with open(path, 'r') as f:
+                    documents.append(yaml.load(f, Loader=loader.Loader))
+
+        for mode, render in (('html', html), ('client', client)):
+            seconds, size, compressed = measure(render, documents, args.repeat)
+            print(f'{shape:>8} {mode:>7} {seconds:>11.3f} {size / 1024:>9.1f} {compressed / 1024:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+'''
+Render time of synthetic corpus shapes at increasing scale, to spot non linear behavior.
+
+Run from the repository root: python -m benchmarks.bench_corpus
+'''
+import argparse
+import io
+import tempfile
+import time
+
+import yaml
+
+from mockdown import corpus
+from mockdown import loader
+from mockdown.mockdown import MockGenerator
+
+
+# The size of each shape which grows with the scale
+scaled_sizes = {
+    'mixed': 'fields',
+    'flat': 'fields',
+    'deep': 'depth',
+    'table': 'rows',
+    'options': 'options',
+    'includes': 'includes',
+}
+
+
+def render(path):
+    with open(path, 'r') as f:
+        document = yaml.load(f, Loader=loader.Loader)
+
+    start = time.perf_counter()
+
+    with io.StringIO() as out:
+        MockGenerator(document, out).generate()
+        size = out.tell()
+
+    return time.perf_counter() - start, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--shapes', nargs='+', choices=scaled_sizes, default=list(scaled_sizes))
+    parser.add_argument('--scales', type=float, nargs='+', default=[0.25, 0.5, 1])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f'{"shape":>10} {"size":>16} {"render (s)":>12} {"output (KB)":>12} {"us/KB":>8}')
+
+    for shape in args.shapes:
+        size = scaled_sizes[shape]
+
+        for scale in args.scales:
+            value = max(1, int(corpus.shapes[shape][size] * scale))
+
+            with tempfile.TemporaryDirectory() as folder:
+                path, = corpus.write_corpus(folder, 1, args.seed, shape, **{size: value})
+                seconds, output = render(path)
+
+            print(f'{shape:>10} {f"{size}={value}":>16} {seconds:>12.4f} {output / 1024:>12.1f} {seconds * 1e6 / (output / 1024):>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+'''
+Diffing large mocks with a few changes, against a line diff of the same mocks.
+
+Run from the repository root: python -m benchmarks.bench_diff
+'''
+import argparse
+import copy
+import difflib
+import random
+import time
+
+import yaml
+
+from mockdown import corpus
+from mockdown.diff import diff
+
+
+def edit(fields, changes, seed):
+    '''
+    A copy of fields with changes of labels, insertions and removals of top level fields
+    '''
+    rng = random.Random(seed)
+    fields = copy.deepcopy(fields)
+
+    for i in range(changes):
+        choice = rng.random()
+        position = rng.randrange(len(fields))
+
+        if choice < 0.4:
+            entry = next(iter(fields[position].values()))
+
+            if type(entry) is dict and 'label' in entry:
+                entry['label'] += ' changed'
+        elif choice < 0.7:
+            fields.insert(position, {'text': {'label': f'Inserted {i}'}})
+        else:
+            del fields[position]
+
+    return fields
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+
+    return time.perf_counter() - start, result
+
+
+def line_diff(old, new):
+    return list(difflib.unified_diff(yaml.safe_dump(old).splitlines(), yaml.safe_dump(new).splitlines(), lineterm=''))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--fields', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--changes', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f'{"fields":>7} {"identical (s)":>14} {"diff (s)":>9} {"changes":>8} {"line diff (s)":>14}')
+
+    for fields in args.fields:
+        generator = corpus.CorpusGenerator(args.seed, **dict(corpus.shapes['flat'], fields=fields))
+        old = generator.document()
+        new = edit(old, args.changes, args.seed)
+
+        identical, changes = timed(diff, old, copy.deepcopy(old))
+        assert not changes
+        seconds, changes = timed(diff, old, new)
+        lines, _ = timed(line_diff, old, new)
+
+        print(f'{fields:>7} {identical:>14.3f} {seconds:>9.3f} {len(changes):>8} {lines:>14.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+'''
+Overhead of HTML escaping on rendering, against the same renderer with escaping disabled.
+
+Run from the repository root: python -m benchmarks.bench_escape
+'''
+import argparse
+import io
+import tempfile
+import time
+
+import yaml
+
+from mockdown import corpus
+from mockdown import escaping
+from mockdown import loader
+from mockdown import mockdown
+
+
+def unescaped(value):
+    return value if value.__class__ is str else str(value)
+
+
+def render(document, repeat):
+    best = None
+
+    for i in range(repeat):
+        start = time.perf_counter()
+
+        with io.StringIO() as out:
+            mockdown.MockGenerator(document, out).generate()
+
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--shapes', nargs='+', choices=corpus.shapes, default=['mixed', 'flat', 'table', 'options'])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f'{"shape":>10} {"unescaped (s)":>14} {"escaped (s)":>12} {"overhead":>9}')
+
+    for shape in args.shapes:
+        # Smaller tables than the shape's default, so the benchmark runs in seconds
+        sizes = {'rows': 2000} if shape == 'table' else {}
+
+        with tempfile.TemporaryDirectory() as folder:
+            path, = corpus.write_corpus(folder, 1, args.seed, shape, **sizes)
+
+            with open(path, 'r') as f:
+                document = yaml.load(f, Loader=loader.Loader)
+
+        mockdown.escape = unescaped
+        baseline = render(document, args.repeat)
+
+        mockdown.escape = escaping.escape
+        escaped = render(document, args.repeat)
+
+        print(f'{shape:>10} {baseline:>14.4f} {escaped:>12.4f} {(escaped / baseline - 1) * 100:>8.1f}%')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+'''
+Flowchart layout time on synthetic process maps of increasing size.
+
+Run from the repository root: python -m benchmarks.bench_flowchart
+'''
+import argparse
+import random
+import time
+
+from mockdown import flowchart
+
+
+def synthetic_graph(size, seed):
+    '''
+    A main flow of actions with decisions branching forward and, sometimes, back to a previous step
+    '''
+    rng = random.Random(seed)
+
+    nodes = [flowchart.Node('0', 'start', 'Start')]
+    edges = []
+
+    for i in range(1, size - 1):
+        kind = 'decision' if rng.random() < 0.2 else 'action'
+        nodes.append(flowchart.Node(str(i), kind, f'{kind} {i}'))
+        edges.append((str(rng.randrange(max(0, i - 5), i)), str(i), None))
+
+        if kind == 'decision' and i > 10:
+            edges.append((str(i), str(rng.randrange(i - 10, i)), 'retry'))
+
+    nodes.append(flowchart.Node(str(size - 1), 'end', 'End'))
+    edges.append((str(size - 2), str(size - 1), None))
+
+    return nodes, edges
+
+
+def measure(function, repeat):
+    best = None
+
+    for i in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 2000, 5000, 10000, 20000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f'{"nodes":>8} {"edges":>8} {"layout (s)":>12} {"svg (s)":>10} {"us/node":>8}')
+
+    for size in args.sizes:
+        nodes, edges = synthetic_graph(size, args.seed)
+        ids = [node.id for node in nodes]
+        pairs = [(source, target) for source, target, label in edges]
+
+        layout = measure(lambda: flowchart.layout(ids, pairs), args.repeat)
+        svg = measure(lambda: flowchart.render_svg(nodes, edges), args.repeat)
+
+        print(f'{size:>8} {len(edges):>8} {layout:>12.4f} {svg:>10.4f} {layout / size * 1e6:>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+'''
+Rendering pages which share top level fields through a fragment store, cold and warm, against rendering every field.
+
+Run from the repository root: python -m benchmarks.bench_fragments
+'''
+import argparse
+import io
+import tempfile
+import time
+
+from mockdown import corpus
+from mockdown.fragments import FragmentStore
+from mockdown.mockdown import MockGenerator
+
+
+def render(documents, fragments=None):
+    start = time.perf_counter()
+    pages = []
+
+    for document in documents:
+        with io.StringIO() as out:
+            MockGenerator(document, out, fragments=fragments).generate()
+            pages.append(out.getvalue())
+
+    return time.perf_counter() - start, pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pages', type=int, default=100)
+    parser.add_argument('--shared', type=int, default=5, help='Fields shared by every page, like headers and toolbars')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    generator = corpus.CorpusGenerator(args.seed, tables=0.3, rows=20)
+    shared = [generator.field() for i in range(args.shared)]
+    documents = [shared[:args.shared // 2] + generator.document() + shared[args.shared // 2:] for i in range(args.pages)]
+
+    plain, expected = render(documents)
+
+    with tempfile.TemporaryDirectory() as folder:
+        cold, pages = render(documents, FragmentStore(folder))
+        assert pages == expected, 'The fragment store changed the pages'
+
+        # Like the next build, a new process with the same store and the same pages
+        store = FragmentStore(folder)
+        warm, pages = render(documents, store)
+        assert pages == expected, 'The fragment store changed the pages'
+
+    print(f'{"pages":>6} {"plain (s)":>10} {"cold (s)":>9} {"warm (s)":>9} {"warm speedup":>13}  {"warm store"}')
+    print(f'{args.pages:>6} {plain:>10.3f} {cold:>9.3f} {warm:>9.3f} {plain / warm:>12.1f}x  {store.stats}')
+
+
+if __name__ == '__main__':
+    main()
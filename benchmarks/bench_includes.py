@@ -0,0 +1,61 @@
+'''
+Loading mocks with many includes, reading included files ahead on a thread pool against one at a time, with a
+latency added to every file read to stand for a network file system.
+
+Run from the repository root: python -m benchmarks.bench_includes
+'''
+import argparse
+import tempfile
+import time
+
+import yaml
+
+from mockdown import corpus
+from mockdown import loader
+
+
+class SerialLoader(loader.Loader):
+    prefetch = False
+
+
+def load(paths, loader_class):
+    start = time.perf_counter()
+    documents = []
+
+    for path in paths:
+        with open(path, 'r') as f:
+            documents.append(yaml.load(f, Loader=loader_class))
+
+    return time.perf_counter() - start, documents
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pages', type=int, default=5)
+    parser.add_argument('--includes', type=int, default=30)
+    parser.add_argument('--latency', type=float, default=5, help='Milliseconds added to each file read')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    read = loader._read
+
+    def slow_read(filename, max_bytes=None):
+        time.sleep(args.latency / 1000)
+        return read(filename, max_bytes)
+
+    loader._read = slow_read
+
+    with tempfile.TemporaryDirectory() as folder:
+        paths = corpus.write_corpus(folder, args.pages, args.seed, 'includes', includes=args.includes)
+
+        serial, expected = load(paths, SerialLoader)
+        prefetched, documents = load(paths, loader.Loader)
+
+    assert documents == expected, 'Prefetching changed the documents'
+
+    print(f'{"pages":>6} {"includes":>9} {"latency (ms)":>13} {"serial (s)":>11} {"prefetch (s)":>13} {"speedup":>8}')
+    print(f'{args.pages:>6} {args.includes:>9} {args.latency:>13.1f} {serial:>11.3f} {prefetched:>13.3f} {serial / prefetched:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
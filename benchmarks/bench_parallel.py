@@ -0,0 +1,57 @@
+'''
+Rendering the top level fields of one large mock in worker processes, against a single generator.
+
+Run from the repository root: python -m benchmarks.bench_parallel
+'''
+import argparse
+import io
+import os
+import time
+
+from mockdown import corpus
+from mockdown import parallel
+from mockdown.mockdown import MockGenerator
+
+
+def serial(fields):
+    with io.StringIO() as out:
+        MockGenerator(fields, out).generate()
+        return out.getvalue()
+
+
+def chunked(fields, jobs):
+    with io.StringIO() as out:
+        parallel.render(fields, out, jobs)
+        return out.getvalue()
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--fields', type=int, default=50000)
+    parser.add_argument('--jobs', type=int, nargs='+', default=sorted({2, 4, os.cpu_count() or 1}))
+    parser.add_argument('--shape', default='mixed', choices=sorted(corpus.shapes))
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    fields = corpus.CorpusGenerator(args.seed, **dict(corpus.shapes[args.shape], fields=args.fields)).document()
+    single, html = timed(serial, fields)
+
+    print(f'{os.cpu_count()} CPUs, {args.fields} {args.shape} fields, {single:.3f}s in one process')
+    print(f'{"jobs":>5} {"seconds":>8} {"speedup":>8}')
+
+    for jobs in args.jobs:
+        seconds, chunked_html = timed(chunked, fields, jobs)
+        assert chunked_html == html, 'Chunks made a different page'
+
+        print(f'{jobs:>5} {seconds:>8.3f} {single / seconds:>7.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+'''
+Building the search index while rendering pages, against rendering them alone.
+
+Run from the repository root: python -m benchmarks.bench_search
+'''
+import argparse
+import tempfile
+import time
+
+from mockdown import build
+from mockdown import corpus
+from mockdown.sinks import SearchSink
+
+
+def render(paths, search):
+    start = time.perf_counter()
+    texts = {}
+
+    for path in paths:
+        sinks = [SearchSink()] if search else []
+        build.render_source(path, sinks=sinks)
+
+        if search:
+            texts[path] = sinks[0].entries
+
+    index = build.search_index(texts) if search else b''
+
+    return time.perf_counter() - start, index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pages', type=int, default=300)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        paths = corpus.write_corpus(folder, args.pages, args.seed)
+
+        # Alternated, so both see the same caches and load
+        plain, indexed = [], []
+
+        for i in range(args.repeat):
+            plain.append(render(paths, False)[0])
+            seconds, index = render(paths, True)
+            indexed.append(seconds)
+
+        plain, indexed = min(plain), min(indexed)
+
+    print(f'{"pages":>6} {"render (s)":>11} {"with index (s)":>15} {"overhead":>9} {"index (KiB)":>12}')
+    print(f'{args.pages:>6} {plain:>11.3f} {indexed:>15.3f} {indexed / plain - 1:>8.1%} {len(index) / 1024:>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
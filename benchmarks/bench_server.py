@@ -0,0 +1,57 @@
+'''
+Calls of the mockdown command forwarded to a render server, against rendering in the process of each call.
+
+Run from the repository root: python -m benchmarks.bench_server
+'''
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from mockdown import corpus
+
+
+def calls(count, source, target, env):
+    start = time.perf_counter()
+
+    for i in range(count):
+        subprocess.run([sys.executable, '-m', 'mockdown.client', source, target], env=env, check=True)
+
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--calls', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        source = corpus.write_corpus(folder, 1, args.seed)[0]
+        socket = os.path.join(folder, 'mockdown.sock')
+        env = dict(os.environ, PYTHONPATH=os.getcwd(), MOCKDOWN_SOCKET=socket)
+
+        server = subprocess.Popen([sys.executable, '-m', 'mockdown.mockdown', 'server', '--socket', socket, '--workers', '2'], env=env)
+
+        try:
+            while not os.path.exists(socket):
+                time.sleep(0.05)
+
+            forwarded = calls(args.calls, source, os.path.join(folder, 'served.html'), env)
+        finally:
+            server.terminate()
+            server.wait()
+
+        local = calls(args.calls, source, os.path.join(folder, 'local.html'), dict(env, MOCKDOWN_SOCKET=''))
+
+        with open(os.path.join(folder, 'served.html'), 'rb') as served, open(os.path.join(folder, 'local.html'), 'rb') as rendered:
+            assert served.read() == rendered.read(), 'The server rendered a different page'
+
+    print(f'{"calls":>6} {"local (ms/call)":>16} {"server (ms/call)":>17} {"speedup":>8}')
+    print(f'{args.calls:>6} {local * 1000 / args.calls:>16.1f} {forwarded * 1000 / args.calls:>17.1f} {local / forwarded:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+'''
+Building a site, with its link graph, index pages and link checks, against building its pages alone.
+
+Run from the repository root: python -m benchmarks.bench_site
+'''
+import argparse
+import os
+import tempfile
+import time
+
+from mockdown import build
+from mockdown import corpus
+
+
+def timed_build(paths, folder, output, site, jobs):
+    start = time.perf_counter()
+    failures = build.build(paths, os.path.join(folder, output), folder, jobs=jobs, site=site)
+
+    return time.perf_counter() - start, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pages', type=int, default=300)
+    parser.add_argument('--jobs', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        paths = corpus.write_corpus(folder, args.pages, args.seed)
+
+        # Alternated, so both see the same caches and load
+        plain, site = [], []
+
+        for i in range(args.repeat):
+            plain.append(timed_build(paths, folder, f'plain-{i}', False, args.jobs)[0])
+            seconds, failures = timed_build(paths, folder, f'site-{i}', True, args.jobs)
+            site.append(seconds)
+
+        plain, site = min(plain), min(site)
+
+    print(f'{"pages":>6} {"build (s)":>10} {"site (s)":>9} {"overhead":>9} {"broken links":>13}')
+    print(f'{args.pages:>6} {plain:>10.3f} {site:>9.3f} {site / plain - 1:>8.1%} {len(failures):>13}')
+
+
+if __name__ == '__main__':
+    main()
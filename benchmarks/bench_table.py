@@ -0,0 +1,69 @@
+'''
+Rendering of tables with component cells, with per column cell renderers against dispatching every cell.
+
+Run from the repository root: python -m benchmarks.bench_table
+'''
+import argparse
+import io
+import time
+
+from mockdown import corpus
+from mockdown import mockdown
+
+
+def dispatched(self, cells):
+    return lambda cell: self._generate_field(cell, {'br': False})
+
+
+def render(document, repeat):
+    best = None
+
+    for i in range(repeat):
+        start = time.perf_counter()
+
+        with io.StringIO() as out:
+            mockdown.MockGenerator(document, out).generate()
+            html = out.getvalue()
+
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best, html
+
+
+def table(rows, seed):
+    generator = corpus.CorpusGenerator(seed, rows=rows)
+
+    return [{'table': {'title': 'Components', 'columns': {
+        'Done': [{'check': None} for row in range(rows)],
+        'Name': [{'text': {'placeholder': 'Name'}} for row in range(rows)],
+        'Kind': [{'select': {'options': ['One', 'Two', 'Three']}} for row in range(rows)],
+        'Row': list(range(rows)),
+    }}}, {'table': {'title': 'Corpus', 'columns': generator._columns(rows, 4)}}]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    document = table(args.rows, args.seed)
+
+    renderer = mockdown.MockGenerator._cell_renderer
+
+    mockdown.MockGenerator._cell_renderer = dispatched
+    baseline, expected = render(document, args.repeat)
+
+    mockdown.MockGenerator._cell_renderer = renderer
+    elapsed, html = render(document, args.repeat)
+
+    assert html == expected, 'Cell renderers changed the HTML'
+
+    print(f'{"rows":>8} {"dispatched (s)":>15} {"per column (s)":>15} {"speedup":>8}')
+    print(f'{args.rows:>8} {baseline:>15.4f} {elapsed:>15.4f} {baseline / elapsed:>7.2f}x')
+
+
+if __name__ == '__main__':
+    main()
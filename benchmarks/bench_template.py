@@ -0,0 +1,81 @@
+'''
+Rendering many variants of one mock template, against parsing and rendering each variant as its own mock file.
+
+Run from the repository root: python -m benchmarks.bench_template
+'''
+import argparse
+import io
+import random
+import time
+
+import yaml
+
+from mockdown import corpus
+from mockdown import loader
+from mockdown import mockdown
+from mockdown import template
+
+
+def mock_template(seed):
+    '''
+    A form of the corpus' mixed shape, with a header, a list of orders and a table depending on the data
+    '''
+    fields = corpus.CorpusGenerator(seed).document()
+
+    fields.insert(0, {'header': {'label': 'Orders of ${customer.name}', 'level': 2}})
+    fields.insert(len(fields) // 2, {'for_each': '${orders}', 'as': 'order', 'do': [
+        {'text': {'label': '${order.product}', 'placeholder': 'Quantity of ${order.product}'}},
+    ]})
+    fields.append({'table': {'title': 'Items', 'columns': {'Product': '${items.products}', 'Amount': '${items.amounts}'}}})
+
+    return fields
+
+
+def records(count, seed):
+    rng = random.Random(seed)
+
+    for i in range(count):
+        products = [rng.choice(corpus.words) for j in range(rng.randint(1, 8))]
+
+        yield {
+            'customer': {'name': f'Customer {i}'},
+            'orders': [{'product': product} for product in products],
+            'items': {'products': products, 'amounts': [rng.randint(1, 100) for product in products]},
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--variants', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    data = list(records(args.variants, args.seed))
+
+    start = time.perf_counter()
+    compiled = template.Template(mock_template(args.seed))
+    compile_time = time.perf_counter() - start
+
+    # Each variant as the mock file it would be without templates, written before timing
+    files = [yaml.dump(compiled.expand(record), Dumper=yaml.SafeDumper, allow_unicode=True, sort_keys=False) for record in data]
+
+    start = time.perf_counter()
+    expected = []
+    for text in files:
+        with io.StringIO() as out:
+            mockdown.MockGenerator(yaml.load(text, Loader=loader.Loader), out).generate()
+            expected.append(out.getvalue())
+    files_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rendered = [compiled.render(record) for record in data]
+    template_time = time.perf_counter() - start
+
+    assert rendered == expected, 'Template renders differ from rendering each file'
+
+    print(f'{"variants":>9} {"files (s)":>10} {"template (s)":>13} {"compile (ms)":>13} {"per variant (ms)":>17} {"speedup":>8}')
+    print(f'{args.variants:>9} {files_time:>10.3f} {template_time:>13.3f} {compile_time * 1000:>13.2f} {template_time / args.variants * 1000:>17.3f} {files_time / template_time:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
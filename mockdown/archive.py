@@ -0,0 +1,139 @@
+import io
+import os
+import tarfile
+import time
+import zipfile
+
+
+class DirectoryWriter(object):
+    '''
+    Writes each file under a folder
+    '''
+
+    def __init__(self, path):
+        self._path = path
+
+    def write(self, name, content):
+        target = os.path.join(self._path, name)
+
+        os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+
+        with open(target, 'wb') as f:
+            f.write(content)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ZipWriter(DirectoryWriter):
+    '''
+    Streams each file into a zip archive, deflated unless compress is False
+    '''
+
+    def __init__(self, path, compress=True):
+        self._zip = zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED)
+
+    def write(self, name, content):
+        info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+        info.compress_type = self._zip.compression
+        info.external_attr = 0o644 << 16
+
+        self._zip.writestr(info, content)
+
+    def close(self):
+        self._zip.close()
+
+
+class TarWriter(DirectoryWriter):
+    '''
+    Streams each file into a tar archive, compression is one of "", "gz", "bz2" or "xz"
+    '''
+
+    def __init__(self, path, compression=''):
+        self._tar = tarfile.open(path, f'w:{compression}')
+
+    def write(self, name, content):
+        info = tarfile.TarInfo(name)
+        info.size = len(content)
+        info.mtime = int(time.time())
+        info.mode = 0o644
+
+        self._tar.addfile(info, io.BytesIO(content))
+
+    def close(self):
+        self._tar.close()
+
+
+tar_extensions = {
+    '.tar': '',
+    '.tar.gz': 'gz',
+    '.tgz': 'gz',
+    '.tar.bz2': 'bz2',
+    '.tar.xz': 'xz',
+}
+
+
+def is_archive(path):
+    return path.endswith('.zip') or path.endswith(tuple(tar_extensions))
+
+
+def open_writer(path, compress=True):
+    '''
+    A writer for path, chosen by its extension: .zip, .tar, .tar.gz, .tgz, .tar.bz2, .tar.xz, or a folder otherwise.
+    Tar archives are compressed as their extension says, zip archives are deflated unless compress is False.
+    '''
+    if path.endswith('.zip'):
+        return ZipWriter(path, compress)
+
+    for extension, compression in tar_extensions.items():
+        if path.endswith(extension):
+            return TarWriter(path, compression)
+
+    return DirectoryWriter(path)
+
+
+def read(path, name):
+    '''
+    Contents of the file name inside the archive, or folder, at path
+    '''
+    if path.endswith('.zip'):
+        with zipfile.ZipFile(path) as archive:
+            return archive.read(name)
+    elif is_archive(path):
+        with tarfile.open(path) as archive:
+            return archive.extractfile(name).read()
+    else:
+        with open(os.path.join(path, name), 'rb') as f:
+            return f.read()
+
+
+def read_files(path, names):
+    '''
+    (name, contents) of the files of names inside the archive, or folder, at path, leaving out missing ones. Archives
+    are read once, in their order, so compressed tar archives aren't decompressed again for each file.
+    '''
+    names = set(names)
+
+    if path.endswith('.zip'):
+        with zipfile.ZipFile(path) as archive:
+            for name in archive.namelist():
+                if name in names:
+                    yield name, archive.read(name)
+    elif is_archive(path):
+        with tarfile.open(path) as archive:
+            for member in archive:
+                if member.isfile() and member.name in names:
+                    yield member.name, archive.extractfile(member).read()
+    else:
+        for name in sorted(names):
+            try:
+                with open(os.path.join(path, name), 'rb') as f:
+                    yield name, f.read()
+            except FileNotFoundError:
+                pass
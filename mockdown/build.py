@@ -0,0 +1,470 @@
+import argparse
+import hashlib
+import heapq
+import io
+import itertools
+import json
+import os
+import posixpath
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import yaml
+
+from . import archive
+from . import clientside
+from . import limits as limits_
+from . import loader
+from . import search as search_
+from . import site as site_
+from .check import find_mocks
+from .fragments import FragmentStore
+from .mockdown import MockGenerator
+from .sinks import LinkSink, SearchSink
+
+
+manifest_name = 'manifest.json'
+
+
+def output_name(source):
+    '''
+    a/page.mock.yaml -> a/page.html
+    '''
+    for extension in ('.mock.yaml', '.mock.yml', '.yaml', '.yml'):
+        if source.endswith(extension):
+            return source[:-len(extension)] + '.html'
+
+    return source + '.html'
+
+
+def render_source(source, limits=None, fragments=None, sinks=(), client=None):
+    '''
+    The HTML of source, as bytes, and the seconds it took, limits.LimitExceeded when it goes over limits.
+    fragments is a fragments.FragmentStore of the HTML of top level fields, sinks get every component.
+    client is the URL of mockdown.js for a client side page, see clientside.py, which doesn't use fragments.
+    '''
+    start = time.perf_counter()
+
+    with open(source, 'r') as f:
+        document = yaml.load(f, Loader=loader.Loader.limited(limits) if limits else loader.Loader)
+
+    if client:
+        content = clientside.page(clientside.encode(document, sinks=sinks, limits=limits), client).encode()
+    else:
+        with io.StringIO() as out:
+            MockGenerator(document, out, sinks=sinks, limits=limits, fragments=fragments).generate()
+            content = out.getvalue().encode()
+
+    return content, time.perf_counter() - start
+
+
+def render_page(source, target, limits=None, fragments=None, sinks=(), client=None):
+    '''
+    Renders source into target, returns (bytes, sha256, seconds)
+    '''
+    content, seconds = render_source(source, limits, fragments, sinks, client)
+
+    os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+    with open(target, 'wb') as f:
+        f.write(content)
+
+    return len(content), hashlib.sha256(content).hexdigest(), seconds
+
+
+def _render_or_error(render, fragments, search, site, client, *args):
+    '''
+    (result of render, error, fragment counters of the worker for the page, search entries of the page, links of
+    the page)
+    '''
+    search_sink = SearchSink() if search else None
+    link_sink = LinkSink() if site else None
+    sinks = [sink for sink in (search_sink, link_sink) if sink]
+
+    try:
+        result, error = render(*args, fragments, sinks, client), None
+    except Exception as e:
+        result, error = None, f'{type(e).__name__}: {e}'
+
+    return result, error, fragments.take_stats() if fragments else None, search_sink.entries if search_sink else None, link_sink.links if link_sink else None
+
+
+def _render_page_or_error(source, target, limits, fragments, search, site, client):
+    return _render_or_error(render_page, fragments, search, site, client, source, target, limits)
+
+
+def _render_source_or_error(source, limits, fragments, search, site, client):
+    return _render_or_error(render_source, fragments, search, site, client, source, limits)
+
+
+def parse_shard(value):
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'Shard must be like K/N, its "{value}"')
+
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f'Shard K/N must have 1 <= K <= N, its "{value}"')
+
+    return index, count
+
+
+def load_manifest(path):
+    '''
+    The manifest of a build output, given as the manifest file, the output folder or the output archive
+    '''
+    if archive.is_archive(path) or os.path.isdir(path):
+        return json.loads(archive.read(path, manifest_name))
+
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def weights_of(sources, root, timings=None):
+    '''
+    Weights of each source for shard balancing: its render time on a previous build's manifest, when given, or its size.
+    Sources without timings are estimated from their size, using the seconds per byte of the known ones.
+    '''
+    sizes = {source: os.path.getsize(source) for source in sources}
+
+    if not timings:
+        return sizes
+
+    seconds = {}
+    for page in timings['pages'].values():
+        seconds[os.path.normpath(os.path.join(root, page['source']))] = page['seconds']
+
+    known = [source for source in sources if source in seconds]
+    known_bytes = sum(sizes[source] for source in known)
+    seconds_per_byte = sum(seconds[source] for source in known) / known_bytes if known_bytes else 1
+
+    return {source: seconds[source] if source in seconds else sizes[source] * seconds_per_byte for source in sources}
+
+
+def assign_shards(sources, count, weights):
+    '''
+    Splits sources in count shards with balanced weights, always the same way for the same input (longest
+    processing time first, ties broken by path), so each node can compute its own share.
+    '''
+    shards = [[] for i in range(count)]
+    loads = [(0, i) for i in range(count)]
+
+    for source in sorted(sources, key=lambda source: (-weights[source], source)):
+        load, i = heapq.heappop(loads)
+        shards[i].append(source)
+        heapq.heappush(loads, (load + weights[source], i))
+
+    return [sorted(shard) for shard in shards]
+
+
+def find_assets(folders):
+    '''
+    (name, path) of every file under folders, named by their path from the parent of their folder, like
+    open-iconic/svg/pencil.svg for the folder vendor/open-iconic
+    '''
+    assets = []
+
+    for folder in folders:
+        parent = os.path.dirname(os.path.normpath(folder))
+
+        for dirpath, dirnames, filenames in os.walk(folder):
+            dirnames.sort()
+
+            for filename in sorted(filenames):
+                path = os.path.join(dirpath, filename)
+                assets.append((os.path.relpath(path, parent).replace(os.sep, '/'), path))
+
+    return assets
+
+
+def build(sources, output, root, jobs=None, shard=None, timings=None, assets=(), compress=True, limits=None, fragments=None, search=False, client=False, site=False):
+    '''
+    Renders sources into output, mirroring their paths relative to root, copies the files under the assets folders
+    and writes the build manifest.
+
+    output is a folder, or an archive when it ends with .zip, .tar, .tar.gz, .tgz, .tar.bz2 or .tar.xz (see
+    archive.open_writer, compress is for zip archives): pages are rendered by the workers and streamed into it as
+    they come, in order, without temporary files.
+
+    limits (see limits.Limits) apply to each page, a page going over them fails.
+
+    fragments is a fragments.FragmentStore the HTML of top level fields shared by pages is taken from and added to.
+    Its stats count the fragments of every worker, and it's evicted down to its size after the pages. Fragments
+    aren't used with search, which needs to see every component.
+
+    search writes a search index of the pages, and a page searching it, see search.py.
+
+    client writes pages holding the JSON of their mock, rendered in the browser by mockdown.js, which is written
+    once, see clientside.py.
+
+    site writes the link graph of the pages, an index page in each folder, and checks their local links, which fail
+    their page when broken, see site.py. Sharded builds check links when they're merged.
+
+    Returns a list of (source, error) of pages which failed.
+    '''
+    sources = sorted(set(os.path.normpath(source) for source in sources))
+
+    if shard:
+        index, count = shard
+        sources = assign_shards(sources, count, weights_of(sources, root, timings))[index - 1]
+
+    names = [output_name(os.path.relpath(source, root)).replace(os.sep, '/') for source in sources]
+    jobs = jobs or os.cpu_count() or 1
+
+    to_archive = archive.is_archive(output)
+
+    if to_archive:
+        work, args = _render_source_or_error, (sources, )
+    else:
+        work, args = _render_page_or_error, (sources, [os.path.join(output, name) for name in names])
+
+    # URL of the renderer from each page
+    scripts = [posixpath.relpath(clientside.renderer_name, posixpath.dirname(name) or '.') for name in names] if client else itertools.repeat(None)
+
+    args += (itertools.repeat(limits), itertools.repeat(fragments), itertools.repeat(search), itertools.repeat(site), scripts)
+
+    pages = {}
+    failures = []
+    texts = {}
+    links = {}
+
+    with archive.open_writer(output, compress) as writer:
+        if jobs == 1 or len(sources) < 2:
+            results = map(work, *args)
+            executor = None
+        else:
+            executor = ProcessPoolExecutor(max_workers=min(jobs, len(sources)))
+            results = executor.map(work, *args, chunksize=max(1, len(sources) // (jobs * 4)))
+
+        try:
+            for source, name, (result, error, stats, entries, page_links) in zip(sources, names, results):
+                if stats:
+                    fragments.stats.add(stats)
+
+                if entries is not None and not error:
+                    texts[name] = entries
+
+                if page_links is not None and not error:
+                    links[name] = page_links
+
+                if error:
+                    failures.append((source, error))
+                    continue
+
+                if to_archive:
+                    content, seconds = result
+                    writer.write(name, content)
+                    size, sha256 = len(content), hashlib.sha256(content).hexdigest()
+                else:
+                    size, sha256, seconds = result
+
+                pages[name] = {'source': os.path.relpath(source, root), 'bytes': size, 'sha256': sha256, 'seconds': round(seconds, 6)}
+        finally:
+            if executor:
+                executor.shutdown()
+
+        if fragments:
+            fragments.evict()
+
+        if search:
+            writer.write(search_.index_name, search_index(texts))
+            writer.write(search_.page_name, search_.search_page.encode())
+
+        if client:
+            writer.write(clientside.renderer_name, clientside.renderer.encode())
+
+        files = {}
+        for name, path in find_assets(assets):
+            with open(path, 'rb') as f:
+                content = f.read()
+
+            writer.write(name, content)
+            files[name] = {'bytes': len(content), 'sha256': hashlib.sha256(content).hexdigest()}
+
+        if site:
+            indexes = write_site(writer, pages, links)
+
+            if not shard:
+                known = set(pages) | set(indexes) | set(files)
+                exists = None if to_archive else lambda target: os.path.exists(os.path.join(output, target))
+                sources_of = dict(zip(names, sources))
+
+                for page, path, href in site_.check(links, known, exists):
+                    failures.append((sources_of[page], f'Broken link to "{href}" at {path}'))
+
+        writer.write(manifest_name, manifest(pages, shard, files))
+
+    return failures
+
+
+def manifest(pages, shard=None, assets=None):
+    '''
+    The manifest file of a build: a JSON object with the size, hash and source of each page, and the size and hash of
+    each asset
+    '''
+    content = {'version': 1, 'shard': '/'.join(map(str, shard)) if shard else None, 'pages': dict(sorted(pages.items()))}
+
+    if assets:
+        content['assets'] = dict(sorted(assets.items()))
+
+    return json.dumps(content, indent=1).encode()
+
+
+def search_index(texts):
+    '''
+    search.json of the {page: search entries} of a build
+    '''
+    index = search_.SearchIndex()
+
+    for page in sorted(texts):
+        index.add(page, texts[page])
+
+    return index.to_json()
+
+
+def write_site(writer, pages, links):
+    '''
+    Writes the link graph of the pages, and the index page of each folder not having one, returns their names
+    '''
+    writer.write(site_.graph_name, site_.graph_json(links))
+
+    indexes = site_.index_pages(pages, links)
+
+    for name, content in indexes.items():
+        writer.write(name, content)
+
+    return indexes
+
+
+def write_manifest(output, pages, shard=None, assets=None):
+    os.makedirs(output, exist_ok=True)
+
+    with open(os.path.join(output, manifest_name), 'wb') as f:
+        f.write(manifest(pages, shard, assets))
+
+
+def merge(shards, output, broken=None):
+    '''
+    Copies the pages and assets of each shard output, a folder or an archive, into the output folder, with a single
+    manifest, and a single search index, client side renderer and link graph when the shards have them. Fails if two
+    shards have different contents for the same page or asset.
+
+    The links of the merged site are checked, and the (page, path, href) of broken ones appended to broken, when a
+    list is given.
+    '''
+    pages = {}
+    assets = {}
+    # Search entries of the pages, when a shard has a search index
+    texts = None
+    # Links of the pages, when a shard has a link graph
+    links = None
+
+    with archive.DirectoryWriter(output) as writer:
+        for shard in shards:
+            shard_manifest = load_manifest(shard)
+            files = {'page': shard_manifest['pages'], 'asset': shard_manifest.get('assets', {})}
+            merged = {'page': pages, 'asset': assets}
+            extras = (clientside.renderer_name, search_.index_name, site_.graph_name)
+
+            for name, content in archive.read_files(shard, [*files['page'], *files['asset'], *extras]):
+                kind = 'page' if name in files['page'] else 'asset' if name in files['asset'] else None
+
+                if kind is not None:
+                    entry = files[kind][name]
+
+                    if name in merged[kind]:
+                        if merged[kind][name]['sha256'] != entry['sha256']:
+                            raise ValueError(f'{kind.capitalize()} "{name}" differs between shards')
+                        continue
+
+                    writer.write(name, content)
+                    merged[kind][name] = entry
+                elif name == clientside.renderer_name:
+                    writer.write(name, content)
+                elif name == search_.index_name:
+                    texts = texts or {}
+                    texts.update(search_.SearchIndex.from_json(content).entries())
+                elif name == site_.graph_name:
+                    links = links or {}
+                    links.update(site_.load_graph(content))
+
+        if texts is not None:
+            writer.write(search_.index_name, search_index(texts))
+            writer.write(search_.page_name, search_.search_page.encode())
+
+        if links is not None:
+            indexes = write_site(writer, pages, links)
+
+            if broken is not None:
+                broken += site_.check(links, set(pages) | set(indexes) | set(assets), lambda target: os.path.exists(os.path.join(output, target)))
+
+    write_manifest(output, pages, assets=assets)
+
+    return pages
+
+
+def parse_command_line(argv):
+    parser = argparse.ArgumentParser(prog='mockdown build', description='Renders many mocks into a folder, with a manifest of the generated pages')
+
+    parser.add_argument('inputs', nargs='+', help='Mock files, or folders to search for *.mock.yaml files')
+    parser.add_argument('--output', '-o', required=True, help='Output folder, or archive when it ends with .zip, .tar, .tar.gz, .tgz, .tar.bz2 or .tar.xz')
+    parser.add_argument('--assets', '-a', action='append', default=[], help='Folder copied into the output, like an icons folder, can be repeated')
+    parser.add_argument('--store', action='store_true', help='Zip archives store pages without compression')
+    parser.add_argument('--root', '-r', default='.', help='Output paths mirror input paths relative to this folder, defaults to the current one')
+    parser.add_argument('--jobs', '-j', type=int, default=None, help='Worker processes, defaults to the number of CPUs')
+    parser.add_argument('--shard', '-s', type=parse_shard, default=None, help='Renders just the K-th of N balanced shares of the inputs, as K/N')
+    parser.add_argument('--timings', '-t', default=None, help='Manifest of a previous build, its render times balance the shards instead of file sizes')
+
+    parser.add_argument('--fragments', '-f', default=None, help='Folder of a fragment store, keeping the HTML of top level fields for other pages and later builds')
+    parser.add_argument('--search', action='store_true', help=f'Also writes {search_.index_name}, an index of the labels, headers, buttons and table columns of the pages, and {search_.page_name}, which searches it')
+    parser.add_argument('--client', action='store_true', help=f'Writes pages holding the JSON of their mock, rendered in the browser by {clientside.renderer_name}, which is much smaller for table heavy mocks')
+    parser.add_argument('--site', action='store_true', help=f'Also writes {site_.graph_name}, the links of every page, and an {site_.index_name} in each folder, and fails pages with broken local links')
+    parser.add_argument('--fragments-size', type=int, default=256, help='Megabytes kept in the fragment store, the least recently used fragments are removed above it, defaults to 256')
+
+    limits_.make_limit_arguments(parser)
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_command_line(argv)
+
+    timings = load_manifest(args.timings) if args.timings and os.path.exists(args.timings) else None
+
+    fragments = FragmentStore(args.fragments, args.fragments_size * 2 ** 20) if args.fragments else None
+
+    failures = build(find_mocks(args.inputs), args.output, args.root, args.jobs, args.shard, timings, args.assets, not args.store, limits_.from_arguments(args), fragments, args.search, args.client, args.site)
+
+    if fragments:
+        print(f'Fragments: {fragments.stats}', file=sys.stderr)
+
+    for source, error in failures:
+        print(f'{source}: {error}', file=sys.stderr)
+
+    return 1 if failures else 0
+
+
+def parse_merge_command_line(argv):
+    parser = argparse.ArgumentParser(prog='mockdown merge', description='Merges the outputs of sharded builds into one folder')
+
+    parser.add_argument('shards', nargs='+', help='Output folders, or archives, of each shard')
+    parser.add_argument('--output', '-o', required=True, help='Output folder')
+
+    return parser.parse_args(argv)
+
+
+def merge_main(argv=None):
+    args = parse_merge_command_line(argv)
+
+    broken = []
+
+    try:
+        merge(args.shards, args.output, broken)
+    except (OSError, ValueError, KeyError) as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    for page, path, href in broken:
+        print(f'{page}: Broken link to "{href}" at {path}', file=sys.stderr)
+
+    return 1 if broken else 0
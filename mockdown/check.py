@@ -0,0 +1,154 @@
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import yaml
+
+from . import loader
+from .mockdown import MockGenerator
+
+
+class MarkedLoader(loader.Loader):
+    """Loader that remembers where each mapping, each of its values, and each item of a sequence which isn't a mapping,
+    starts in the source."""
+
+    source_marks = None
+
+    def construct_object(self, node, deep=False):
+        data = super().construct_object(node, deep)
+
+        if isinstance(node, yaml.MappingNode) and type(data) is dict:
+            self.source_marks.setdefault(id(data), node.start_mark)
+
+            for key_node, value_node in node.value:
+                if isinstance(key_node, yaml.ScalarNode):
+                    self.source_marks.setdefault((id(data), key_node.value), value_node.start_mark)
+        elif isinstance(node, yaml.SequenceNode) and type(data) is list:
+            # Items which aren't mappings, like a field which isn't a component, are marked by their index
+            for i, item_node in enumerate(node.value):
+                if not isinstance(item_node, yaml.MappingNode):
+                    self.source_marks.setdefault((id(data), i), item_node.start_mark)
+
+        return data
+
+
+class _NullWriter(object):
+
+    def write(self, value):
+        pass
+
+
+def _mark_of(marks, field, param):
+    if type(field) is list:
+        # Errors of items which aren't mappings are (list, index, message)
+        return marks.get((id(field), param))
+
+    if type(field) is not dict:
+        return None
+
+    for entry in field.values():
+        if type(entry) is list:
+            # Params of list entries, such as containers, come from a "_kwargs" item
+            entry = next((item['_kwargs'] for item in entry if type(item) is dict and '_kwargs' in item), None)
+
+        if type(entry) is dict and (id(entry), param) in marks:
+            return marks[(id(entry), param)]
+
+    return marks.get(id(field))
+
+
+def check_file(path):
+    '''
+    Validates a mock file without generating HTML.
+
+    Returns a list of (line, column, message), line and column are 1 based, or 0 when unknown.
+    '''
+    marks = {}
+    # A class per file so included files, loaded through type(loader), share the same marks
+    file_loader = type('FileLoader', (MarkedLoader, ), {'source_marks': marks})
+
+    try:
+        with open(path, 'r') as f:
+            document = yaml.load(f, file_loader)
+    except yaml.MarkedYAMLError as e:
+        mark = e.problem_mark or e.context_mark
+        return [(mark.line + 1, mark.column + 1, f'{e.context or ""} {e.problem}'.strip())]
+    except (OSError, yaml.YAMLError) as e:
+        return [(0, 0, str(e))]
+
+    if type(document) is not list:
+        return [(1, 1, 'Document must be a list of fields')]
+
+    errors = []
+    MockGenerator(document, _NullWriter(), errors=errors).generate()
+
+    result = []
+    for field, param, message in errors:
+        mark = _mark_of(marks, field, param)
+
+        if mark and mark.name != path:
+            message = f'{message} (included from "{mark.name}")'
+
+        result.append((mark.line + 1, mark.column + 1, message) if mark else (0, 0, message))
+
+    return result
+
+
+def find_mocks(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for file in sorted(files):
+                    if file.endswith(('.mock.yaml', '.mock.yml')):
+                        yield os.path.join(root, file)
+        else:
+            yield path
+
+
+def check_files(paths, jobs=None):
+    '''
+    Checks every file, in parallel when there are enough of them. Yields (path, errors) in the given order.
+    '''
+    paths = list(paths)
+    jobs = jobs or os.cpu_count() or 1
+
+    if jobs == 1 or len(paths) < 2:
+        yield from zip(paths, map(check_file, paths))
+        return
+
+    with ProcessPoolExecutor(max_workers=min(jobs, len(paths))) as executor:
+        chunksize = max(1, len(paths) // (jobs * 4))
+        yield from zip(paths, executor.map(check_file, paths, chunksize=chunksize))
+
+
+def parse_command_line(argv):
+    parser = argparse.ArgumentParser(prog='mockdown check', description='Validates mocks without generating HTML, reporting every error found')
+
+    parser.add_argument('paths', nargs='+', help='Mock files, or folders to search for *.mock.yaml files')
+    parser.add_argument('--jobs', '-j', type=int, default=None, help='Worker processes, defaults to the number of CPUs')
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_command_line(argv)
+
+    file_count = 0
+    failed_files = 0
+    error_count = 0
+
+    for path, errors in check_files(find_mocks(args.paths), args.jobs):
+        file_count += 1
+
+        if errors:
+            failed_files += 1
+            error_count += len(errors)
+
+        for line, column, message in errors:
+            print(f'{path}:{line}:{column}: {message}')
+
+    print(f'{error_count} error(s) in {failed_files} of {file_count} file(s)', file=sys.stderr)
+
+    return 1 if error_count else 0
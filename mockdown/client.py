@@ -0,0 +1,119 @@
+'''
+Entry point of the mockdown command. It runs the command on a render server (see server.py) when one is listening,
+which has everything imported already, and runs it in this process otherwise.
+
+This module is imported on every call, so it imports nothing from mockdown unless there is no server.
+'''
+import json
+import os
+import socket
+import struct
+import sys
+
+
+# Commands which keep running, or are the server itself, are never forwarded
+local_commands = ('serve', 'server')
+
+
+def socket_path():
+    '''
+    Path of the server socket: MOCKDOWN_SOCKET, or mockdown-<uid>.sock in XDG_RUNTIME_DIR or TMPDIR. An empty
+    MOCKDOWN_SOCKET disables the server.
+    '''
+    path = os.environ.get('MOCKDOWN_SOCKET')
+
+    if path is not None:
+        return path
+
+    folder = os.environ.get('XDG_RUNTIME_DIR') or os.environ.get('TMPDIR') or '/tmp'
+
+    return os.path.join(folder, f'mockdown-{os.getuid()}.sock')
+
+
+def server_uid(connection, path):
+    '''
+    User id of the server at the other end of connection: from its credentials where the platform gives them, the
+    owner of the socket file at path otherwise
+    '''
+    if hasattr(socket, 'SO_PEERCRED'):
+        credentials = connection.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+
+        return struct.unpack('3i', credentials)[1]
+
+    return os.stat(path).st_uid
+
+
+def send(stream, message):
+    stream.write(json.dumps(message).encode() + b'\n')
+    stream.flush()
+
+
+def receive(stream):
+    line = stream.readline()
+
+    return json.loads(line) if line else None
+
+
+def forward(argv, path=None, stdin=None, stdout=None, stderr=None):
+    '''
+    Runs the command line argv on the server at path, defaults to socket_path(). The server reads stdin only if the
+    command does. Returns its exit code, or None when no server is listening, or the one listening runs as another
+    user, which could have bound a predictable path in a shared folder to read the commands.
+    '''
+    path = socket_path() if path is None else path
+
+    if not path or not hasattr(socket, 'AF_UNIX'):
+        return None
+
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+    try:
+        connection.connect(path)
+    except OSError:
+        connection.close()
+        return None
+
+    try:
+        uid = server_uid(connection, path)
+    except OSError:
+        uid = None
+
+    if uid != os.getuid():
+        connection.close()
+        print(f'mockdown: ignoring the render server at {path}, which runs as another user', file=stderr or sys.stderr)
+        return None
+
+    with connection, connection.makefile('rwb') as stream:
+        send(stream, {'argv': argv, 'cwd': os.getcwd()})
+
+        while True:
+            message = receive(stream)
+
+            if message is None:
+                print('mockdown: the render server closed the connection', file=stderr or sys.stderr)
+                return 1
+
+            if 'read' in message:
+                send(stream, {'stdin': (stdin or sys.stdin).read()})
+                continue
+
+            (stdout or sys.stdout).write(message['stdout'])
+            (stderr or sys.stderr).write(message['stderr'])
+
+            return message['exit']
+
+
+def main():
+    argv = sys.argv[1:]
+    code = None if argv[:1] and argv[0] in local_commands else forward(argv)
+
+    if code is None:
+        from .mockdown import main
+
+        return main()
+
+    sys.exit(code)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,636 @@
+'''
+Client side output: the document as compact JSON, with its params checked and their defaults applied, rendered in
+the browser by one shared script, mockdown.js, into the same HTML MockGenerator writes. Table heavy mocks are mostly
+the same markup repeated for each cell, so their JSON is a fraction of their HTML, and encoding it skips writing that
+markup.
+
+A page is a small HTML file holding the JSON, which loads mockdown.js and replaces itself with the rendered HTML:
+
+    <script src="mockdown.js"></script>
+    <script type="application/json" id="mockdown-document">{"version":1,"catalogs":[],"right":[],"shared":[],"fields":[...]}</script>
+
+fields has a node, or null for unknown kinds, for each top level field, and right the indexes of the ones in a
+right aligned row. A node is [kind, params...] in the order of params below, container nodes end with the list of
+their fields, tables and multiple selects with their column names and rows of cells, a text, a node, or the index of
+a node in shared, which holds the distinct component cells once. Option catalogs are numbered like the catalog-N
+datalists of MockGenerator, and listed in catalogs. Components of plugins are rendered on the server, as
+["html", text].
+'''
+import functools
+import io
+import json
+
+from .escaping import escape
+from .mockdown import MockGenerator
+
+
+renderer_name = 'mockdown.js'
+
+# Params which can't be None
+required = object()
+
+colors = {'blue': 'primary', 'green': 'success', 'yellow': 'warning', 'red': 'danger', 'gray': 'secondary'}
+
+# (checker context, [(param, default, types, allowed values)]) of each kind, with the defaults and checks of the
+# MockGenerator methods, so a document fails to encode where it fails to render. The level of headers isn't checked,
+# its is_() check doesn't assert.
+params = {
+    'br': ('br', []),
+    'span': ('span', [('label', None, (str, ), None), ('styles', None, (str, ), None), ('br', True, (bool, ), None)]),
+    'header': ('header', [('level', 1, (int, ), None), ('label', None, (str, ), None), ('br', True, (bool, ), None)]),
+    'text': ('text', [('label', None, (str, ), None), ('enabled', True, (bool, ), None), ('placeholder', None, (str, ), None), ('br', True, (bool, ), None), ('required', True, (bool, ), None)]),
+    'finder': ('finder', [('label', None, (str, ), None), ('enabled', True, (bool, ), None), ('placeholder', None, (str, ), None), ('br', True, (bool, ), None), ('required', True, (bool, ), None)]),
+    'select': ('select', [('label', None, (str, ), None), ('enabled', True, (bool, ), None), ('options', required, (list, str), None), ('br', True, (bool, ), None), ('required', True, (bool, ), None)]),
+    'radio': ('check', [('label', None, (str, ), None), ('enabled', True, (bool, ), None), ('checked', False, (bool, ), None), ('br', True, (bool, ), None), ('required', True, (bool, ), None)]),
+    'check': ('check', [('label', None, (str, ), None), ('enabled', True, (bool, ), None), ('checked', False, (bool, ), None), ('br', True, (bool, ), None)]),
+    'multipleselect': ('multipleselect', [('columns', required, (dict, ), None), ('label', None, (str, ), None), ('enabled', True, (bool, ), None), ('editable', False, (bool, ), None), ('placeholder', None, (str, ), None), ('options', None, (list, str), None), ('br', True, (bool, ), None), ('required', True, (bool, ), None)]),
+    'button': ('button', [('text', required, (str, ), None), ('enabled', True, (bool, ), None), ('color', 'blue', (str, ), tuple(colors.keys())), ('br', True, (bool, ), None)]),
+    'container': ('container', [('direction', 'horizontal', None, ('horizontal', 'vertical')), ('title', None, (str, ), None), ('enabled', True, (bool, ), None), ('br', True, (bool, ), None)]),
+    'textarea': ('textarea', [('placeholder', required, (str, ), None), ('label', None, (str, ), None), ('enabled', True, (bool, ), None), ('br', True, (bool, ), None), ('required', True, (bool, ), None)]),
+    'table': ('table', [('title', None, (str, ), None), ('enabled', True, (bool, ), None), ('columns', required, (dict, ), None), ('br', True, (bool, ), None)]),
+    'link': ('anchor', [('href', None, (str, ), None), ('br', True, (bool, ), None)]),
+}
+
+
+class DocumentEncoder(MockGenerator):
+    '''
+    Encodes a document for the client side renderer, traversing it as MockGenerator does, so sinks and limits work
+    the same
+    '''
+
+    def __init__(self, input, components=None, sinks=(), limits=None):
+        super().__init__(input, None, components=components, sinks=sinks, limits=limits)
+
+        # Same order, the first kind found in a field is its kind
+        self._field_kinds = {kind: functools.partial(self._encode, kind) for kind in self._field_kinds}
+        # Node list the components are added to
+        self._target = None
+        self._catalog_options = []
+        self._right = []
+        self._plugins = None
+        # Nodes of the distinct component cells of tables, and their indexes by repr of the cell
+        self._shared = []
+        self._shared_cells = {}
+
+    def encode(self):
+        '''
+        The document, as a JSON serializable dict
+        '''
+        fields = []
+
+        self._target = fields
+        self._generate_fields(self._in, True)
+
+        return {'version': 1, 'catalogs': self._catalog_options, 'right': self._right, 'shared': self._shared, 'fields': fields}
+
+    def _set_target(self, target):
+        self._target = target
+
+    def _generate_root_field(self, field, is_last, default_kwargs):
+        fields = self._target
+
+        if MockGenerator.aligned_right(field):
+            self._right.append(len(fields))
+
+        if is_last:
+            default_kwargs['br'] = False
+
+        node = []
+        self._target = node
+        self._stack.append((self._set_target, (fields, )))
+
+        self._generate_field(field, default_kwargs)
+
+        fields.append(node[0] if node else None)
+
+    def _plugin_component(self, field):
+        if type(field) is dict:
+            for kind in field:
+                component = self._components.get(kind)
+
+                if component:
+                    return kind, functools.partial(self._encode_plugin, component)
+
+        return None, None
+
+    def _encode_plugin(self, component, *args, **kwargs):
+        if self._plugins is None:
+            self._plugins = MockGenerator(None, None, components=self._components)
+
+        with io.StringIO() as out:
+            self._plugins._out = out
+            component(self._plugins, *args, **kwargs)
+            self._plugins._run(0)
+
+            self._target.append(['html', out.getvalue()])
+
+    def _values(self, kind, args, kwargs):
+        '''
+        Values of the params of kind, in their order. Params are checked directly, and when one fails, again by the
+        ArgsChecker, for its error.
+        '''
+        context, declared = params[kind]
+        values = []
+
+        if kind == 'container' and any(type(arg) is not dict for arg in args):
+            return self._checked_values(context, declared, args, kwargs)
+
+        for param, default, types, allowed in declared:
+            value = kwargs.get(param, default)
+
+            if value is required:
+                return self._checked_values(context, declared, args, kwargs)
+
+            if param in kwargs and ((value is None and default is required) or (types and type(value) not in types) or (allowed and value not in allowed)):
+                return self._checked_values(context, declared, args, kwargs)
+
+            values.append(value)
+
+        return values
+
+    def _checked_values(self, context, declared, args, kwargs):
+        checker = self._checker.reset(context, args, kwargs)
+        values = []
+
+        if context == 'container':
+            checker.allArgs().istype(dict)
+
+        for param, default, types, allowed in declared:
+            checker.param(param)
+
+            if default is required:
+                checker.isNotNone()
+            else:
+                checker.default(default)
+
+            if types:
+                checker.istype(*types)
+
+            if allowed:
+                checker.isin(*allowed)
+
+            values.append(checker.get())
+
+        return values
+
+    def _encode(self, kind, *args, **kwargs):
+        values = self._values(kind, args, kwargs)
+
+        if kind == 'br':
+            return
+
+        node = [kind, *values]
+
+        if kind == 'select':
+            # Options as text are a catalog
+            node[3] = self._catalog(values[2]) if type(values[2]) is str else self._texts(values[2])
+            self._target.append(node)
+        elif kind == 'multipleselect':
+            options, enabled = values[5], values[2]
+            node[6] = self._catalog(options) if options is not None and enabled else None
+            node[1] = None
+            self._target.append(node)
+            node += self._table(values[0])
+        elif kind == 'table':
+            node[3] = None
+            self._target.append(node)
+            node += self._table(values[2])
+        elif kind == 'container':
+            direction, br = values[0], values[3]
+            fields = []
+            node.append(fields)
+            self._target.append(node)
+
+            self._stack.append((self._set_target, (self._target, )))
+            self._schedule_fields(args, False, {'br': direction == 'vertical' and br})
+            self._stack.append((self._set_target, (fields, )))
+        else:
+            self._target.append(node)
+
+    def _table(self, columns):
+        '''
+        [column names, rows] of a table, cells being texts, nodes, or indexes of shared nodes. Cells of columns are
+        mostly alike, like a check on each row, so each distinct cell is encoded once, unless sinks or limits need to
+        see every one.
+        '''
+        target = self._target
+        share = not self._repeats and self._limits is None
+        names = [str(column) for column in columns.keys()]
+        rows = []
+
+        firstColumn = list(columns.keys())[0]
+
+        rowCount = len(columns[firstColumn])
+
+        defaults = {'br': False}
+        base = len(self._stack)
+
+        for row in range(rowCount):
+            if self._limits is not None:
+                self._spend(0, len(columns))
+
+            cells = []
+
+            for key, value in columns.items():
+                cell = value[row]
+
+                if type(cell) == dict:
+                    cache_key = repr(cell) if share else None
+                    shared = self._shared_cells.get(cache_key)
+
+                    if shared is not None:
+                        cells.append(shared)
+                        continue
+
+                    if self._paths:
+                        self._path.append(f'{key}[{row}]')
+
+                    node = []
+                    written = self._written()
+                    self._target = node
+                    self._generate_field(cell, defaults)
+                    self._run(base)
+                    self._target = target
+
+                    if self._paths:
+                        self._path.pop()
+
+                    node = node[0] if node else ''
+
+                    # The first use of a catalog or definition writes it, like MockGenerator._cell_renderer, later
+                    # cells must not repeat it
+                    if share and len(self._shared_cells) < MockGenerator.cell_cache_size and self._written() == written:
+                        self._shared_cells[cache_key] = len(self._shared)
+                        self._shared.append(node)
+                        node = self._shared_cells[cache_key]
+
+                    cells.append(node)
+                else:
+                    if self._limits is not None:
+                        self._spend_text(cell)
+
+                    cells.append(str(cell))
+
+            rows.append(cells)
+
+        return [names, rows]
+
+    def _written(self):
+        '''
+        Number of catalogs and definitions written so far, the latter by plugins
+        '''
+        return len(self._catalogs) + (len(self._plugins._defined) if self._plugins else 0)
+
+    def _texts(self, options):
+        '''
+        Options as texts, counted against the limits like MockGenerator writes them
+        '''
+        if self._limits is not None:
+            for option in options:
+                self._spend_text(option)
+
+        return [str(option) for option in options]
+
+    def _catalog(self, options):
+        '''
+        Number of the catalog of options, like MockGenerator._catalog, which the script writes on its first use
+        '''
+        key = options if type(options) is str else id(options)
+        entry = self._catalogs.get(key)
+
+        if entry is not None:
+            return entry[0]
+
+        catalog = len(self._catalogs) + 1
+        self._catalogs[key] = catalog, options
+
+        if type(options) is str:
+            options = [option.strip() for option in options.splitlines() if option.strip()]
+
+        self._catalog_options.append(self._texts(options))
+
+        return catalog
+
+
+def encode(document, components=None, sinks=(), limits=None):
+    '''
+    The JSON of document, as compact text
+    '''
+    encoded = DocumentEncoder(document, components=components, sinks=sinks, limits=limits).encode()
+
+    return json.dumps(encoded, ensure_ascii=False, separators=(',', ':'))
+
+
+def page(content, script=renderer_name):
+    '''
+    The HTML page of the JSON content of a document, rendered by the script at the given URL
+    '''
+    # Nothing in the JSON can end its script element
+    content = content.replace('<', '\\u003c')
+
+    return f'''<html>
+<head>
+  <meta charset="UTF-8"/>
+  <script src="{escape(script)}"></script>
+</head>
+<body>
+  <script type="application/json" id="mockdown-document">{content}</script>
+  <script>mockdown.show('mockdown-document')</script>
+</body>
+</html>
+'''
+
+
+# Mirrors the MockGenerator methods of each kind, with their HTML
+renderer = '''// Renders the JSON of mockdown documents into the HTML mockdown writes, see clientside.py
+var mockdown = (function () {
+  'use strict';
+
+  var HEADER = %(header)s;
+  var FOOTER = %(footer)s;
+  var ROW = %(row)s;
+  var RIGHT_ROW = %(right_row)s;
+  var ROW_END = %(row_end)s;
+  var CATALOG_SCRIPT = %(catalog_script)s;
+  var COLORS = %(colors)s;
+  var ENTITIES = {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'};
+
+  function esc(value) {
+    return value === null ? 'None' : String(value).replace(/[&<>"]/g, function (c) { return ENTITIES[c]; });
+  }
+
+  function Renderer(document) {
+    this.out = [];
+    this.catalogs = document.catalogs;
+    this.shared = document.shared;
+    this.written = [];
+  }
+
+  Renderer.prototype.w = function (text) {
+    this.out.push(text);
+  };
+
+  Renderer.prototype.br = function (br) {
+    if (br) {
+      this.w('<br/>');
+    }
+  };
+
+  Renderer.prototype.img = function (image) {
+    this.w(' <img src="./open-iconic/svg/' + image + '.svg" height=18 width=18/>');
+  };
+
+  Renderer.prototype.property = function (key, value) {
+    if (value) {
+      this.w(' ' + key + '="' + esc(value) + '"');
+    }
+  };
+
+  Renderer.prototype.span = function (label, required, enabled, style) {
+    if (label) {
+      this.w('<span');
+
+      if (style && style.length > 0) {
+        this.w(' style="' + (style.indexOf('overstrike') >= 0 ? 'text-decoration: line-through;' : '') + '"');
+      }
+
+      if (!enabled) {
+        this.w(' class="disabled"');
+      }
+
+      this.w('>' + esc(label) + (required && enabled ? ' *' : '') + '</span>');
+    }
+  };
+
+  Renderer.prototype.input = function (enabled, placeholder, catalog) {
+    this.w('<input');
+    this.property('placeholder', placeholder);
+    this.property('list', catalog);
+    this.w(enabled ? '/>' : ' disabled readonly/>');
+  };
+
+  // Id of catalog n, its datalist is written on its first use
+  Renderer.prototype.catalog = function (n) {
+    if (!this.written[n]) {
+      if (this.written.length === 0) {
+        this.w(CATALOG_SCRIPT);
+      }
+
+      this.written[n] = true;
+      this.w('<datalist id="catalog-' + n + '">' + this.catalogs[n - 1].map(function (option) { return '<option>' + esc(option) + '</option>'; }).join('') + '</datalist>\\n');
+    }
+
+    return 'catalog-' + n;
+  };
+
+  Renderer.prototype.table = function (enabled, editable, names, rows) {
+    var self = this;
+
+    this.w('<table' + (enabled ? '' : ' class="disabled"') + '>\\n  <thead>\\n');
+    names.forEach(function (name) { self.w('    <td>' + esc(name) + '</td>\\n'); });
+    this.w((enabled ? '    <td>Actions</td>\\n' : '') + '  </thead>\\n');
+
+    rows.forEach(function (cells) {
+      self.w('  <tr>\\n');
+
+      cells.forEach(function (cell) {
+        self.w(editable ? '    <td><div>' : '    <td>');
+
+        if (typeof cell === 'number') {
+          cell = self.shared[cell];
+        }
+
+        if (typeof cell === 'string') {
+          self.w(esc(cell));
+        } else {
+          self.node(cell);
+        }
+
+        if (editable) {
+          self.img('pencil');
+          self.w('</div>');
+        }
+
+        self.w('</td>\\n');
+      });
+
+      if (enabled) {
+        self.w('    <td>');
+        self.img('circle-x');
+        self.w('</td>\\n');
+      }
+
+      self.w('  </tr>\\n');
+    });
+
+    this.w('</table><br/>\\n');
+  };
+
+  var kinds = {
+    html: function (html) {
+      this.w(html);
+    },
+    span: function (label, styles, br) {
+      // MockGenerator passes the styles as required
+      this.span(label, styles ? styles.split(',').length > 0 : false, true, []);
+      this.br(br);
+      this.w('\\n');
+    },
+    header: function (level, label, br) {
+      this.w('<h' + level + '>' + esc(label) + '</h' + level + '>' + (br ? '<br/><br/>' : '') + '\\n');
+    },
+    text: function (label, enabled, placeholder, br, required) {
+      this.span(label, required, enabled);
+
+      if (label) {
+        this.w('<br/>\\n');
+      }
+
+      this.w('<input');
+      this.property('placeholder', placeholder);
+      this.w(enabled ? '/>' : ' disabled readonly/>');
+      this.br(br);
+    },
+    finder: function (label, enabled, placeholder, br, required) {
+      this.span(label, required, enabled);
+      this.input(enabled, placeholder);
+      this.img('magnifying-glass');
+      this.br(br);
+      this.w('\\n');
+    },
+    select: function (label, enabled, options, br, required) {
+      var self = this;
+      var catalog = typeof options === 'number' ? this.catalog(options) : null;
+
+      this.span(label, required, enabled);
+      this.w('<br/>\\n<select' + (catalog ? ' data-catalog="' + catalog + '"' : '') + (enabled ? '' : ' disabled readonly') + '>\\n');
+
+      if (!catalog) {
+        options.forEach(function (option) { self.w('  <option>' + esc(option) + '</option>\\n'); });
+      }
+
+      this.w('</select>');
+      this.br(br);
+      this.w('\\n');
+    },
+    radio: function (label, enabled, checked, br, required) {
+      this.w('<label class="form-check-label"><input class="form-check-input" type="radio" name="radio"' + (checked ? ' checked' : '') + (enabled ? '' : ' disabled readonly'));
+      this.w('> ' + esc(label) + (required && enabled ? ' *' : '') + '</label>');
+      this.br(br);
+      this.w('\\n');
+    },
+    check: function (label, enabled, checked, br) {
+      this.w('<input type="checkbox"' + (checked ? ' checked="checked"' : '') + (enabled ? '' : ' disabled readonly'));
+      this.w(label ? '><label' + (enabled ? '' : ' class="disabled"') + '> ' + esc(label) + '</label></input>' : '/>');
+      this.br(br);
+      this.w('\\n');
+    },
+    multipleselect: function (columns, label, enabled, editable, placeholder, catalog, br, required, names, rows) {
+      var id = catalog === null ? null : this.catalog(catalog);
+
+      this.span(label, required, enabled);
+      this.w('<br/>\\n');
+
+      if (enabled) {
+        this.input(enabled, placeholder, id);
+        this.img('plus');
+        this.w('<br/>\\n');
+      }
+
+      this.table(enabled, editable, names, rows);
+    },
+    button: function (text, enabled, color, br) {
+      this.w('<input type="button" value="' + esc(text) + '" class="btn btn-' + COLORS[color] + '"' + (enabled ? '' : ' disabled') + '/>');
+      this.br(br);
+      this.w('\\n');
+    },
+    container: function (direction, title, enabled, br, fields) {
+      var self = this;
+      var tag = title ? 'fieldset' : 'div';
+
+      this.w('<' + tag + (title ? ' class="border"' : '') + (enabled ? '' : ' disabled') + '>\\n');
+
+      if (title) {
+        this.w('  <legend>' + esc(title) + '</legend>\\n');
+      }
+
+      fields.forEach(function (field) { self.node(field); });
+
+      this.w('</' + tag + '>');
+      this.br(br);
+      this.w('\\n');
+    },
+    textarea: function (placeholder, label, enabled, br, required) {
+      this.span(label, required, enabled);
+      this.w('<textarea rows=4 cols=50');
+      this.property('placeholder', placeholder);
+      this.w((enabled ? '' : ' disabled readonly') + '></textarea>');
+      this.br(br);
+      this.w('\\n');
+    },
+    table: function (title, enabled, columns, br, names, rows) {
+      this.table(enabled, false, names, rows);
+    },
+    link: function (href, br) {
+      this.w('<a href="' + esc(href) + '">' + esc(href) + '</a><br/>\\n');
+    }
+  };
+
+  Renderer.prototype.node = function (node) {
+    kinds[node[0]].apply(this, node.slice(1));
+  };
+
+  // The HTML of a document, as mockdown writes it
+  function render(document) {
+    var renderer = new Renderer(document);
+    var right = new Set(document.right);
+
+    renderer.w(HEADER);
+
+    document.fields.forEach(function (field, i) {
+      renderer.w(right.has(i) ? RIGHT_ROW : ROW);
+
+      if (field !== null) {
+        renderer.node(field);
+      }
+
+      renderer.w(ROW_END);
+    });
+
+    renderer.w(FOOTER);
+
+    return renderer.out.join('');
+  }
+
+  // Replaces the page with the document in the JSON script element of the given id
+  function show(id) {
+    var html = render(JSON.parse(window.document.getElementById(id).textContent));
+
+    function replace() {
+      window.document.open();
+      window.document.write(html);
+      window.document.close();
+    }
+
+    if (window.document.readyState === 'loading') {
+      window.document.addEventListener('DOMContentLoaded', replace);
+    } else {
+      replace();
+    }
+  }
+
+  return {render: render, show: show};
+})();
+
+if (typeof module !== 'undefined') {
+  module.exports = mockdown;
+}
+''' % {
+    'header': json.dumps(MockGenerator.header),
+    'footer': json.dumps(MockGenerator.footer),
+    'row': json.dumps(MockGenerator.container_header),
+    'right_row': json.dumps(MockGenerator.subcontainer_header),
+    'row_end': json.dumps(MockGenerator.container_footer),
+    'catalog_script': json.dumps(MockGenerator.catalog_script),
+    'colors': json.dumps(colors),
+}
@@ -0,0 +1,222 @@
+'''
+Seeded generator of synthetic mocks, for stress, scaling and correctness tests.
+
+python -m mockdown.corpus OUTPUT --pages 100 --shape mixed --seed 0 writes OUTPUT/page-N.mock.yaml, plus the
+fragments they include under OUTPUT/fragments.
+'''
+import argparse
+import os
+import random
+import sys
+
+import yaml
+
+
+words = (
+    'customer', 'name', 'address', 'city', 'state', 'country', 'product', 'order', 'invoice', 'date', 'amount',
+    'status', 'notes', 'phone', 'email', 'document', 'training', 'participant', 'supplier', 'price', 'quantity',
+    'discount', 'category', 'region', 'manager', 'approval', 'comment', 'start', 'end', 'description',
+)
+
+colors = ('blue', 'green', 'yellow', 'red', 'gray')
+
+
+class Include(object):
+    '''
+    Dumped as an !include tag
+    '''
+
+    def __init__(self, path):
+        self.path = path
+
+
+class Dumper(yaml.SafeDumper):
+    pass
+
+
+Dumper.add_representer(Include, lambda dumper, include: dumper.represent_scalar('!include', include.path))
+
+
+# Sizes of each shape, any of them can be overridden. tables and containers are the fraction of fields of each kind,
+# the other fields are simple components.
+shapes = {
+    # A bit of everything, like a hand written form
+    'mixed': dict(fields=40, tables=0.1, containers=0.2, depth=2, children=4, rows=5, columns=4, options=8, includes=0),
+    # Many top level fields
+    'flat': dict(fields=2000, tables=0.05, containers=0, depth=0, children=0, rows=3, columns=3, options=5, includes=0),
+    # Containers inside containers
+    'deep': dict(fields=5, tables=0, containers=1, depth=100, children=2, rows=2, columns=2, options=3, includes=0),
+    # Huge tables with component cells, 100k cells each by default
+    'table': dict(fields=2, tables=1, containers=0, depth=0, children=0, rows=25000, columns=4, options=3, includes=0),
+    # Selects with long option lists
+    'options': dict(fields=50, tables=0, containers=0, depth=0, children=0, rows=2, columns=2, options=5000, includes=0),
+    # Many shared fragments, included by every page
+    'includes': dict(fields=20, tables=0.1, containers=0.2, depth=1, children=3, rows=3, columns=3, options=5, includes=30),
+}
+
+
+class CorpusGenerator(object):
+
+    def __init__(self, seed=0, fields=40, tables=0.1, containers=0.2, depth=2, children=4, rows=5, columns=4, options=8, includes=0):
+        self._rng = random.Random(seed)
+        self.fields = fields
+        self.tables = tables
+        self.containers = containers
+        self.depth = depth
+        self.children = children
+        self.rows = rows
+        self.columns = columns
+        self.options = options
+        self.includes = includes
+
+    def _words(self, count=2):
+        return ' '.join(self._rng.choice(words) for i in range(count)).capitalize()
+
+    def _simple_field(self):
+        kind = self._rng.choice(('span', 'header', 'text', 'text', 'finder', 'select', 'radio', 'check', 'button', 'textarea', 'link'))
+
+        if kind == 'span':
+            return {'span': {'label': self._words(5)}}
+        elif kind == 'header':
+            return {'header': {'label': self._words(3), 'level': self._rng.randint(1, 6)}}
+        elif kind in ('text', 'finder'):
+            return {kind: {'label': self._words(), 'placeholder': self._words(3), 'required': self._rng.random() < 0.5}}
+        elif kind == 'select':
+            return {'select': {'label': self._words(), 'options': [self._words(2) for i in range(self.options)]}}
+        elif kind in ('radio', 'check'):
+            return {kind: {'label': self._words(), 'checked': self._rng.random() < 0.3}}
+        elif kind == 'button':
+            return {'button': {'text': self._words(1), 'color': self._rng.choice(colors)}}
+        elif kind == 'textarea':
+            return {'textarea': {'label': self._words(), 'placeholder': self._words(4)}}
+        else:
+            return {'link': {'href': f'{self._rng.choice(words)}.html'}}
+
+    def _columns(self, rows, columns):
+        result = {}
+
+        for i in range(columns):
+            kind = self._rng.choice(('text', 'number', 'check', 'container'))
+
+            if kind == 'text':
+                cells = [self._words(2) for row in range(rows)]
+            elif kind == 'number':
+                cells = [self._rng.randint(1, 10000) for row in range(rows)]
+            elif kind == 'check':
+                cells = [{'check': None} for row in range(rows)]
+            else:
+                cells = [{'container': [{'check': None}, {'text': {'placeholder': f'{self._rng.choice(words)}, {row}'}}]} for row in range(rows)]
+
+            result[f'{self._words(1)} {i}'] = cells
+
+        return result
+
+    def _table(self):
+        if self._rng.random() < 0.5:
+            return {'table': {'title': self._words(), 'columns': self._columns(self.rows, self.columns)}}
+        else:
+            return {'multipleselect': {'label': self._words(), 'placeholder': self._words(3), 'columns': self._columns(self.rows, self.columns)}}
+
+    def _container(self, depth):
+        '''
+        A container nesting depth containers, built from the innermost one so depth is not limited by recursion
+        '''
+        container = None
+
+        for level in range(depth):
+            children = [{'_kwargs': {'direction': self._rng.choice(('horizontal', 'vertical')), 'title': self._words()}}]
+            children += [self._simple_field() for i in range(self.children)]
+
+            if container:
+                children.insert(self._rng.randint(1, len(children)), container)
+
+            container = {'container': children}
+
+        return container
+
+    def field(self):
+        choice = self._rng.random()
+
+        if choice < self.tables and self.rows and self.columns:
+            return self._table()
+        elif choice < self.tables + self.containers and self.depth:
+            return self._container(self._rng.randint(max(1, self.depth // 2), self.depth))
+        else:
+            return self._simple_field()
+
+    def document(self, fragments=()):
+        '''
+        A list of fields, with some !include of fragments when they are given
+        '''
+        fields = [self.field() for i in range(self.fields)]
+
+        for fragment in fragments:
+            fields.insert(self._rng.randint(0, len(fields)), {'container': Include(fragment)})
+
+        return fields
+
+    def fragment(self):
+        '''
+        Contents of a container, to be included by documents
+        '''
+        return [self.field() for i in range(max(1, self.children))]
+
+
+def dump(data, path):
+    with open(path, 'w') as f:
+        yaml.dump(data, f, Dumper=Dumper, allow_unicode=True, sort_keys=False)
+
+
+def write_corpus(folder, pages=10, seed=0, shape='mixed', **sizes):
+    '''
+    Writes pages documents of the given shape, returns their paths
+    '''
+    generator = CorpusGenerator(seed, **dict(shapes[shape], **sizes))
+
+    fragments = []
+    if generator.includes:
+        os.makedirs(os.path.join(folder, 'fragments'), exist_ok=True)
+
+        for i in range(generator.includes):
+            fragment = os.path.join('fragments', f'fragment-{i}.yaml')
+            dump(generator.fragment(), os.path.join(folder, fragment))
+            fragments.append(fragment)
+
+    paths = []
+    for i in range(pages):
+        path = os.path.join(folder, f'page-{i}.mock.yaml')
+        dump(generator.document(fragments), path)
+        paths.append(path)
+
+    return paths
+
+
+def parse_command_line(argv):
+    parser = argparse.ArgumentParser(prog='python -m mockdown.corpus', description='Writes synthetic mocks for stress and scaling tests')
+
+    parser.add_argument('output', help='Output folder')
+    parser.add_argument('--pages', '-p', type=int, default=10, help='Documents to write, defaults to 10')
+    parser.add_argument('--seed', '-s', type=int, default=0, help='Same seed, same corpus, defaults to 0')
+    parser.add_argument('--shape', choices=shapes, default='mixed', help='Kind of document, defaults to mixed')
+
+    for size, value in shapes['mixed'].items():
+        parser.add_argument(f'--{size}', type=type(value), default=None, help=f'Overrides the shape\'s {size}')
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_command_line(argv)
+
+    sizes = {size: getattr(args, size) for size in shapes['mixed'] if getattr(args, size) is not None}
+
+    os.makedirs(args.output, exist_ok=True)
+
+    for path in write_corpus(args.output, args.pages, args.seed, args.shape, **sizes):
+        print(path)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,227 @@
+import argparse
+import glob
+import json
+import os
+
+import yaml
+
+from . import loader
+from .check import find_mocks
+
+
+class IncludeLoader(loader.Loader):
+    # Keeps the !include nodes instead of composing the included files
+    inline_includes = False
+
+
+def scan_includes(path, folders=None):
+    '''
+    Returns the absolute paths of the files directly included by path, with glob patterns expanded, without
+    constructing the document. The folders listed by glob patterns are added to folders, when given.
+    '''
+    with open(path, 'r') as f:
+        root = yaml.compose(f, Loader=IncludeLoader)
+
+    folder = os.path.dirname(os.path.abspath(path))
+    includes = []
+    nodes = [root] if root else []
+    # Aliases repeat nodes, visiting them once avoids blowing up on alias bombs
+    seen = set()
+
+    while nodes:
+        node = nodes.pop()
+
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+
+        if node.tag == '!include':
+            include, pattern_folder = loader.include_target(folder, node.value)
+
+            if pattern_folder is None:
+                includes.append(include)
+            else:
+                includes.extend(sorted(glob.glob(include)))
+
+                if folders is not None:
+                    folders.append(pattern_folder)
+        elif isinstance(node, yaml.SequenceNode):
+            nodes.extend(reversed(node.value))
+        elif isinstance(node, yaml.MappingNode):
+            for key, value in reversed(node.value):
+                nodes.append(value)
+                nodes.append(key)
+
+    return list(dict.fromkeys(includes))
+
+
+class IncludeIndex(object):
+    '''
+    Which files each file includes, and so which ones include it.
+
+    Entries keep the mtime and size of the file when it was scanned, and the mtimes of the folders its glob includes
+    list, so update() only parses files changed since then, or whose globs may match other files. When a path is
+    given the index is persisted there as JSON, with paths relative to its folder.
+    '''
+
+    version = 2
+
+    def __init__(self, path=None):
+        self._path = path
+        self._root = os.path.dirname(os.path.abspath(path)) if path else None
+        self._files = {}
+        self._includers = None
+
+        if path and os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        with open(self._path, 'r') as f:
+            content = json.load(f)
+
+        if content.get('version') != IncludeIndex.version:
+            return
+
+        for file, entry in content['files'].items():
+            folders = {self._absolute(folder): mtime for folder, mtime in entry['folders'].items()}
+            self._files[self._absolute(file)] = (entry['mtime'], entry['size'], [self._absolute(include) for include in entry['includes']], folders)
+
+    def save(self):
+        files = {}
+        for file, (mtime, size, includes, folders) in sorted(self._files.items()):
+            files[self._relative(file)] = {
+                'mtime': mtime,
+                'size': size,
+                'includes': [self._relative(include) for include in includes],
+                'folders': {self._relative(folder): folder_mtime for folder, folder_mtime in folders.items()},
+            }
+
+        with open(self._path, 'w') as f:
+            json.dump({'version': IncludeIndex.version, 'files': files}, f, indent=1)
+
+    def _absolute(self, path):
+        return os.path.normpath(os.path.join(self._root, path))
+
+    def _relative(self, path):
+        return os.path.relpath(path, self._root)
+
+    def update(self, paths):
+        '''
+        Updates the entries of paths and of every file they include, returns the files which were scanned again
+        '''
+        pending = [os.path.abspath(path) for path in paths]
+        seen = set()
+        scanned = []
+
+        while pending:
+            path = pending.pop()
+
+            if path in seen:
+                continue
+            seen.add(path)
+
+            try:
+                stat = os.stat(path)
+            except OSError:
+                if self._files.pop(path, None):
+                    scanned.append(path)
+                continue
+
+            entry = self._files.get(path)
+
+            if not entry or entry[:2] != (stat.st_mtime_ns, stat.st_size) or any(_mtime(folder) != mtime for folder, mtime in entry[3].items()):
+                folders = []
+
+                try:
+                    includes = scan_includes(path, folders) if path.endswith(('.yaml', '.yml')) else []
+                except yaml.YAMLError:
+                    # Probably being edited, its includes are found once it gets valid again
+                    includes = []
+
+                entry = self._files[path] = (stat.st_mtime_ns, stat.st_size, includes, {folder: _mtime(folder) for folder in folders})
+                scanned.append(path)
+
+            pending.extend(entry[2])
+
+        if scanned:
+            self._includers = None
+
+        return scanned
+
+    def refresh(self):
+        '''
+        Updates every known file
+        '''
+        return self.update(list(self._files))
+
+    def files(self):
+        return list(self._files)
+
+    def includes(self, path, transitive=True):
+        return self._walk(os.path.abspath(path), lambda file: self._files.get(file, (0, 0, [], {}))[2], transitive)
+
+    def includers(self, path, transitive=True):
+        '''
+        Files including path, with transitive=True, every file affected by a change on it
+        '''
+        if self._includers is None:
+            self._includers = {}
+            for file, (mtime, size, includes, folders) in self._files.items():
+                for include in includes:
+                    self._includers.setdefault(include, []).append(file)
+
+        return self._walk(os.path.abspath(path), lambda file: self._includers.get(file, []), transitive)
+
+    def _walk(self, path, edges, transitive):
+        if not transitive:
+            return sorted(edges(path))
+
+        pending = list(edges(path))
+        found = set()
+
+        while pending:
+            file = pending.pop()
+            if file not in found and file != path:
+                found.add(file)
+                pending.extend(edges(file))
+
+        return sorted(found)
+
+
+def _mtime(folder):
+    '''
+    Modification time of folder, which changes when files are added to it or removed, None when it's missing
+    '''
+    try:
+        return os.stat(folder).st_mtime_ns
+    except OSError:
+        return None
+
+
+def parse_command_line(argv):
+    parser = argparse.ArgumentParser(prog='mockdown deps', description='Shows the files included by mocks, or with --reverse, the mocks which include a file')
+
+    parser.add_argument('files', nargs='+', help='Files to query')
+    parser.add_argument('--reverse', '-r', action='store_true', help='List files which include the given ones instead')
+    parser.add_argument('--direct', '-d', action='store_true', help='List just direct includes, not transitive ones')
+    parser.add_argument('--index', '-i', default='.mockdown-deps.json', help='Index file, defaults to .mockdown-deps.json')
+    parser.add_argument('--scan', '-s', action='append', help='Folders searched for *.mock.yaml files to keep the index updated, defaults to the index folder')
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_command_line(argv)
+
+    index = IncludeIndex(args.index)
+
+    index.refresh()
+    index.update(list(find_mocks(args.scan or [os.path.dirname(os.path.abspath(args.index))])) + args.files)
+    index.save()
+
+    query = index.includers if args.reverse else index.includes
+
+    for file in sorted(set(result for file in args.files for result in query(file, not args.direct))):
+        print(os.path.relpath(file))
+
+    return 0
@@ -0,0 +1,342 @@
+'''
+Structural diff of two versions of a mock: components added, removed and changed, by their path on the document (see
+sinks.Sink), after includes are resolved and params are normalized by extract_params_from_yaml.
+
+Each component is hashed with its params and the hashes of its children, the fields of a container or the component
+cells of a table, like a Merkle tree, so the diff skips an identical subtree by comparing two hashes, whatever its
+size. Children are aligned by their hashes, so a component inserted in a container shows as one addition instead of
+changing every field after it.
+'''
+import argparse
+import difflib
+import hashlib
+import io
+import json
+import sys
+
+import yaml
+
+from . import loader
+from .escaping import escape
+from .extract_params_from_yaml import extract_params_from_yaml
+from .mockdown import MockGenerator
+from .sinks import Sink, label_of
+
+
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=str)
+
+
+class Node(object):
+    '''
+    A component: its kind, args and kwargs without its children, and its children as (path segment, Node)
+    '''
+
+    __slots__ = ('kind', 'args', 'kwargs', 'params', 'children', 'digest')
+
+    def __init__(self, kind, args, kwargs):
+        self.kind = kind
+        self.args = args
+        self.kwargs = kwargs
+        # Normalized params, kwargs in any order are the same
+        self.params = _encoder.encode([kind, args, sorted(kwargs.items(), key=lambda item: str(item[0]))])
+        self.children = []
+        self.digest = None
+
+    def label(self):
+        return label_of(self.kwargs)
+
+
+def _component(field):
+    '''
+    Node of field, without children, and the (path segment, field) of its children
+    '''
+    if type(field) is not dict or not field:
+        return Node(None, [field], {}), []
+
+    kind = next(iter(field))
+    entry = field[kind]
+
+    if entry is None or type(entry) in (list, dict):
+        args, kwargs = extract_params_from_yaml(entry)
+    else:
+        args, kwargs = [entry], {}
+
+    children = []
+
+    if kind == 'container':
+        children = [(str(i), arg) for i, arg in enumerate(args) if type(arg) is dict]
+        args = [arg for arg in args if type(arg) is not dict]
+
+    columns = kwargs.get('columns')
+
+    if type(columns) is dict:
+        # Component cells are children, their place on the column is kept as {}
+        shape = {}
+
+        for name, cells in columns.items():
+            if type(cells) is list and any(type(cell) is dict for cell in cells):
+                children += [(f'{name}[{row}]', cell) for row, cell in enumerate(cells) if type(cell) is dict]
+                cells = [{} if type(cell) is dict else cell for cell in cells]
+
+            shape[name] = cells
+
+        kwargs = dict(kwargs, columns=shape)
+
+    return Node(kind, args, kwargs), children
+
+
+def tree(fields):
+    '''
+    Root Node of the fields of a document, with the digest of every node
+    '''
+    root = Node(None, [], {})
+    # Nodes by id of their field, so a YAML alias is a single node, hashed once
+    nodes = {}
+    pending = [(root, [(str(i), field) for i, field in enumerate(fields or [])])]
+
+    while pending:
+        node, children = pending.pop()
+
+        for segment, field in children:
+            child = nodes.get(id(field))
+
+            if child is None:
+                child, grandchildren = _component(field)
+                nodes[id(field)] = child
+                pending.append((child, grandchildren))
+
+            node.children.append((segment, child))
+
+    # Children are hashed before their parents, without recursion
+    stack = [(root, False)]
+
+    while stack:
+        node, expanded = stack.pop()
+
+        if node.digest is not None:
+            continue
+
+        if not expanded:
+            stack.append((node, True))
+            stack.extend((child, False) for segment, child in node.children if child.digest is None)
+            continue
+
+        digest = hashlib.blake2b(node.params.encode(), digest_size=16)
+
+        for segment, child in node.children:
+            if child.digest is None:
+                raise ValueError('The mock includes itself through an alias')
+
+            digest.update(segment.encode())
+            digest.update(child.digest)
+
+        node.digest = digest.digest()
+
+    return root
+
+
+class Change(object):
+    '''
+    A component added ("+"), removed ("-") or changed ("~"), at path on the new document, or the old one when it was
+    removed
+    '''
+
+    __slots__ = ('change', 'path', 'old', 'new')
+
+    def __init__(self, change, path, old, new):
+        self.change = change
+        self.path = path
+        self.old = old
+        self.new = new
+
+    def params(self):
+        '''
+        (param, old value, new value) of the params which changed, args as "_args"
+        '''
+        changed = []
+
+        if self.old.args != self.new.args:
+            changed.append(('_args', self.old.args, self.new.args))
+
+        for key in list(self.old.kwargs) + [key for key in self.new.kwargs if key not in self.old.kwargs]:
+            old, new = self.old.kwargs.get(key), self.new.kwargs.get(key)
+
+            if old != new:
+                changed.append((key, old, new))
+
+        return changed
+
+    def __str__(self):
+        node = self.new or self.old
+        label = node.label()
+        text = f'{self.change} {self.path} {node.kind}' + (f' "{label}"' if label else '')
+
+        if self.change == '~':
+            text += ': ' + ', '.join(f'{key} {_short(old)} -> {_short(new)}' for key, old, new in self.params())
+
+        return text
+
+
+def _short(value, size=60):
+    text = json.dumps(value, ensure_ascii=False, default=str)
+
+    return text if len(text) <= size else text[:size - 3] + '...'
+
+
+def diff(old, new):
+    '''
+    Changes from the old to the new fields of a document, as a list of Change in document order
+    '''
+    changes = []
+    # ('diff', old node, new node, path) or ('report', Change), popped in document order
+    stack = [('diff', tree(old), tree(new), '')]
+
+    while stack:
+        task = stack.pop()
+
+        if task[0] == 'report':
+            changes.append(task[1])
+            continue
+
+        _, a, b, path = task
+
+        if a.digest == b.digest:
+            continue
+
+        if a.params != b.params:
+            changes.append(Change('~', path, a, b))
+
+        tasks = []
+
+        for operation, a_children, b_children in _align(a.children, b.children):
+            if operation == 'pair':
+                for (a_segment, a_child), (b_segment, b_child) in zip(a_children, b_children):
+                    tasks.append(('diff', a_child, b_child, f'{path}/{b_segment}'))
+            else:
+                tasks.extend(('report', Change('-', f'{path}/{segment}', child, None)) for segment, child in a_children)
+                tasks.extend(('report', Change('+', f'{path}/{segment}', None, child)) for segment, child in b_children)
+
+        stack.extend(reversed(tasks))
+
+    return changes
+
+
+def _align(a, b):
+    '''
+    Pairs the children a and b of a component as ('pair', a children, b children), children of the same kind in the
+    same place, which are diffed, and ('replace', removed, added)
+    '''
+    # Equal children at both ends are skipped by their hashes, which is the common case of a small change
+    start = 0
+    while start < len(a) and start < len(b) and a[start][1].digest == b[start][1].digest:
+        start += 1
+
+    end = 0
+    while end < len(a) - start and end < len(b) - start and a[-1 - end][1].digest == b[-1 - end][1].digest:
+        end += 1
+
+    a_middle, b_middle = a[start:len(a) - end], b[start:len(b) - end]
+    blocks = []
+
+    matcher = difflib.SequenceMatcher(None, [child.digest for segment, child in a_middle], [child.digest for segment, child in b_middle], autojunk=False)
+
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            # Same subtrees, maybe under other paths, nothing to report
+            continue
+
+        removed, added = a_middle[i1:i2], b_middle[j1:j2]
+        paired = 0
+
+        # Children which took the place of one of the same kind are changes of it
+        while paired < len(removed) and paired < len(added) and removed[paired][1].kind == added[paired][1].kind:
+            paired += 1
+
+        blocks.append(('pair', removed[:paired], added[:paired]))
+        blocks.append(('replace', removed[paired:], added[paired:]))
+
+    return blocks
+
+
+class DiffGenerator(MockGenerator):
+    '''
+    Renders the new version of a mock with its added and changed components highlighted, and a list of the removed
+    ones at the top
+    '''
+
+    style = '''<style>
+  .mockdown-added { outline: 2px solid #198754; background: #d1e7dd; }
+  .mockdown-changed { outline: 2px solid #fd7e14; background: #fff3cd; }
+  </style>
+'''
+
+    def __init__(self, input, output, changes, **kwargs):
+        # A sink which uses paths, so they're tracked
+        super().__init__(input, output, sinks=[Sink()], **kwargs)
+
+        self._changes = {change.path: 'added' if change.change == '+' else 'changed' for change in changes if change.change != '-'}
+        self._removed = [change for change in changes if change.change == '-']
+
+    def generate(self):
+        self._w(MockGenerator.header)
+        self._w(DiffGenerator.style)
+
+        if self._removed:
+            self._wn('<div class="alert alert-danger">Removed:<ul>')
+
+            for change in self._removed:
+                self._wn(f'<li>{escape(str(change)[2:])}</li>')
+
+            self._wn('</ul></div>')
+
+        self._generate_fields(self._in, True)
+
+        self._w(MockGenerator.footer)
+
+    def _call_generator(self, kind, generator, entry, kwargs_defaults):
+        change = self._changes.get('/' + '/'.join(self._path))
+
+        if change:
+            self._w(f'<div class="mockdown-{change}" title="{change}">')
+            # Closed after the work the component pushes, like the fields of a container
+            self._stack.append((self._w, ('</div>', )))
+
+        super()._call_generator(kind, generator, entry, kwargs_defaults)
+
+
+def load(path):
+    with open(path, 'r') as f:
+        return yaml.load(f, Loader=loader.Loader)
+
+
+def parse_command_line(argv):
+    parser = argparse.ArgumentParser(prog='mockdown diff', description='Lists the components added, removed and changed between two versions of a mock. Exits with 1 when they differ, like diff.')
+
+    parser.add_argument('old', help='Old version of the mock')
+    parser.add_argument('new', help='New version of the mock')
+    parser.add_argument('--html', default=None, help='Also writes this page, the new version with its changes highlighted')
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_command_line(argv)
+
+    try:
+        old, new = load(args.old), load(args.new)
+        changes = diff(old, new)
+    except (OSError, yaml.YAMLError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    for change in changes:
+        print(change)
+
+    if args.html:
+        with io.StringIO() as out:
+            DiffGenerator(new, out, changes).generate()
+
+            with open(args.html, 'w') as f:
+                f.write(out.getvalue())
+
+    return 1 if changes else 0
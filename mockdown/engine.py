@@ -0,0 +1,137 @@
+'''
+Rendering API for programs embedding mockdown, like web services:
+
+    from mockdown.engine import Engine
+
+    engine = Engine()
+    html = engine.render(pathlib.Path('page.mock.yaml'))
+    html = engine.render('- text:\n    label: Name\n')
+    engine.render_to([{'header': {'label': 'Title'}}], response)
+
+An Engine is meant to be created once and reused for every render of the process, from any number of threads.
+'''
+import collections
+import io
+import os
+import threading
+
+from . import loader
+from . import plugins
+from .mockdown import MockGenerator
+
+
+class Engine(object):
+    '''
+    Renders mocks given as YAML text (str or bytes), as a path (os.PathLike, like pathlib.Path) or as already loaded
+    data (the list of fields).
+
+    Across calls the engine keeps its component registry, with the plugins it imported, and the documents it loaded,
+    up to cache_size of them. A cached document is loaded again when the file, or any file it includes, changed.
+    Every render uses its own MockGenerator and the cache is guarded by a lock, so an engine can be shared by threads.
+    '''
+
+    def __init__(self, components=None, loader_class=loader.Loader, cache_size=256, warm=True, limits=None):
+        '''
+        components: plugins.ComponentRegistry for kinds not built in, defaults to plugins.registry
+        loader_class: YAML loader of text and paths, a loader.Loader by default
+        warm: imports every installed component plugin now, instead of on the first render using it
+        limits: limits.Limits of every load and render, which raise limits.LimitExceeded when a mock goes over them
+        '''
+        self._components = components or plugins.registry
+        self._loader_class = loader_class.limited(limits) if limits else loader_class
+        self._limits = limits
+        self._cache_size = cache_size
+        self._documents = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+        if warm:
+            for kind in self._components.kinds():
+                self._components.get(kind)
+
+    def load(self, source):
+        '''
+        The fields of source, YAML text, a path or data, which is returned as is
+        '''
+        if isinstance(source, os.PathLike):
+            key = os.path.abspath(os.fspath(source))
+        elif isinstance(source, (str, bytes)):
+            key = source
+        else:
+            return source
+
+        with self._lock:
+            cached = self._documents.get(key)
+
+            if cached is not None:
+                self._documents.move_to_end(key)
+
+        if cached is not None:
+            stamps, document = cached
+
+            if stamps == _stamps(stamp[0] for stamp in stamps):
+                return document
+
+        if isinstance(source, os.PathLike):
+            # Stamped before reading, so a change while loading is seen on the next call
+            stamp = _stamps([key])
+
+            with open(key, 'r') as f:
+                document, included_files = self._load(f)
+
+            stamps = stamp + _stamps(included_files)
+        else:
+            document, included_files = self._load(source)
+            stamps = _stamps(included_files)
+
+        with self._lock:
+            self._documents[key] = stamps, document
+            self._documents.move_to_end(key)
+
+            while len(self._documents) > self._cache_size:
+                self._documents.popitem(last=False)
+
+        return document
+
+    def _load(self, stream):
+        yaml_loader = self._loader_class(stream)
+
+        try:
+            return yaml_loader.get_single_data(), yaml_loader.included_files
+        finally:
+            yaml_loader.dispose()
+
+    def render_to(self, source, out, sinks=()):
+        '''
+        Writes the HTML of source to out, a text file object. sinks get every component, see sinks.Sink.
+        A render over the limits of the engine may have written part of the page to out, render doesn't.
+        '''
+        MockGenerator(self.load(source), out, components=self._components, sinks=sinks, limits=self._limits).generate()
+
+    def render(self, source, sinks=()):
+        '''
+        The HTML of source
+        '''
+        with io.StringIO() as out:
+            self.render_to(source, out, sinks)
+
+            return out.getvalue()
+
+    def clear(self):
+        with self._lock:
+            self._documents.clear()
+
+
+def _stamps(paths):
+    '''
+    (path, modification time, size) of each path, None for the time and size of missing files
+    '''
+    stamps = []
+
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            stamps.append((path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            stamps.append((path, None, None))
+
+    return tuple(stamps)
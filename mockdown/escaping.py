@@ -0,0 +1,34 @@
+_entities = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'})
+
+# Labels, options and cells repeat a lot on the same mock and between mocks of a build, so escaped strings are
+# kept. The cache is dropped when full rather than tracking usage, that is cheaper and good enough here.
+cache_size = 65536
+_cache = {}
+
+
+def escape(value):
+    '''
+    Escapes value for HTML text and double quoted attributes. Strings with nothing to escape are returned as is,
+    without copies.
+    '''
+    if value.__class__ is not str:
+        if value.__class__ is int or value.__class__ is float or value.__class__ is bool or value is None:
+            return str(value)
+
+        value = str(value)
+
+    escaped = _cache.get(value)
+
+    if escaped is None:
+        # Faster than a regex or translating everything, for the short strings found on mocks
+        if '&' in value or '<' in value or '>' in value or '"' in value:
+            escaped = value.translate(_entities)
+        else:
+            escaped = value
+
+        if len(_cache) >= cache_size:
+            _cache.clear()
+
+        _cache[value] = escaped
+
+    return escaped
@@ -0,0 +1,307 @@
+'''
+Layered layout of flowcharts, rendered as inline SVG.
+
+Follows the usual Sugiyama steps, each kept close to linear time so generated charts with thousands of nodes
+are still fast: cycles are broken by reversing DFS back edges, nodes are layered by longest path from the
+sources, a few barycenter sweeps reduce crossings and layers are centered horizontally. Edges spanning many
+layers are drawn straight, without dummy nodes.
+'''
+
+from .escaping import escape
+
+
+node_kinds = ('start', 'action', 'decision', 'end')
+
+node_width = 160
+node_height = 48
+horizontal_gap = 40
+vertical_gap = 48
+margin = 10
+
+ordering_sweeps = 2
+
+
+class Node(object):
+
+    def __init__(self, id, kind, label, form=None):
+        self.id = id
+        self.kind = kind
+        self.label = label
+        self.form = form
+
+
+def parse_nodes(entries):
+    '''
+    Each entry is a dict with one of the node kinds as key and the label as value, optionally with "id" (defaults
+    to the label) and, for actions, "form", a link to the form which implements it.
+    '''
+    nodes = []
+    ids = set()
+
+    for entry in entries:
+        assert type(entry) is dict, f'flowchart.nodes: Each node must be a dict, its "{entry}"'
+
+        kinds = [kind for kind in node_kinds if kind in entry]
+        assert len(kinds) == 1, f'flowchart.nodes: Each node must have exactly one of {node_kinds}, its "{entry}"'
+
+        kind = kinds[0]
+        label = entry[kind]
+        node = Node(str(entry.get('id', label)), kind, '' if label is None else str(label), entry.get('form'))
+
+        assert node.id not in ids, f'flowchart.nodes: Duplicated node id "{node.id}", set "id" on one of them'
+        ids.add(node.id)
+
+        nodes.append(node)
+
+    return nodes
+
+
+def parse_edges(entries, nodes):
+    '''
+    Each entry is either [from, to], [from, to, label] or a dict with "from", "to" and optionally "label". Without
+    entries the nodes are linked in sequence.
+    '''
+    if entries is None:
+        return [(nodes[i].id, nodes[i + 1].id, None) for i in range(len(nodes) - 1)]
+
+    edges = []
+    ids = set(node.id for node in nodes)
+
+    for entry in entries:
+        if type(entry) is dict:
+            edge = (entry.get('from'), entry.get('to'), entry.get('label'))
+        else:
+            assert type(entry) is list and len(entry) in (2, 3), f'flowchart.edges: Each edge must be [from, to, label?], its "{entry}"'
+            edge = (entry[0], entry[1], entry[2] if len(entry) == 3 else None)
+
+        source, target, label = str(edge[0]), str(edge[1]), edge[2]
+        assert source in ids and target in ids, f'flowchart.edges: Unknown node on edge "{entry}"'
+
+        edges.append((source, target, None if label is None else str(label)))
+
+    return edges
+
+
+def _break_cycles(count, successors):
+    '''
+    Returns a set of (source, target) indexes of DFS back edges, reversing them makes the graph acyclic
+    '''
+    state = [0] * count  # 0: not visited, 1: on the DFS stack, 2: done
+    back_edges = set()
+
+    for root in range(count):
+        if state[root]:
+            continue
+
+        state[root] = 1
+        stack = [(root, iter(successors[root]))]
+
+        while stack:
+            node, children = stack[-1]
+
+            for child in children:
+                if state[child] == 0:
+                    state[child] = 1
+                    stack.append((child, iter(successors[child])))
+                    break
+                elif state[child] == 1:
+                    back_edges.add((node, child))
+            else:
+                state[node] = 2
+                stack.pop()
+
+    return back_edges
+
+
+def _assign_layers(count, successors, predecessors):
+    '''
+    Longest path layering, in topological order (Kahn)
+    '''
+    layers = [0] * count
+    pending = [len(predecessors[node]) for node in range(count)]
+    ready = [node for node in range(count) if not pending[node]]
+
+    while ready:
+        node = ready.pop()
+
+        for child in successors[node]:
+            if layers[node] + 1 > layers[child]:
+                layers[child] = layers[node] + 1
+
+            pending[child] -= 1
+            if not pending[child]:
+                ready.append(child)
+
+    return layers
+
+
+def _order_layers(count, layers, successors, predecessors):
+    rows = [[] for i in range(max(layers) + 1)] if count else []
+
+    for node in range(count):
+        rows[layers[node]].append(node)
+
+    position = [0] * count
+
+    def place(row):
+        for i, node in enumerate(row):
+            position[node] = i
+
+    for row in rows:
+        place(row)
+
+    def sweep(rows, neighbors):
+        for row in rows:
+            barycenters = {}
+
+            for node in row:
+                adjacent = neighbors[node]
+                barycenters[node] = sum(position[other] for other in adjacent) / len(adjacent) if adjacent else position[node]
+
+            row.sort(key=barycenters.__getitem__)
+            place(row)
+
+    for i in range(ordering_sweeps):
+        sweep(rows[1:], predecessors)
+        sweep(reversed(rows[:-1]), successors)
+
+    return rows
+
+
+def layout(node_ids, edges):
+    '''
+    Returns ({id: (x, y)} of each node's top left corner, width, height)
+    '''
+    index = {id: i for i, id in enumerate(node_ids)}
+    count = len(node_ids)
+
+    successors = [[] for i in range(count)]
+    for source, target in edges:
+        if source != target:
+            successors[index[source]].append(index[target])
+
+    back_edges = _break_cycles(count, successors)
+
+    dag_successors = [[] for i in range(count)]
+    dag_predecessors = [[] for i in range(count)]
+    for source in range(count):
+        for target in successors[source]:
+            if (source, target) in back_edges:
+                source_, target_ = target, source
+            else:
+                source_, target_ = source, target
+
+            dag_successors[source_].append(target_)
+            dag_predecessors[target_].append(source_)
+
+    layers = _assign_layers(count, dag_successors, dag_predecessors)
+    rows = _order_layers(count, layers, dag_successors, dag_predecessors)
+
+    widest = max((len(row) for row in rows), default=0)
+    # Room on the right for the edges going up, see _edge_svg
+    width = widest * (node_width + horizontal_gap) + 2 * margin if widest else 2 * margin
+    height = len(rows) * (node_height + vertical_gap) - vertical_gap + 2 * margin if rows else 2 * margin
+
+    positions = {}
+    for layer, row in enumerate(rows):
+        offset = margin + (widest - len(row)) * (node_width + horizontal_gap) / 2
+        y = margin + layer * (node_height + vertical_gap)
+
+        for i, node in enumerate(row):
+            positions[node_ids[node]] = (offset + i * (node_width + horizontal_gap), y)
+
+    return positions, width, height
+
+
+def _node_svg(node, x, y):
+    center_x = x + node_width / 2
+    center_y = y + node_height / 2
+
+    if node.kind == 'decision':
+        shape = f'<polygon points="{center_x},{y} {x + node_width},{center_y} {center_x},{y + node_height} {x},{center_y}" class="flowchart-{node.kind}"/>'
+    else:
+        radius = node_height / 2 if node.kind in ('start', 'end') else 4
+        shape = f'<rect x="{x}" y="{y}" width="{node_width}" height="{node_height}" rx="{radius}" class="flowchart-{node.kind}"/>'
+
+    svg = f'{shape}<text x="{center_x}" y="{center_y}" text-anchor="middle" dominant-baseline="middle">{escape(node.label)}</text>'
+
+    if node.form:
+        svg = f'<a href="{escape(node.form)}">{svg}</a>'
+
+    return svg
+
+
+def _edge_svg(source, target, label):
+    x1, y1 = source[0] + node_width / 2, source[1] + node_height
+    x2, y2 = target[0] + node_width / 2, target[1]
+
+    if y2 <= y1:
+        # Edges going up (reversed to break cycles) or sideways leave and arrive by the node sides
+        x1, y1 = source[0] + node_width, source[1] + node_height / 2
+        x2, y2 = target[0] + node_width, target[1] + node_height / 2
+        bend = x1 + horizontal_gap / 2 if x1 == x2 else (x1 + x2) / 2
+        path = f'M{x1},{y1} C{bend + horizontal_gap / 2},{y1} {bend + horizontal_gap / 2},{y2} {x2},{y2}'
+    else:
+        path = f'M{x1},{y1} L{x2},{y2}'
+
+    svg = f'<path d="{path}" marker-end="url(#flowchart-arrow)"/>'
+
+    if label:
+        svg += f'<text x="{(x1 + x2) / 2 + 4}" y="{(y1 + y2) / 2}" class="flowchart-edge-label">{escape(label)}</text>'
+
+    return svg
+
+
+# Styles and the arrow marker of every chart, written once on the page before its first chart. Not hidden with
+# display: none, which keeps markers from rendering.
+definitions = (
+    '<svg width="0" height="0" style="position: absolute;" xmlns="http://www.w3.org/2000/svg">'
+    '<style>.flowchart rect, .flowchart polygon { fill: white; stroke: black; } .flowchart path { fill: none; stroke: black; } '
+    '.flowchart-start, .flowchart-end { fill: #EEE !important; } .flowchart-edge-label { font-size: small; }</style>'
+    '<defs><marker id="flowchart-arrow" viewBox="0 0 10 10" refX="10" refY="5" markerWidth="8" markerHeight="8" orient="auto">'
+    '<path d="M0,0 L10,5 L0,10 z" style="fill: black;"/></marker></defs></svg>'
+)
+
+
+def render_svg(nodes, edges):
+    '''
+    SVG of a chart, which needs definitions on the page
+    '''
+    positions, width, height = layout([node.id for node in nodes], [(source, target) for source, target, label in edges])
+
+    parts = [
+        f'<svg class="flowchart" width="{width}" height="{height}" viewBox="0 0 {width} {height}" xmlns="http://www.w3.org/2000/svg">',
+    ]
+
+    for source, target, label in edges:
+        if source != target:
+            parts.append(_edge_svg(positions[source], positions[target], label))
+
+    for node in nodes:
+        x, y = positions[node.id]
+        parts.append(_node_svg(node, x, y))
+
+    parts.append('</svg>')
+
+    return ''.join(parts)
+
+
+def generate(generator, *args, **kwargs):
+    '''
+    The flowchart component, see plugins.ComponentRegistry
+    '''
+    checker = generator._checker.reset('flowchart', args, kwargs)
+    nodes = checker.param('nodes').isNotNone().istype(list).get()
+    edges = checker.param('edges').default(None).istype(list).get()
+    br = checker.param('br').default(True).istype(bool).get()
+
+    nodes = parse_nodes(nodes)
+    svg = render_svg(nodes, parse_edges(edges, nodes))
+
+    generator._define('flowchart', definitions)
+    generator._w(svg)
+
+    if br:
+        generator._wbr()
+
+    generator._wn()
@@ -0,0 +1,207 @@
+'''
+Disk store of the HTML of top level fields, shared by the pages of a build and by later builds. Pages often have the
+same header, toolbar or footer, usually included from the same files, which are rendered once and then copied.
+
+A fragment is stored under the hash of its field, as normalized JSON, of whether it's the last field of the page,
+which changes its line break, and of the mockdown version. Fragments which depend on the rest of their page, like
+the ones using option catalogs, or on component plugins, which may change without mockdown changing, aren't stored.
+Neither are the smallest ones, which render faster than they're read. The least recently used fragments are
+removed once the store is over its size.
+'''
+import hashlib
+import io
+import json
+import os
+
+from .mockdown import MockGenerator, __version__
+
+
+class FragmentStats(object):
+    '''
+    Counters of a FragmentStore: hits, misses (fragments rendered and stored), bytes written to the store, bytes
+    copied from it and fragments evicted. Fragments which aren't stored are in neither hits nor misses.
+    '''
+
+    fields = ('hits', 'misses', 'stored', 'saved', 'evicted')
+
+    def __init__(self, hits=0, misses=0, stored=0, saved=0, evicted=0):
+        self.hits = hits
+        self.misses = misses
+        self.stored = stored
+        self.saved = saved
+        self.evicted = evicted
+
+    @property
+    def hit_ratio(self):
+        lookups = self.hits + self.misses
+
+        return self.hits / lookups if lookups else 0.0
+
+    def add(self, other):
+        for field in FragmentStats.fields:
+            setattr(self, field, getattr(self, field) + getattr(other, field))
+
+    def __repr__(self):
+        return 'FragmentStats(' + ', '.join(f'{field}={getattr(self, field)}' for field in FragmentStats.fields) + ')'
+
+    def __str__(self):
+        return f'{self.hits} of {self.hits + self.misses} fragments reused ({self.hit_ratio:.0%}), {self.saved} bytes saved, {self.evicted} evicted'
+
+
+class _RecordingRegistry(object):
+    '''
+    Component registry telling whether a plugin was used
+    '''
+
+    def __init__(self, registry):
+        self._registry = registry
+        self.used = False
+
+    def get(self, kind):
+        component = self._registry.get(kind)
+        self.used = self.used or component is not None
+
+        return component
+
+    def kinds(self):
+        return self._registry.kinds()
+
+
+class FragmentStore(object):
+    '''
+    Fragments under the folder path, up to max_bytes of them after evict(). A store can be used by many processes at
+    once, like the workers of a build, as fragments are written to temporary files and then renamed.
+    '''
+
+    # Fragments smaller than this are rendered with their page every time
+    min_bytes = 512
+
+    def __init__(self, path, max_bytes=256 * 2 ** 20):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.stats = FragmentStats()
+        # Keys of the fields found not to be stored, which are rendered with their page
+        self._unstorable = set()
+
+    def __getstate__(self):
+        # Workers start with their own counters and forget what the parent found
+        return {'path': self.path, 'max_bytes': self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'], state['max_bytes'])
+
+    @staticmethod
+    def key(field, is_last):
+        data = json.dumps([__version__, is_last, field], separators=(',', ':'), ensure_ascii=False, default=str)
+
+        return hashlib.sha256(data.encode()).hexdigest()
+
+    def _file(self, key):
+        return os.path.join(self.path, key[:2], key[2:] + '.html')
+
+    def get(self, key):
+        '''
+        The HTML stored under key, or None
+        '''
+        path = self._file(key)
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                html = f.read()
+
+            # The modification time orders fragments by their last use, for evict
+            os.utime(path)
+        except OSError:
+            return None
+
+        return html
+
+    def put(self, key, html):
+        path = self._file(key)
+        temporary = f'{path}.{os.getpid()}.tmp'
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with open(temporary, 'w', encoding='utf-8') as f:
+            f.write(html)
+
+        os.replace(temporary, path)
+        self.stats.stored += len(html.encode())
+
+    def fragment(self, field, is_last, components):
+        '''
+        HTML of the top level field, from the store or rendered into it, or None when it can't be stored
+        '''
+        key = FragmentStore.key(field, is_last)
+
+        if key in self._unstorable:
+            return None
+
+        html = self.get(key)
+
+        if html is not None:
+            self.stats.hits += 1
+            self.stats.saved += len(html.encode())
+
+            return html
+
+        recording = _RecordingRegistry(components)
+
+        with io.StringIO() as out:
+            generator = MockGenerator(None, out, components=recording)
+            generator.generate_root_field(field, is_last)
+            html = out.getvalue()
+
+        if generator._catalogs or generator._defined or recording.used:
+            self._unstorable.add(key)
+            return None
+
+        if len(html) < self.min_bytes:
+            self._unstorable.add(key)
+        else:
+            self.stats.misses += 1
+            self.put(key, html)
+
+        return html
+
+    def take_stats(self):
+        '''
+        The counters since the last call
+        '''
+        stats, self.stats = self.stats, FragmentStats()
+
+        return stats
+
+    def evict(self):
+        '''
+        Removes the least recently used fragments until the store fits in max_bytes, returns how many
+        '''
+        files = []
+        total = 0
+
+        for folder in os.scandir(self.path) if os.path.isdir(self.path) else ():
+            if not folder.is_dir():
+                continue
+
+            for entry in os.scandir(folder.path):
+                stat = entry.stat()
+                files.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                total += stat.st_size
+
+        evicted = 0
+
+        for mtime, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+
+            total -= size
+            evicted += 1
+
+        self.stats.evicted += evicted
+
+        return evicted
@@ -0,0 +1,123 @@
+'''
+Resource limits for mocks which aren't trusted, like ones submitted to a shared render service. A YAML alias can
+repeat a subtree any number of times without growing the file, so a few lines can expand into billions of
+components, and includes can pull in deep chains or huge files. A render over any of its limits stops with
+LimitExceeded instead of taking the memory or the time of everything else running on the worker.
+
+    from mockdown.limits import Limits
+
+    engine = Engine(limits=Limits.untrusted())
+'''
+import time
+
+
+class LimitExceeded(Exception):
+    '''
+    A mock went over one of its Limits, limit is its name, like "nodes", and maximum its value
+    '''
+
+    def __init__(self, limit, maximum):
+        super().__init__(limit, maximum)
+        self.limit = limit
+        self.maximum = maximum
+
+    def __str__(self):
+        return f'{self.limit} over the limit of {self.maximum} ({_flags[self.limit]})'
+
+
+class Limits(object):
+    '''
+    Maximums of a render, None for no limit:
+
+    nodes: YAML nodes loaded, and components rendered, which count each repetition of an alias
+    include_depth: includes of includes, a file included by the mock is at depth 1
+    include_bytes: bytes of every file included, in total
+    table_cells: cells of every table, in total
+    output_bytes: HTML written, counted in characters
+    seconds: wall clock time generating the HTML, from the creation of its MockGenerator
+    '''
+
+    def __init__(self, nodes=None, include_depth=None, include_bytes=None, table_cells=None, output_bytes=None, seconds=None):
+        self.nodes = nodes
+        self.include_depth = include_depth
+        self.include_bytes = include_bytes
+        self.table_cells = table_cells
+        self.output_bytes = output_bytes
+        self.seconds = seconds
+
+    @classmethod
+    def untrusted(cls):
+        '''
+        Limits far above what hand written mocks need, for mocks of unknown origin
+        '''
+        return cls(nodes=100000, include_depth=16, include_bytes=16 * 2 ** 20, table_cells=100000, output_bytes=64 * 2 ** 20, seconds=10)
+
+    def __repr__(self):
+        return 'Limits(' + ', '.join(f'{name}={value!r}' for name, value in vars(self).items() if value is not None) + ')'
+
+    def deadline(self):
+        '''
+        time.monotonic() after which a render starting now is over its seconds, or None
+        '''
+        return None if self.seconds is None else time.monotonic() + self.seconds
+
+
+class LimitedOutput(object):
+    '''
+    Text file object writing to output until maximum characters were written
+    '''
+
+    def __init__(self, output, maximum):
+        self._output = output
+        self._left = maximum
+        self._maximum = maximum
+
+    def write(self, value):
+        self._left -= len(value)
+
+        if self._left < 0:
+            raise LimitExceeded('output_bytes', self._maximum)
+
+        return self._output.write(value)
+
+
+# Command line flag of each limit
+_flags = {
+    'nodes': '--max-nodes',
+    'include_depth': '--max-include-depth',
+    'include_bytes': '--max-include-bytes',
+    'table_cells': '--max-table-cells',
+    'output_bytes': '--max-output-bytes',
+    'seconds': '--timeout',
+}
+
+
+def make_limit_arguments(parser):
+    group = parser.add_argument_group('limits', 'Limits for mocks which are not trusted, a render going over one of them fails')
+
+    group.add_argument('--untrusted', action='store_true', help='Applies the default limits of mockdown.limits.Limits.untrusted(), each one can be changed by its own option')
+    group.add_argument('--max-nodes', type=int, default=None, help='YAML nodes loaded, and components rendered, counting every repetition of aliases')
+    group.add_argument('--max-include-depth', type=int, default=None, help='Includes of includes')
+    group.add_argument('--max-include-bytes', type=int, default=None, help='Bytes of every included file, in total')
+    group.add_argument('--max-table-cells', type=int, default=None, help='Cells of every table, in total')
+    group.add_argument('--max-output-bytes', type=int, default=None, help='HTML written')
+    group.add_argument('--timeout', type=float, default=None, help='Seconds generating the HTML')
+
+    return group
+
+
+def from_arguments(args):
+    '''
+    Limits of the options added by make_limit_arguments, or None when none was given
+    '''
+    limits = Limits.untrusted() if args.untrusted else Limits()
+    given = False
+
+    for name, flag in _flags.items():
+        value = getattr(args, flag.lstrip('-').replace('-', '_'))
+
+        if value is not None:
+            setattr(limits, name, value)
+            given = True
+
+    return limits if given or args.untrusted else None
@@ -1,14 +1,42 @@
+import glob
+import io
 import os
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 import yaml
 from typing import Any, IO
 
+from .limits import LimitExceeded
+
 # Credits: https://gist.github.com/joshbode/569627ced3076931b02f
 
 
 class Loader(yaml.SafeLoader):
-    """YAML Loader with `!include` constructor."""
+    """YAML Loader with `!include` constructor.
+
+    Nodes are composed with an explicit stack instead of recursion, and YAML includes are composed into the
+    including document one file at a time, so neither nesting nor include depth is limited by the interpreter's
+    stack.
+    """
+
+    # Whether included files are read ahead on a thread pool, which pays off when opening files is slow, like on
+    # network file systems
+    prefetch = True
+
+    # Whether YAML includes are replaced by the nodes of the included file when composing. When False, they are
+    # left as `!include` scalar nodes, like tools reading the include graph need.
+    inline_includes = True
+
+    # limits.Limits of the nodes, include depth and included bytes of each document, see limited
+    limits = None
+
+    @classmethod
+    def limited(cls, limits):
+        """A subclass loading with limits, which its loaders of included files share."""
+
+        return type(cls.__name__, (cls, ), {'limits': limits})
 
     def __init__(self, stream: IO) -> None:
         """Initialise Loader."""
@@ -18,22 +46,386 @@ class Loader(yaml.SafeLoader):
         except AttributeError:
             self._root = os.path.curdir
 
+        # (parent node, index on its value, include node) of the includes found while composing
+        self._includes = []
+        # Absolute paths of every file included by the documents loaded so far, and the folders of glob includes
+        self.included_files = []
+        # Futures of _read of included files, by absolute path, and their bytes
+        self._prefetched = {}
+        self._prefetched_bytes = 0
+        # include_target of the includes of included files, by id of their node, whose values are relative to the
+        # included file instead of this document
+        self._targets = {}
+        # Nodes composed and bytes included for the current document, counted against limits
+        self._nodes = 0
+        self._included_bytes = 0
+
         super().__init__(stream)
 
+    def compose_document(self) -> yaml.Node:
+        # Files read for the previous document, which is constructed by now
+        self._prefetched = {}
+        self._prefetched_bytes = 0
+        self._targets = {}
+        self._nodes = 0
+        self._included_bytes = 0
+
+        node = super().compose_document()
+
+        if self.inline_includes:
+            node = self._compose_includes(node)
+
+        return node
+
+    def compose_node(self, parent: yaml.Node, index: Any) -> yaml.Node:
+        """Same as yaml.composer.Composer.compose_node, without recursion."""
+
+        if self.yaml_path_resolvers:
+            return super().compose_node(parent, index)
+
+        # [collection node, key node of the mapping entry being composed]
+        open_nodes = []
+        max_nodes = self.limits.nodes if self.limits else None
+
+        while True:
+            if max_nodes is not None:
+                self._count_nodes(1)
+
+            if self.check_event(yaml.AliasEvent):
+                event = self.get_event()
+
+                if event.anchor not in self.anchors:
+                    raise yaml.composer.ComposerError(None, None, f'found undefined alias {event.anchor!r}', event.start_mark)
+
+                node = self.anchors[event.anchor]
+            else:
+                event = self.peek_event()
+
+                if event.anchor is not None and event.anchor in self.anchors:
+                    raise yaml.composer.ComposerError(f'found duplicate anchor {event.anchor!r}; first occurrence', self.anchors[event.anchor].start_mark, 'second occurrence', event.start_mark)
+
+                if self.check_event(yaml.ScalarEvent):
+                    node = self.compose_scalar_node(event.anchor)
+                else:
+                    self.get_event()
+
+                    kind = yaml.SequenceNode if isinstance(event, yaml.SequenceStartEvent) else yaml.MappingNode
+                    tag = event.tag
+                    if tag is None or tag == '!':
+                        tag = self.resolve(kind, None, event.implicit)
+
+                    node = kind(tag, [], event.start_mark, None, flow_style=event.flow_style)
+                    if event.anchor is not None:
+                        self.anchors[event.anchor] = node
+
+                    open_nodes.append([node, None])
+                    node = None
+
+            # Adds the composed node to its collection, and closes the collections which end after it
+            while open_nodes:
+                entry = open_nodes[-1]
+                collection, key = entry
+
+                if node is not None:
+                    if isinstance(collection, yaml.SequenceNode):
+                        self._add_include(collection, len(collection.value), node)
+                        collection.value.append(node)
+                    elif key is None:
+                        entry[1] = node
+                    else:
+                        self._add_include(collection, len(collection.value), node)
+                        collection.value.append((key, node))
+                        entry[1] = None
+
+                end = yaml.SequenceEndEvent if isinstance(collection, yaml.SequenceNode) else yaml.MappingEndEvent
+                if not self.check_event(end):
+                    break
+
+                collection.end_mark = self.get_event().end_mark
+                open_nodes.pop()
+                node = collection
+            else:
+                self._add_include(None, None, node)
+                return node
+
+    def _count_nodes(self, count):
+        self._nodes += count
+
+        if self._nodes > self.limits.nodes:
+            raise LimitExceeded('nodes', self.limits.nodes)
+
+    def _count_bytes(self, count):
+        self._included_bytes += count
+
+        if self.limits.include_bytes is not None and self._included_bytes > self.limits.include_bytes:
+            raise LimitExceeded('include_bytes', self.limits.include_bytes)
+
+    def _add_include(self, parent, index, node):
+        if node.tag == '!include' and isinstance(node, yaml.ScalarNode):
+            self._includes.append((parent, index, node))
+
+    def _compose_includes(self, root):
+        """Replaces each YAML include of the document by the nodes of its file, then the includes of those, and so on.
+        Glob includes are replaced by a list of includes of the files they match, so YAML files are composed the same
+        whatever the pattern, with their depth, size and recursion checked.
+
+        Every file is read on a thread pool as soon as its include is found, so files are read concurrently with
+        each other and with composing, and JSON and text includes are already read when the document is constructed.
+        """
+
+        includes = []
+
+        for parent, index, node in self._includes:
+            filename, folder = include_target(self._root, node.value)
+
+            if _is_yaml(node.value) or folder is not None:
+                includes.append((parent, index, node, filename, folder, ()))
+
+            self._prefetch(filename, folder is not None)
+
+        self._includes = []
+        # Aliased include nodes are composed once
+        composed = {}
+
+        while includes:
+            parent, index, node, filename, folder, including = includes.pop()
+
+            included = composed.get(id(node), (None, None))[1]
+
+            if included is None and folder is not None:
+                # A list of the included files, each one included by a node of its own
+                filenames = sorted(glob.glob(filename))
+                self.included_files.append(folder)
+
+                included = yaml.SequenceNode('tag:yaml.org,2002:seq', [], node.start_mark, node.end_mark)
+
+                for i, path in enumerate(filenames):
+                    include = yaml.ScalarNode('!include', path, node.start_mark, node.end_mark)
+                    included.value.append(include)
+                    self._targets[id(include)] = path, None
+                    self._prefetch(path)
+
+                    if _is_yaml(path):
+                        includes.append((included, i, include, path, None, including))
+            elif included is None:
+                if filename in including:
+                    raise yaml.composer.ComposerError(None, None, f'found recursive include of {filename!r}', node.start_mark)
+
+                if self.limits and self.limits.include_depth is not None and len(including) >= self.limits.include_depth:
+                    raise LimitExceeded('include_depth', self.limits.include_depth)
+
+                self.included_files.append(filename)
+
+                stamp, text = self._read(filename)
+
+                if self.limits:
+                    self._count_bytes(stamp[1])
+                stream = io.StringIO(text)
+                stream.name = filename
+
+                included_loader = type(self)(stream)
+                included_loader.inline_includes = False
+
+                try:
+                    included = included_loader.get_single_node()
+                finally:
+                    included_loader.dispose()
+
+                if self.limits and self.limits.nodes is not None:
+                    self._count_nodes(included_loader._nodes)
+
+                if included is None:
+                    included = yaml.ScalarNode('tag:yaml.org,2002:null', '', node.start_mark, node.end_mark)
+
+                included_folder = os.path.dirname(filename)
+
+                for included_parent, included_index, include in included_loader._includes:
+                    # Other includes are constructed with the document, which finds them relative to the included file
+                    target = self._targets[id(include)] = include_target(included_folder, include.value)
+                    self._prefetch(target[0], target[1] is not None)
+
+                    if not _is_yaml(include.value) and target[1] is None:
+                        continue
+
+                    # An include which is the whole included file takes the place of the include being replaced
+                    if included_parent is None:
+                        included_parent, included_index = parent, index
+
+                    includes.append((included_parent, included_index, include, *target, including + (filename, )))
+
+            # Keeping node alive, so its id isn't reused
+            composed[id(node)] = node, included
+
+            if parent is None:
+                root = included
+            elif isinstance(parent, yaml.SequenceNode):
+                parent.value[index] = included
+            else:
+                parent.value[index] = (parent.value[index][0], included)
+
+        return root
+
+    def _prefetch(self, filename, pattern=False):
+        if not self.prefetch or filename in self._prefetched:
+            return
+
+        if pattern:
+            for path in glob.glob(filename):
+                self._prefetch(path)
+            return
+
+        max_bytes = self._max_bytes()
+
+        if max_bytes is not None:
+            # Only files fitting in the include_bytes budget are read ahead, others are read when they're included,
+            # which fails on the first one over it, so a glob over a large folder doesn't read all of it
+            try:
+                size = os.stat(filename).st_size
+            except OSError:
+                return
+
+            if self._prefetched_bytes + size > max_bytes:
+                return
+
+            self._prefetched_bytes += size
+
+        self._prefetched[filename] = _reader().submit(_read, filename, max_bytes)
+
+    def _read(self, filename):
+        """(modification time and size, contents) of filename, read by the prefetch when it was."""
+
+        fetched = self._prefetched.get(filename)
+
+        return fetched.result() if fetched else _read(filename, self._max_bytes())
+
+    def _max_bytes(self):
+        return self.limits.include_bytes if self.limits else None
+
+
+# JSON and text includes, like option lists shared by many selects and mocks, are read once per process while their
+# files don't change. Values are shared, so they must not be modified.
+include_cache_size = 256
+_include_cache = {}
+
 
 def construct_include(loader: Loader, node: yaml.Node) -> Any:
-    """Include file referenced at node."""
+    """Include file referenced at node, or the list of files matching it when it's a glob pattern."""
+
+    filename, folder = loader._targets.get(id(node)) or include_target(loader._root, loader.construct_scalar(node))
+
+    if folder is not None:
+        loader.included_files.append(folder)
 
-    filename = os.path.abspath(os.path.join(loader._root, loader.construct_scalar(node)))
+        return [_include_file(loader, path) for path in sorted(glob.glob(filename))]
+
+    return _include_file(loader, filename)
+
+
+def _include_file(loader: Loader, filename: str) -> Any:
     extension = os.path.splitext(filename)[1].lstrip('.')
 
-    with open(filename, 'r') as f:
-        if extension in ('yaml', 'yml'):
-            return yaml.load(f, Loader)
-        elif extension in ('json', ):
-            return json.load(f)
-        else:
-            return ''.join(f.readlines())
+    loader.included_files.append(filename)
+
+    if extension in ('yaml', 'yml'):
+        # Only reached when includes aren't composed into the document
+        stamp, text = loader._read(filename)
+
+        if loader.limits:
+            loader._count_bytes(stamp[1])
+
+        stream = io.StringIO(text)
+        stream.name = filename
+
+        return yaml.load(stream, type(loader))
+
+    fetched = loader._prefetched.get(filename)
+
+    if fetched:
+        stamp, text = fetched.result()
+    else:
+        stat = os.stat(filename)
+        stamp, text = (stat.st_mtime_ns, stat.st_size), None
+
+    if loader.limits:
+        loader._count_bytes(stamp[1])
+
+    cached = _include_cache.get(filename)
+
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    if text is None:
+        stamp, text = _read(filename, loader._max_bytes())
+
+    value = json.loads(text) if extension in ('json', ) else text
+
+    if len(_include_cache) >= include_cache_size:
+        _include_cache.clear()
+
+    _include_cache[filename] = stamp, value
+
+    return value
 
 
 yaml.add_constructor('!include', construct_include, Loader)
+
+
+def _is_yaml(filename: str) -> bool:
+    return os.path.splitext(filename)[1] in ('.yaml', '.yml')
+
+
+def is_glob(filename: str) -> bool:
+    return '*' in filename or '?' in filename or '[' in filename
+
+
+def include_target(root: str, value: str) -> tuple:
+    """(absolute path of the file included as value from the folder root, None), or (absolute glob pattern, folder
+    it lists) when value is a pattern. Only value is a pattern, special characters of root match themselves."""
+
+    filename = os.path.abspath(os.path.join(root, value))
+
+    if not is_glob(value):
+        return filename, None
+
+    return os.path.normpath(os.path.join(glob.escape(os.path.abspath(root)), value)), os.path.dirname(filename)
+
+
+def _read(filename: str, max_bytes: int = None) -> tuple:
+    """((modification time, size), contents) of filename, which is not read when it's larger than max_bytes."""
+
+    with open(filename, 'r') as f:
+        stat = os.fstat(f.fileno())
+
+        if max_bytes is not None and stat.st_size > max_bytes:
+            raise LimitExceeded('include_bytes', max_bytes)
+
+        return (stat.st_mtime_ns, stat.st_size), f.read()
+
+
+prefetch_workers = 16
+_reader_pool = None
+_reader_lock = threading.Lock()
+
+
+def _reader() -> ThreadPoolExecutor:
+    """Thread pool reading included files, shared by every loader of the process."""
+
+    global _reader_pool
+
+    with _reader_lock:
+        if _reader_pool is None:
+            _reader_pool = ThreadPoolExecutor(max_workers=prefetch_workers, thread_name_prefix='mockdown-include')
+
+        return _reader_pool
+
+
+def _forget_reader() -> None:
+    # Threads don't survive a fork, so the child starts its own pool
+    global _reader_pool, _reader_lock
+
+    _reader_pool = None
+    _reader_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_forget_reader)
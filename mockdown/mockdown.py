@@ -1,23 +1,64 @@
 #!/usr/bin/env python3
 import argparse
-import logger_factory
+import functools
+import importlib
+import io
+from . import logger_factory
 import sys
+import time
 import yaml
 from . extract_params_from_yaml import extract_params_from_yaml
+from . import limits as limits_
 from . import loader
+from . import plugins
+from . escaping import escape
+from . sinks import OutlineSink, TextSink
+
+__version__ = '0.0.1'
+
+# Subcommands are imported only when used, so plain renders don't pay for them. Values are "module[:function]",
+# function defaults to main
+subcommands = {
+    'build': 'build',
+    'check': 'check',
+    'deps': 'deps',
+    'diff': 'diff',
+    'merge': 'build:merge_main',
+    'serve': 'preview',
+    'server': 'server',
+    'stream': 'stream',
+    'template': 'template',
+}
+
 
 def parse_command_line():
-    parser = argparse.ArgumentParser()
+    parser = argparse.ArgumentParser(epilog=f'Subcommands: {", ".join(subcommands)} (see "mockdown <subcommand> --help")')
 
     logger_factory.make_verbosity_argument(parser)
 
     parser.add_argument('input', nargs='?', type=argparse.FileType('r'), default=sys.stdin, help='Mock input file, defaults to stdin')
     parser.add_argument('output', nargs='?', type=argparse.FileType('w'), default=sys.stdout, help='HTML output file, defaults to stdout')
+    parser.add_argument('--outline', type=argparse.FileType('w'), default=None, help='Also writes a JSON outline of the components to this file')
+    parser.add_argument('--text', type=argparse.FileType('w'), default=None, help='Also writes every text of the mock, one per line, to this file')
+    parser.add_argument('--jobs', '-j', type=int, default=None, help='Renders the top level fields of large mocks in this many processes, 0 for the number of CPUs. Not used with --outline, --text or limits.')
+
+    limits_.make_limit_arguments(parser)
 
     return parser.parse_args()
 
 
 class ArgsChecker(object):
+    '''
+    Validates component parameters. By default the first failed assertion raises AssertionError.
+
+    When an errors list is given, failures are appended to it as (field, param, message) tuples
+    instead, and the failed param falls back to its default, so a whole document can be checked
+    in a single pass. `field` is the field being generated, as set by MockGenerator.
+    '''
+
+    def __init__(self, errors=None):
+        self.errors = errors
+        self.field = None
 
     def reset(self, context, args, kwargs):
         self._context = context
@@ -25,12 +66,15 @@ class ArgsChecker(object):
         self._kwargs = kwargs
         self._reset()
 
+        return self
+
     def _reset(self):
         self._param = None
         self._value = None
         self._default = None
         self._value_set_from_default = False
         self._allArgs = False
+        self._failed = False
 
     def param(self, param):
         self._reset()
@@ -43,9 +87,11 @@ class ArgsChecker(object):
 
         return self
 
-    def istype(self, ptype):
+    def istype(self, *ptypes):
+        expected = ptypes[0] if len(ptypes) == 1 else ptypes
+
         def _istype(value):
-            self._assert(type(value) == ptype, f'Must be of type "{ptype}", its "{type(value)}"')
+            self._assert(type(value) in ptypes, f'Must be of type "{expected}", its "{type(value)}"')
 
         self._for_value(lambda v: _istype(v))
 
@@ -60,11 +106,19 @@ class ArgsChecker(object):
             self._value_set_from_default = self._param not in self._kwargs
             value = self._kwargs.get(self._param, self._default)
             checker(value)
-            self._value = value
+            self._value = self._default if self._failed else value
+
+    def _assert(self, assertion, message, even_if_default=False):
+        if assertion or self._failed or (self._value_set_from_default and not even_if_default):
+            return
+
+        message = f'{self._context}.{self._param}: {message}'
+
+        if self.errors is None:
+            raise AssertionError(message)
 
-    def _assert(self, assertion, message):
-        if not assertion and not self._value_set_from_default:
-            raise AssertionError(f'{self._context}.{self._param}: {message}')
+        self._failed = True
+        self.errors.append((self.field, self._param, message))
 
     def get(self):
         value = self._value
@@ -97,20 +151,70 @@ class ArgsChecker(object):
 
     def isNotNone(self):
         def _isNotNone(value):
-            self._assert(value is not None, f'Can\'t be none')
+            self._assert(value is not None, f'Can\'t be none', even_if_default=True)
 
         self._for_value(lambda v: _isNotNone(v))
 
         return self
 
-checker = ArgsChecker()
-
-
 class MockGenerator(object):
 
-    def __init__(self, input, output):
+    def __init__(self, input, output, errors=None, components=None, sinks=(), limits=None, fragments=None):
+        '''
+        errors: when a list is given, validation errors are collected on it instead of raised (see ArgsChecker)
+        components: plugins.ComponentRegistry for kinds not built in, defaults to plugins.registry
+        sinks: sinks.Sink receiving every component as the HTML is written, for other outputs of the same traversal
+        limits: limits.Limits of the components, table cells, output and time of the render, which raises
+            limits.LimitExceeded when it goes over one of them
+        fragments: fragments.FragmentStore the HTML of top level fields is taken from, and added to, unless sinks,
+            collected errors or limits need to see every component
+        '''
         self._in = input
         self._out = output
+        self._limits = limits
+        self._fragments = fragments if not sinks and errors is None and limits is None else None
+        # Components and table cells generated, and the time.monotonic() to finish by, counted against limits
+        self._nodes = 0
+        self._cells = 0
+        self._deadline = None
+
+        if limits is not None:
+            self._deadline = limits.deadline()
+
+            if limits.output_bytes is not None:
+                self._out = limits_.LimitedOutput(output, limits.output_bytes)
+
+        self._checker = ArgsChecker(errors)
+        self._components = components or plugins.registry
+        self._sinks = sinks
+        # Whether the path of components is tracked, and every repetition of a table cell generated, for the sinks
+        self._paths = any(sink.paths for sink in sinks)
+        self._repeats = any(sink.repeats for sink in sinks)
+        self._path = []
+        # (function, args) of the work left to generate the document, see _generate_fields
+        self._stack = []
+        # Option catalogs written on the page, see _catalog
+        self._catalogs = {}
+        # Names of the definitions written on the page, see _define
+        self._defined = set()
+        self._field_kinds = {
+            # TODO Remove esta tag, isso não se enquadra na ideia de simplicidade
+            # 'br': lambda *args, **kwargs: self._wbrn(),
+            'br': lambda *args, **kwargs: self._w(''),
+            'span': self._generate_span,
+            'header': self._generate_header,
+            'text': self._generate_text,
+            'finder': self._generate_finder,
+            'select': self._generate_select,
+            'radio': self._generate_radio,
+            'check': self._generate_check,
+            'multipleselect': self._generate_multipleselect,
+            'button': self._generate_button,
+            'container': self._generate_container,
+            'textarea': self._generate_textarea,
+            'table': self._generate_table,
+            'link': self._generate_anchor,
+        }
 
     header = '''<html>
 <head>
@@ -161,6 +265,19 @@ class MockGenerator(object):
       <div class="col-md-8 justify-content-end d-flex">
 '''
 
+    # Fills selects with data-catalog from their <datalist>, written once on pages with catalogs
+    catalog_script = '''<script>
+document.addEventListener('DOMContentLoaded', function () {
+  document.querySelectorAll('select[data-catalog]').forEach(function (select) {
+    select.innerHTML = document.getElementById(select.dataset.catalog).innerHTML
+  })
+})
+</script>
+'''
+
+    # Distinct cells of a table column whose HTML is kept for reuse
+    cell_cache_size = 1024
+
     container_footer = '''      </div>
     </div><br/>
 '''
@@ -168,66 +285,231 @@ class MockGenerator(object):
     def generate(self):
         self._w(MockGenerator.header)
 
-        self._generate_fields(self._in, True)
+        if self._fragments is None:
+            self._generate_fields(self._in, True)
+        else:
+            self._generate_fragments(self._in)
 
         self._w(MockGenerator.footer)
 
+    def _generate_fragments(self, fields):
+        last = len(fields) - 1
+
+        for i, field in enumerate(fields):
+            html = self._fragments.fragment(field, i == last, self._components)
+
+            if html is None:
+                self.generate_root_field(field, i == last)
+            else:
+                self._w(html)
+
     def _generate_fields(self, fields, container=False, **default_kwargs):
         '''
         O paramêtro container se refere ao rootContainer, isto é, é True quando está gerando os fields direto no body
         A string 'container' (como em if 'container' in field) se refere ao field do tipo container
+
+        Fields are generated from a work stack instead of by recursion: containers push their closing tags and then
+        their own fields on it, so nesting depth isn't limited by the interpreter's stack.
         '''
-        for i, field in enumerate(fields):
-            if container:
-                # O seguinte if precisa (muito) ser extraído para uma classe de componente de container
-                if 'container' in field and field['container'][0].get('_kwargs', {}).get('align', 'left') == 'right':
-                    # TODO Extract these component to its classes
-                    self._w(MockGenerator.subcontainer_header)
-                else:
-                    self._w(MockGenerator.container_header)
+        base = len(self._stack)
+
+        self._schedule_fields(fields, container, default_kwargs)
+
+        self._run(base)
+
+    def _schedule_fields(self, fields, container, default_kwargs):
+        stack = self._stack
+        generate = self._generate_root_field if container else self._generate_field
+        last = len(fields) - 1
+        collect = self._checker.errors is not None
+
+        # Pushed backwards, so the first field is the first to be popped
+        for i in range(last, -1, -1):
+            if self._paths:
+                stack.append((self._path.pop, ()))
+
+            if collect and type(fields[i]) is not dict:
+                # Fields of containers fail their args check, top level ones are reported by their place on fields,
+                # since a text or number has no mark of its own
+                if container:
+                    stack.append((self._checker.errors.append, ((fields, i, f'Unknown component: "{fields[i]}"'), )))
+            elif container:
+                stack.append((generate, (fields[i], i == last, default_kwargs)))
+            else:
+                stack.append((generate, (fields[i], default_kwargs)))
+
+            if self._paths:
+                stack.append((self._path.append, (str(i), )))
 
-                is_last = i == len(fields) - 1
-                if is_last:
-                    default_kwargs['br'] = False
+    def _run(self, base):
+        '''
+        Runs the work on the stack down to base, including the work it pushes
+        '''
+        stack = self._stack
+
+        try:
+            while len(stack) > base:
+                work, args = stack.pop()
+                work(*args)
+        except BaseException:
+            del stack[base:]
+            raise
+
+    def generate_root_field(self, field, is_last=False):
+        '''
+        Generates just one field of the body, with its row wrapper, as generate() does for each of them
+        '''
+        base = len(self._stack)
+
+        self._generate_root_field(field, is_last, {})
+
+        self._run(base)
+
+    @staticmethod
+    def aligned_right(field):
+        '''
+        Whether field is a container aligned right, which has a row wrapper of its own
+        '''
+        entry = field.get('container') if type(field) is dict else None
 
-            self._generate_field(field, default_kwargs)
+        if type(entry) is not list or not entry or type(entry[0]) is not dict:
+            return False
 
-            if container:
-                self._w(MockGenerator.container_footer)
+        kwargs = entry[0].get('_kwargs')
+
+        return type(kwargs) is dict and kwargs.get('align', 'left') == 'right'
+
+    def _generate_root_field(self, field, is_last, default_kwargs):
+        # O seguinte if precisa (muito) ser extraído para uma classe de componente de container
+        if MockGenerator.aligned_right(field):
+            # TODO Extract these component to its classes
+            self._w(MockGenerator.subcontainer_header)
+        else:
+            self._w(MockGenerator.container_header)
+
+        if is_last:
+            default_kwargs['br'] = False
+
+        self._stack.append((self._w, (MockGenerator.container_footer, )))
+
+        self._generate_field(field, default_kwargs)
 
     def _generate_field(self, field, kwargs_defaults={}):
-        fieldKinds = {
-            # TODO Remove esta tag, isso não se enquadra na ideia de simplicidade
-            # 'br': lambda *args, **kwargs: self._wbrn(),
-            'br': lambda *args, **kwargs: self._w(''),
-            'span': self._generate_span,
-            'header': self._generate_header,
-            'text': self._generate_text,
-            'finder': self._generate_finder,
-            'select': self._generate_select,
-            'radio': self._generate_radio,
-            'check': self._generate_check,
-            'multipleselect': self._generate_multipleselect,
-            'button': self._generate_button,
-            'container': self._generate_container,
-            'textarea': self._generate_textarea,
-            'table': self._generate_table,
-            'link': self._generate_anchor,
-        }
+        kind, generator = self._field_kind(field)
 
-        for kind, generator in fieldKinds.items():
+        if not generator:
+            # Fields which aren't components were reported when scheduled
+            if self._checker.errors is not None and type(field) is dict:
+                self._checker.errors.append((field, None, f'Unknown component: "{", ".join(map(str, field))}"'))
+
+            return
+
+        if self._checker.errors is None:
+            self._call_generator(kind, generator, field[kind], kwargs_defaults)
+        else:
+            self._call_generator_collecting_errors(field, kind, generator, kwargs_defaults)
+
+    def _field_kind(self, field):
+        '''
+        (kind, generator) of field, or (None, None) when it's unknown
+        '''
+        if type(field) is not dict:
+            return None, None
+
+        for kind, generator in self._field_kinds.items():
             if kind in field:
-                field_args, field_kwargs = extract_params_from_yaml(field[kind])
+                return kind, generator
+
+        return self._plugin_component(field)
+
+    def _plugin_component(self, field):
+        if type(field) is dict:
+            for kind in field:
+                component = self._components.get(kind)
+
+                if component:
+                    return kind, functools.partial(component, self)
+
+        return None, None
+
+    def _call_generator(self, kind, generator, entry, kwargs_defaults):
+        if self._limits is not None:
+            self._spend(1, 0)
+
+        field_args, field_kwargs = extract_params_from_yaml(entry)
+
+        field_kwargs.update(kwargs_defaults)
 
-                field_kwargs.update(kwargs_defaults)
+        if self._sinks:
+            path = '/' + '/'.join(self._path) if self._paths else None
 
-                generator(*field_args, **field_kwargs)
+            for sink in self._sinks:
+                sink.component(kind, field_args, field_kwargs, path)
 
-                break
+        generator(*field_args, **field_kwargs)
+
+    def _call_generator_collecting_errors(self, field, kind, generator, kwargs_defaults):
+        errors = self._checker.errors
+        first_error = len(errors)
+
+        self._checker.field = field
+        try:
+            self._call_generator(kind, generator, field[kind], kwargs_defaults)
+        except limits_.LimitExceeded:
+            # Not an error of the field, the whole render is over
+            raise
+        except Exception as e:
+            # Errors raised after a failed check are usually consequences of it, so only the check is reported
+            if not any(error[0] is field for error in errors[first_error:]):
+                errors.append((field, None, f'{kind}: {e}'))
+
+    def _spend(self, nodes, cells):
+        '''
+        Counts nodes components and cells table cells against the limits, and checks the time left
+        '''
+        limits = self._limits
+        self._nodes += nodes
+        self._cells += cells
+
+        if limits.nodes is not None and self._nodes > limits.nodes:
+            raise limits_.LimitExceeded('nodes', limits.nodes)
+
+        if limits.table_cells is not None and self._cells > limits.table_cells:
+            raise limits_.LimitExceeded('table_cells', limits.table_cells)
+
+        if self._deadline is not None and time.monotonic() > self._deadline:
+            raise limits_.LimitExceeded('seconds', limits.seconds)
+
+    def _spend_text(self, value):
+        '''
+        Counts the items of value, when it's a list or dict written as text, like a table cell or an option, as nodes,
+        and the length of its text against output_bytes, before str() expands every repetition of its aliases
+        '''
+        if type(value) is not list and type(value) is not dict:
+            return
+
+        maximum = self._limits.output_bytes
+        size = 0
+        pending = [value]
+
+        while pending:
+            item = pending.pop()
+            self._spend(1, 0)
+
+            if type(item) is list:
+                pending.extend(item)
+            elif type(item) is dict:
+                pending.extend(item.keys())
+                pending.extend(item.values())
+            else:
+                size += len(str(item))
+
+                if maximum is not None and size > maximum:
+                    raise limits_.LimitExceeded('output_bytes', maximum)
 
     # def _generate_span(self, label=None, br=True):
     def _generate_span(self, *args, **kwargs):
-        checker.reset('span', args, kwargs)
+        checker = self._checker.reset('span', args, kwargs)
         label = checker.param('label').default(None).istype(str).get()
         styles = checker.param('styles').default(None).istype(str).get()
         br = checker.param('br').default(True).istype(bool).get()
@@ -241,16 +523,16 @@ class MockGenerator(object):
         self._wn()
 
     def _generate_header(self, *args, **kwargs):
-        checker.reset('header', args, kwargs)
+        checker = self._checker.reset('header', args, kwargs)
         level = checker.param('level').default(1).istype(int).is_(lambda v: 1 <= v <= 6).get()
         label = checker.param('label').default(None).istype(str).get()
         br = checker.param('br').default(True).istype(bool).get()
 
-        self._wn(f'<h{level}>{label}</h{level}>{"<br/><br/>" if br else ""}')
+        self._wn(f'<h{level}>{escape(label)}</h{level}>{"<br/><br/>" if br else ""}')
 
     # def _generate_text(self, label=None, placeholder=None, br=True):
     def _generate_text(self, *args, **kwargs):
-        checker.reset('text', args, kwargs)
+        checker = self._checker.reset('text', args, kwargs)
         label = checker.param('label').default(None).istype(str).get()
         enabled = checker.param('enabled').default(True).istype(bool).get()
         placeholder = checker.param('placeholder').default(None).istype(str).get()
@@ -273,7 +555,7 @@ class MockGenerator(object):
 
     # def _generate_finder(self, label=None, placeholder=None, br=True):
     def _generate_finder(self, *args, **kwargs):
-        checker.reset('finder', args, kwargs)
+        checker = self._checker.reset('finder', args, kwargs)
         label = checker.param('label').default(None).istype(str).get()
         enabled = checker.param('enabled').default(True).istype(bool).get()
         placeholder = checker.param('placeholder').default(None).istype(str).get()
@@ -289,24 +571,34 @@ class MockGenerator(object):
 
     # def _generate_select(self, options, label=None, br=True):
     def _generate_select(self, *args, **kwargs):
-        checker.reset('select', args, kwargs)
+        checker = self._checker.reset('select', args, kwargs)
         label = checker.param('label').default(None).istype(str).get()
         enabled = checker.param('enabled').default(True).istype(bool).get()
-        options = checker.param('options').isNotNone().istype(list).get()
+        options = checker.param('options').isNotNone().istype(list, str).get()
         br = checker.param('br').default(True).istype(bool).get()
         required = checker.param('required').default(True).istype(bool).get()
 
+        # Options as text, one per line, are a catalog which may be shared by many selects
+        catalog = self._catalog(options) if type(options) is str else None
+
         self._span(label, required=required, enabled=enabled)
         self._wbrn()
         self._w('<select')
 
+        if catalog:
+            self._w(f' data-catalog="{catalog}"')
+
         if not enabled:
             self._w(' disabled readonly')
 
         self._wn('>')
 
-        for option in options:
-            self._wn(f'  <option>{option}</option>')
+        if not catalog:
+            for option in options:
+                if self._limits is not None:
+                    self._spend_text(option)
+
+                self._wn(f'  <option>{escape(option)}</option>')
 
         self._w('</select>')
         if br:
@@ -314,7 +606,7 @@ class MockGenerator(object):
         self._wn()
 
     def _generate_radio(self, *args, **kwargs):
-        checker.reset('check', args, kwargs)
+        checker = self._checker.reset('check', args, kwargs)
         label = checker.param('label').default(None).istype(str).get()
         enabled = checker.param('enabled').default(True).istype(bool).get()
         checked = checker.param('checked').default(False).istype(bool).get()
@@ -330,9 +622,9 @@ class MockGenerator(object):
             self._w(' disabled readonly')
 
         if required and enabled:
-            self._w(f'> {label} *</label>')
+            self._w(f'> {escape(label)} *</label>')
         else:
-            self._w(f'> {label}</label>')
+            self._w(f'> {escape(label)}</label>')
 
         if br:
             self._wbr()
@@ -340,7 +632,7 @@ class MockGenerator(object):
 
     # def _generate_check(self, label=None, checked=False, br=True):
     def _generate_check(self, *args, **kwargs):
-        checker.reset('check', args, kwargs)
+        checker = self._checker.reset('check', args, kwargs)
         label = checker.param('label').default(None).istype(str).get()
         enabled = checker.param('enabled').default(True).istype(bool).get()
         checked = checker.param('checked').default(False).istype(bool).get()
@@ -364,7 +656,7 @@ class MockGenerator(object):
             if not enabled:
                 self._w(' class="disabled"')
 
-            self._w(f'> {label}</label></input>')
+            self._w(f'> {escape(label)}</label></input>')
 
         # self._span(label)
         if br:
@@ -373,19 +665,23 @@ class MockGenerator(object):
 
     # def _generate_multipleselect(self, columns, label=None, placeholder=None, br=True):
     def _generate_multipleselect(self, *args, **kwargs):
-        checker.reset('multipleselect', args, kwargs)
+        checker = self._checker.reset('multipleselect', args, kwargs)
         columns = checker.param('columns').isNotNone().istype(dict).get()
         label = checker.param('label').default(None).istype(str).get()
         enabled = checker.param('enabled').default(True).istype(bool).get()
         editable = checker.param('editable').default(False).istype(bool).get()
         placeholder = checker.param('placeholder').default(None).istype(str).get()
+        options = checker.param('options').default(None).istype(list, str).get()
         br = checker.param('br').default(True).istype(bool).get()
         required = checker.param('required').default(True).istype(bool).get()
 
+        # Suggestions of the input
+        catalog = self._catalog(options) if options is not None and enabled else None
+
         self._span(label, required=required, enabled=enabled)
         self._wbrn()
         if enabled:
-            self._input(enabled, placeholder)
+            self._input(enabled, placeholder, catalog)
             self._img('plus')
             self._wbrn()
 
@@ -394,14 +690,14 @@ class MockGenerator(object):
     # def _generate_button(self, text, br=True):
     def _generate_button(self, *args, **kwargs):
         colors = {'blue': 'primary', 'green': 'success', 'yellow': 'warning', 'red': 'danger', 'gray': 'secondary'}
-        checker.reset('button', args, kwargs)
+        checker = self._checker.reset('button', args, kwargs)
         text = checker.param('text').isNotNone().istype(str).get()
         enabled = checker.param('enabled').default(True).istype(bool).get()
         color = checker.param('color').default('blue').istype(str).isin(*tuple(colors.keys())).get()
         br = checker.param('br').default(True).istype(bool).get()
 
         secondary_class = colors[color]
-        self._w(f'<input type="button" value="{text}" class="btn btn-{secondary_class}"')
+        self._w(f'<input type="button" value="{escape(text)}" class="btn btn-{secondary_class}"')
 
         if not enabled:
             self._w(' disabled')
@@ -414,7 +710,7 @@ class MockGenerator(object):
         self._wn()
 
     def _generate_container(self, *args, **kwargs):
-        checker.reset('container', args, kwargs)
+        checker = self._checker.reset('container', args, kwargs)
         checker.allArgs().istype(dict)
         direction = checker.param('direction').default('horizontal').isin('horizontal', 'vertical').get()
         title = checker.param('title').default(None).istype(str).get()
@@ -434,10 +730,13 @@ class MockGenerator(object):
         self._wn('>')
 
         if title:
-            self._wn(f'  <legend>{title}</legend>')
+            self._wn(f'  <legend>{escape(title)}</legend>')
+
+        self._stack.append((self._close_container, (tag, br)))
 
-        self._generate_fields(args, br=direction == 'vertical' and br)
+        self._schedule_fields(args, False, {'br': direction == 'vertical' and br})
 
+    def _close_container(self, tag, br):
         self._w(f'</{tag}>')
 
         if br:
@@ -447,7 +746,7 @@ class MockGenerator(object):
 
     # def _generate_textarea(self, placeholder, label=None, br=True):
     def _generate_textarea(self, *args, **kwargs):
-        checker.reset('textarea', args, kwargs)
+        checker = self._checker.reset('textarea', args, kwargs)
         placeholder = checker.param('placeholder').isNotNone().istype(str).get()
         label = checker.param('label').default(None).istype(str).get()
         enabled = checker.param('enabled').default(True).istype(bool).get()
@@ -467,7 +766,7 @@ class MockGenerator(object):
 
     # def _generate_table(self, columns, title=None, br=True):
     def _generate_table(self, *args, **kwargs):
-        checker.reset('table', args, kwargs)
+        checker = self._checker.reset('table', args, kwargs)
         title = checker.param('title').default(None).istype(str).get()
         enabled = checker.param('enabled').default(True).istype(bool).get()
         columns = checker.param('columns').isNotNone().istype(dict).get()
@@ -476,10 +775,12 @@ class MockGenerator(object):
         self._table(columns, enabled, title=title, br=br)
 
     def _generate_anchor(self, *args, **kwargs):
-        checker.reset('anchor', args, kwargs)
+        checker = self._checker.reset('anchor', args, kwargs)
         href = checker.param('href').default(None).istype(str).get()
         br = checker.param('br').default(True).istype(bool).get()
 
+        href = escape(href)
+
         self._wbrn(f'<a href="{href}">{href}</a>')
 
     def _table(self, columns, enabled, title=None, br=True, editable=False):
@@ -490,7 +791,7 @@ class MockGenerator(object):
 
         self._wn('  <thead>')
         for column in columns.keys():
-            self._wn(f'    <td>{column}</td>')
+            self._wn(f'    <td>{escape(column)}</td>')
 
         if enabled:
             self._wn(f'    <td>Actions</td>')
@@ -501,18 +802,35 @@ class MockGenerator(object):
 
         rowCount = len(columns[firstColumn])
 
+        renderers = [self._cell_renderer(cells) for cells in columns.values()]
+        base = len(self._stack)
+
         for row in range(rowCount):
+            if self._limits is not None:
+                self._spend(0, len(renderers))
+
             self._wn('  <tr>')
-            for key, value in columns.items():
+            for (key, value), render in zip(columns.items(), renderers):
                 cell = value[row]
 
                 self._w(f'    <td>')
                 if editable:
                     self._w('<div>')
                 if type(cell) == dict:
-                    self._generate_fields([cell], br=False)
+                    if self._paths:
+                        self._path.append(f'{key}[{row}]')
+
+                    render(cell)
+                    # Runs the work the cell pushed, like the fields of a container
+                    self._run(base)
+
+                    if self._paths:
+                        self._path.pop()
                 else:
-                    self._w(str(cell))
+                    if self._limits is not None:
+                        self._spend_text(cell)
+
+                    self._w(escape(cell))
                 if editable:
                     self._img('pencil')
                     self._w('</div>')
@@ -526,6 +844,110 @@ class MockGenerator(object):
 
         self._wbrn('</table>')
 
+    def _cell_renderer(self, cells):
+        '''
+        Renders the component cells of a table column. The kind of the column is looked up once, instead of on every
+        row, and as cells of a column are mostly alike, like a check on each row, the HTML of each distinct cell of a
+        built in kind is generated once and then reused. Every cell is generated when sinks or collected errors need
+        to see each of them.
+        '''
+        kind = next((self._field_kind(cell)[0] for cell in cells if type(cell) is dict), None)
+        generator = self._field_kinds.get(kind)
+        defaults = {'br': False}
+
+        if generator is None:
+            return lambda cell: self._generate_field(cell, defaults)
+
+        # Limited renders don't take the repr of cells, which is as large as the expansion of their aliases
+        if self._repeats or self._checker.errors is not None or self._limits is not None:
+            def render(cell):
+                if len(cell) != 1 or kind not in cell:
+                    self._generate_field(cell, defaults)
+                elif self._checker.errors is None:
+                    self._call_generator(kind, generator, cell[kind], defaults)
+                else:
+                    self._call_generator_collecting_errors(cell, kind, generator, defaults)
+
+            return render
+
+        rendered = {}
+
+        def render(cell):
+            if len(cell) != 1 or kind not in cell:
+                self._generate_field(cell, defaults)
+                return
+
+            key = repr(cell)
+            html = rendered.get(key)
+
+            if html is not None:
+                self._w(html)
+            elif len(rendered) >= MockGenerator.cell_cache_size:
+                # Too many distinct cells to be worth keeping
+                self._call_generator(kind, generator, cell[kind], defaults)
+            else:
+                out = self._out
+                self._out = io.StringIO()
+                try:
+                    base = len(self._stack)
+                    written = len(self._catalogs) + len(self._defined)
+                    self._call_generator(kind, generator, cell[kind], defaults)
+                    self._run(base)
+                    html = self._out.getvalue()
+                finally:
+                    self._out = out
+
+                # The first use of a catalog or definition writes it, later cells must not repeat it
+                if len(self._catalogs) + len(self._defined) == written:
+                    rendered[key] = html
+
+                self._w(html)
+
+        return render
+
+    def _catalog(self, options):
+        '''
+        Id of the <datalist> of options, a list or a text with an option per line, like a file included with !include.
+        It's written on the first use of each catalog on the page, and later uses just refer to it, so a catalog costs
+        the same for one select or for hundreds of them. Selects are filled from their datalist by a small script.
+        '''
+        key = self._catalog_key(options)
+        entry = self._catalogs.get(key)
+
+        if entry is not None:
+            return entry[0]
+
+        if not self._catalogs:
+            self._w(MockGenerator.catalog_script)
+
+        catalog = f'catalog-{len(self._catalogs) + 1}'
+        # Keeping options alive, so their id isn't reused
+        self._catalogs[key] = catalog, options
+
+        if type(options) is str:
+            options = [option.strip() for option in options.splitlines() if option.strip()]
+        elif self._limits is not None:
+            for option in options:
+                self._spend_text(option)
+
+        self._wn(f'<datalist id="{catalog}">' + ''.join(f'<option>{escape(option)}</option>' for option in options) + '</datalist>')
+
+        return catalog
+
+    def _catalog_key(self, options):
+        # Text catalogs are equal by contents, included files are the same string anyway, lists only if they're the
+        # same object, like a YAML alias or a JSON include
+        return options if type(options) is str else id(options)
+
+    def _define(self, name, html):
+        '''
+        Writes html, which the page needs once however many components use it, like the styles and SVG markers of a
+        plugin, the first time name is defined on the page
+        '''
+        if name not in self._defined:
+            self._defined.add(name)
+            self._w(html)
+
     def _span(self, label, required=True, enabled=True, style=[]):
         if label:
             self._w('<span')
@@ -538,14 +960,14 @@ class MockGenerator(object):
             if not enabled:
                 self._w(' class="disabled"')
 
-            self._w(f'>{label}')
+            self._w(f'>{escape(label)}')
             if required and enabled:
                 self._w(' *')
             self._w(f'</span>')
 
-    def _input(self, enabled, placeholder):
+    def _input(self, enabled, placeholder, catalog=None):
         self._w('<input')
-        self._property(placeholder=placeholder)
+        self._property(placeholder=placeholder, list=catalog)
 
         if not enabled:
             self._w(' disabled readonly')
@@ -557,7 +979,7 @@ class MockGenerator(object):
             if not value:
                 continue
             elif type(value) == str:
-                self._w(f' {key}="{value}"')
+                self._w(f' {key}="{escape(value)}"')
             else:
                 self._w(f' {key}={str(value)}')
 
@@ -579,7 +1001,16 @@ class MockGenerator(object):
         self._wn()
 
 
+def run_subcommand(name, argv):
+    module, _, function = subcommands[name].partition(':')
+
+    return getattr(importlib.import_module(f'.{module}', __package__), function or 'main')(argv)
+
+
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] in subcommands:
+        sys.exit(run_subcommand(sys.argv[1], sys.argv[2:]))
+
     global args
 
     args = parse_command_line()
@@ -592,11 +1023,41 @@ def main():
     """
     logger.debug('args: ' + str(args))
 
-    input = yaml.load(args.input, Loader=loader.Loader)
+    limits = limits_.from_arguments(args)
+
+    outputs = {}
+    if args.outline:
+        outputs[args.outline] = OutlineSink()
+    if args.text:
+        outputs[args.text] = TextSink()
 
-    generator = MockGenerator(input, args.output)
+    if limits is None:
+        input = yaml.load(args.input, Loader=loader.Loader)
 
-    generator.generate()
+        if args.jobs is not None and not outputs:
+            from . import parallel
+
+            parallel.render(input, args.output, args.jobs)
+        else:
+            MockGenerator(input, args.output, sinks=list(outputs.values())).generate()
+    else:
+        # Nothing is written unless the whole mock renders within the limits
+        try:
+            input = yaml.load(args.input, Loader=loader.Loader.limited(limits))
+
+            with io.StringIO() as out:
+                MockGenerator(input, out, sinks=list(outputs.values()), limits=limits).generate()
+                args.output.write(out.getvalue())
+        except limits_.LimitExceeded as e:
+            print(f'{args.input.name}: {e}', file=sys.stderr)
+            sys.exit(1)
+
+    for output, sink in outputs.items():
+        sink.write(output)
+
+    # Flushed before returning, as main may run many times in a process, like on a render server
+    for output in (args.output, *outputs):
+        output.flush()
 
 
 if __name__ == '__main__':
@@ -1,7 +1,38 @@
 #!/usr/bin/env python3
 import unittest
+import unittest.mock
 import io
-from . mockdown import MockGenerator
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from . mockdown import MockGenerator, ArgsChecker
+from . check import check_file, find_mocks
+from . preview import FieldRenderer
+from . deps import IncludeIndex
+from . import build
+from . import flowchart
+from . plugins import ComponentRegistry
+from . import corpus
+from . import loader
+from . escaping import escape
+from . sinks import LinkSink, OutlineSink, SearchSink, TextSink
+from . import stream
+from . import archive
+from . engine import Engine
+from . import template
+from . import client
+from . import server
+from . fragments import FragmentStore
+from . search import SearchIndex
+from . limits import Limits, LimitExceeded
+from . import diff
+from . import clientside
+from . import parallel
+from . import site
 import yaml
 
 
@@ -692,3 +723,1824 @@ class MockdownTests(unittest.TestCase):
   </tr>
 </table><br/>
 ''')
+
+
+class CheckTests(unittest.TestCase):
+
+    def check(self, content):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'input.mock.yaml')
+
+            with open(path, 'w') as f:
+                f.write(content)
+
+            return check_file(path)
+
+    def test_valid_mock_has_no_errors(self):
+        errors = self.check('''
+- text:
+    label: Text field
+- button:
+    text: OK
+''')
+
+        self.assertListEqual(errors, [])
+
+    def test_every_error_is_reported_with_its_position(self):
+        errors = self.check('''- text:
+    label: 3
+- select:
+    label: Select without options
+- container:
+    - _kwargs:
+        direction: diagonal
+    - button:
+        text: OK
+        color: purple
+- unknown:
+''')
+
+        self.assertListEqual(errors, [
+            (2, 12, 'text.label: Must be of type "<class \'str\'>", its "<class \'int\'>"'),
+            (3, 3, 'select.options: Can\'t be none'),
+            (7, 20, 'container.direction: Must be in "(\'horizontal\', \'vertical\')"'),
+            (10, 16, 'button.color: Must be in "(\'blue\', \'green\', \'yellow\', \'red\', \'gray\')"'),
+            (11, 3, 'Unknown component: "unknown"'),
+        ])
+
+    def test_syntax_error(self):
+        errors = self.check('''- span: [
+''')
+
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(errors[0][:2], (2, 1))
+
+    def test_malformed_fields_are_reported(self):
+        errors = self.check('''- container:
+- container: {title: x}
+- container: [3]
+- 3
+- container:
+    - _kwargs: 4
+- text: {label: Last}
+''')
+
+        self.assertListEqual(errors, [
+            (3, 3, 'container.None: Must be of type "<class \'dict\'>", its "<class \'int\'>"'),
+            (4, 3, 'Unknown component: "3"'),
+            (5, 3, "container: 'int' object is not iterable"),
+        ])
+
+
+class PreviewTests(unittest.TestCase):
+
+    document = '''
+- span:
+    label: First
+- text:
+    label: Second
+- button:
+    text: Third
+'''
+
+    def test_fragments_match_full_generation(self):
+        document = yaml.load(self.document, Loader=yaml.FullLoader)
+
+        with io.StringIO() as out:
+            MockGenerator(document, out).generate()
+            expected = out.getvalue()
+
+        renderer = FieldRenderer()
+        renderer.update(document)
+
+        self.assertEqual(MockGenerator.header + ''.join(renderer.fragments) + MockGenerator.footer, expected)
+
+    def test_only_changed_fields_are_rendered(self):
+        renderer = FieldRenderer()
+
+        self.assertListEqual(list(renderer.update(yaml.load(self.document, Loader=yaml.FullLoader))), [0, 1, 2])
+
+        changed = renderer.update(yaml.load(self.document.replace('Second', 'Changed'), Loader=yaml.FullLoader))
+
+        self.assertListEqual(list(changed), [1])
+        self.assertIn('<span>Changed *</span>', changed[1])
+
+    def test_new_last_field_rerenders_previous_last(self):
+        renderer = FieldRenderer()
+        renderer.update(yaml.load(self.document, Loader=yaml.FullLoader))
+
+        changed = renderer.update(yaml.load(self.document + '- span:\n    label: Fourth\n', Loader=yaml.FullLoader))
+
+        self.assertListEqual(list(changed), [2, 3])
+
+    def test_catalogs_and_definitions_are_written_once_for_the_page(self):
+        chart = {'flowchart': {'nodes': [{'start': 'Begin'}, {'end': 'Finish'}]}}
+        document = [{'select': {'options': 'a\nb\n'}}, {'select': {'options': 'c\nd\n'}}, {'select': {'options': 'a\nb\n'}}, chart, chart]
+
+        renderer = FieldRenderer()
+        renderer.update(document)
+        page = renderer.page()
+
+        self.assertEqual(page.count('<datalist id="catalog-1">'), 1)
+        self.assertEqual(page.count('<datalist id="catalog-2">'), 1)
+        self.assertEqual(page.count('id="flowchart-arrow"'), 1)
+        self.assertListEqual([fragment.count('data-catalog="catalog-2"') for fragment in renderer.fragments], [0, 1, 0, 0, 0])
+        self.assertIn('<datalist id="catalog-2"><option>c</option>', renderer.definitions())
+
+        # Fields changed later keep the numbers of the catalogs they share with the others
+        changed = renderer.update([document[0], {'select': {'options': 'c\nd\n', 'label': 'B'}}] + document[2:])
+
+        self.assertListEqual(list(changed), [1])
+        self.assertIn('data-catalog="catalog-2"', changed[1])
+        self.assertEqual(renderer.page().count('<datalist'), 2)
+
+    def test_list_catalogs_of_updates_are_written_once(self):
+        renderer = FieldRenderer()
+
+        for label in 'ABCDE':
+            options = ['a', 'b']
+            renderer.update([{'multipleselect': {'columns': {'Name': ['x']}, 'options': options, 'label': label}}, {'multipleselect': {'columns': {'Name': ['x']}, 'options': options}}])
+
+        self.assertEqual(renderer.page().count('<datalist'), 1)
+        self.assertIn('list="catalog-1"', renderer.fragments[0])
+
+
+class IncludeIndexTests(unittest.TestCase):
+
+    def setUp(self):
+        self._folder = tempfile.TemporaryDirectory()
+        self.folder = self._folder.name
+
+        self.write('page.mock.yaml', '- container: !include header.yaml\n')
+        self.write('other.mock.yaml', '- container: !include header.yaml\n- span: {label: !include footer.txt}\n')
+        self.write('header.yaml', '- span: {label: !include title.txt}\n')
+        self.write('title.txt', 'Title')
+        self.write('footer.txt', 'Footer')
+
+    def tearDown(self):
+        self._folder.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.folder, name)
+
+    def write(self, name, content):
+        with open(self.path(name), 'w') as f:
+            f.write(content)
+
+    def test_includes_and_includers(self):
+        index = IncludeIndex()
+        index.update([self.path('page.mock.yaml'), self.path('other.mock.yaml')])
+
+        self.assertListEqual(index.includes(self.path('page.mock.yaml')), [self.path('header.yaml'), self.path('title.txt')])
+        self.assertListEqual(index.includers(self.path('title.txt')), [self.path('header.yaml'), self.path('other.mock.yaml'), self.path('page.mock.yaml')])
+        self.assertListEqual(index.includers(self.path('title.txt'), transitive=False), [self.path('header.yaml')])
+
+    def test_persisted_index_rescans_only_changed_files(self):
+        index_path = self.path('index.json')
+
+        index = IncludeIndex(index_path)
+        index.update([self.path('page.mock.yaml'), self.path('other.mock.yaml')])
+        index.save()
+
+        self.write('header.yaml', '- span: {label: Fixed title}\n')
+
+        index = IncludeIndex(index_path)
+
+        self.assertListEqual(index.refresh(), [self.path('header.yaml')])
+        self.assertListEqual(index.includers(self.path('title.txt')), [])
+        self.assertListEqual(index.includers(self.path('footer.txt')), [self.path('other.mock.yaml')])
+
+    def test_files_added_to_glob_folders(self):
+        os.makedirs(self.path('parts'))
+        self.write(os.path.join('parts', 'a.yaml'), 'span: {label: a}\n')
+        self.write('glob.mock.yaml', '- container: !include parts/*.yaml\n')
+
+        index_path = self.path('index.json')
+        index = IncludeIndex(index_path)
+        index.update([self.path('glob.mock.yaml')])
+        index.save()
+
+        # Scanned again once a file is added, even from a persisted index
+        self.write(os.path.join('parts', 'new.yaml'), 'span: {label: new}\n')
+        index = IncludeIndex(index_path)
+
+        self.assertListEqual(index.refresh(), [self.path('glob.mock.yaml'), self.path(os.path.join('parts', 'new.yaml'))])
+        self.assertListEqual(index.includers(self.path(os.path.join('parts', 'new.yaml'))), [self.path('glob.mock.yaml')])
+        self.assertListEqual(index.refresh(), [])
+
+
+class BuildTests(unittest.TestCase):
+
+    def setUp(self):
+        self._folder = tempfile.TemporaryDirectory()
+        self.folder = self._folder.name
+
+        for i in range(10):
+            os.makedirs(os.path.join(self.folder, 'src', f'group{i % 3}'), exist_ok=True)
+
+            with open(os.path.join(self.folder, 'src', f'group{i % 3}', f'page{i}.mock.yaml'), 'w') as f:
+                f.write(''.join(f'- text:\n    label: Field {j}\n' for j in range(i * 3 + 1)))
+
+    def tearDown(self):
+        self._folder.cleanup()
+
+    def test_shards_are_deterministic_and_balanced(self):
+        weights = {f'page{i}': i + 1 for i in range(10)}
+
+        shards = build.assign_shards(reversed(list(weights)), 3, weights)
+
+        self.assertListEqual(shards, build.assign_shards(weights, 3, weights))
+        self.assertListEqual(sorted(sum(shards, [])), sorted(weights))
+        self.assertLessEqual(max(sum(weights[page] for page in shard) for shard in shards) - min(sum(weights[page] for page in shard) for shard in shards), 1)
+
+    def mockdown(self, *args):
+        package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+        return subprocess.Popen([sys.executable, '-m', 'mockdown.mockdown', *args], cwd=self.folder, env=dict(os.environ, PYTHONPATH=package_root))
+
+    def test_merged_shards_match_single_build(self):
+        self.assertEqual(self.mockdown('build', 'src', '--root', 'src', '--output', 'full', '--jobs', '1').wait(), 0)
+
+        shards = [self.mockdown('build', 'src', '--root', 'src', '--output', f'shard{k}', '--shard', f'{k}/3', '--timings', 'full') for k in (1, 2, 3)]
+        self.assertListEqual([shard.wait() for shard in shards], [0, 0, 0])
+
+        self.assertEqual(self.mockdown('merge', 'shard1', 'shard2', 'shard3', '--output', 'merged').wait(), 0)
+
+        full = build.load_manifest(os.path.join(self.folder, 'full'))['pages']
+        merged = build.load_manifest(os.path.join(self.folder, 'merged'))['pages']
+
+        self.assertEqual(len(full), 10)
+        self.assertDictEqual({page: entry['sha256'] for page, entry in merged.items()}, {page: entry['sha256'] for page, entry in full.items()})
+        self.assertTrue(all(build.load_manifest(os.path.join(self.folder, f'shard{k}'))['pages'] for k in (1, 2, 3)))
+
+    def test_archive_matches_folder(self):
+        import tarfile
+        import zipfile
+
+        os.makedirs(os.path.join(self.folder, 'icons', 'svg'))
+        with open(os.path.join(self.folder, 'icons', 'svg', 'pencil.svg'), 'w') as f:
+            f.write('<svg/>')
+
+        source = os.path.join(self.folder, 'src')
+        folder = os.path.join(self.folder, 'site')
+        self.assertListEqual(build.build(find_mocks([source]), folder, source, jobs=1, assets=[os.path.join(self.folder, 'icons')]), [])
+
+        pages = build.load_manifest(folder)['pages']
+        self.assertEqual(build.load_manifest(folder)['assets']['icons/svg/pencil.svg']['bytes'], 6)
+
+        for name in ('site.zip', 'site.tar.gz'):
+            path = os.path.join(self.folder, name)
+            self.assertListEqual(build.build(find_mocks([source]), path, source, jobs=2, assets=[os.path.join(self.folder, 'icons')]), [])
+
+            manifest = build.load_manifest(path)
+            self.assertDictEqual({page: entry['sha256'] for page, entry in manifest['pages'].items()}, {page: entry['sha256'] for page, entry in pages.items()})
+
+            if name.endswith('.zip'):
+                with zipfile.ZipFile(path) as f:
+                    names = f.namelist()
+            else:
+                with tarfile.open(path) as f:
+                    names = f.getnames()
+
+            self.assertListEqual(sorted(names), sorted(list(pages) + ['icons/svg/pencil.svg', build.manifest_name]))
+            self.assertEqual(archive.read(path, 'group1/page4.html'), archive.read(folder, 'group1/page4.html'))
+
+    def test_merge_archives_with_assets(self):
+        os.makedirs(os.path.join(self.folder, 'icons', 'svg'))
+        with open(os.path.join(self.folder, 'icons', 'svg', 'pencil.svg'), 'w') as f:
+            f.write('<svg/>')
+
+        source = os.path.join(self.folder, 'src')
+        assets = [os.path.join(self.folder, 'icons')]
+        full = os.path.join(self.folder, 'full')
+        shards = [os.path.join(self.folder, name) for name in ('shard1', 'shard2.zip', 'shard3.tar.gz')]
+
+        self.assertListEqual(build.build(find_mocks([source]), full, source, jobs=1, assets=assets), [])
+
+        for k, shard in enumerate(shards, 1):
+            self.assertListEqual(build.build(find_mocks([source]), shard, source, jobs=1, shard=(k, 3), assets=assets), [])
+
+        merged = os.path.join(self.folder, 'merged')
+        build.merge(shards, merged)
+
+        manifest = build.load_manifest(merged)
+        expected = build.load_manifest(full)
+
+        self.assertDictEqual({page: entry['sha256'] for page, entry in manifest['pages'].items()}, {page: entry['sha256'] for page, entry in expected['pages'].items()})
+        self.assertDictEqual(manifest['assets'], expected['assets'])
+        self.assertEqual(archive.read(merged, 'icons/svg/pencil.svg'), b'<svg/>')
+        self.assertEqual(archive.read(merged, 'group1/page4.html'), archive.read(full, 'group1/page4.html'))
+
+
+class FlowchartTests(unittest.TestCase):
+
+    def test_layout_layers_follow_edges_and_break_cycles(self):
+        positions, width, height = flowchart.layout(['start', 'check', 'fix', 'end'], [('start', 'check'), ('check', 'fix'), ('fix', 'check'), ('check', 'end')])
+
+        layers = {id: y for id, (x, y) in positions.items()}
+
+        self.assertLess(layers['start'], layers['check'])
+        self.assertLess(layers['check'], layers['fix'])
+        self.assertEqual(layers['fix'], layers['end'])
+        self.assertNotEqual(positions['fix'][0], positions['end'][0])
+
+    def test_nodes_are_linked_in_sequence_without_edges(self):
+        nodes = flowchart.parse_nodes([{'start': 'Begin'}, {'action': 'Do', 'id': 'do'}, {'end': 'Finish'}])
+
+        self.assertListEqual(flowchart.parse_edges(None, nodes), [('Begin', 'do', None), ('do', 'Finish', None)])
+
+    def test_flowchart_component(self):
+        document = yaml.load('''
+- flowchart:
+    nodes:
+      - start: Begin
+      - action: Fill form
+        form: form.html
+      - decision: Valid
+      - end: Finish
+    edges:
+      - [Begin, Fill form]
+      - [Fill form, Valid]
+      - [Valid, Fill form, "no"]
+      - from: Valid
+        to: Finish
+        label: "yes"
+''', Loader=yaml.FullLoader)
+
+        with io.StringIO() as out:
+            MockGenerator(document, out).generate()
+            output = out.getvalue()
+
+        self.assertIn('<svg class="flowchart"', output)
+        self.assertIn('<a href="form.html"><rect', output)
+        self.assertIn('class="flowchart-decision"/><text', output)
+        self.assertIn('>no</text>', output)
+        self.assertEqual(output.count('marker-end='), 4)
+
+    def test_definitions_are_written_once(self):
+        chart = {'flowchart': {'nodes': [{'start': 'Begin'}, {'end': 'Finish'}]}}
+        document = [chart, {'container': [chart]}, {'table': {'columns': {'Flow': [{'container': [chart]}] * 3}}}] * 100
+
+        with io.StringIO() as out:
+            MockGenerator(document, out).generate()
+            output = out.getvalue()
+
+        self.assertEqual(output.count('<svg class="flowchart"'), 500)
+        self.assertEqual(output.count('id="flowchart-arrow"'), 1)
+
+        with io.StringIO() as out:
+            parallel.render(document, out, 2, 10)
+            self.assertEqual(out.getvalue(), output)
+
+
+class PluginTests(unittest.TestCase):
+
+    plugin = '''
+def generate(generator, *args, **kwargs):
+    checker = generator._checker.reset('stars', args, kwargs)
+    count = checker.param('count').default(3).istype(int).get()
+
+    generator._wn('*' * count)
+'''
+
+    def setUp(self):
+        self._folder = tempfile.TemporaryDirectory()
+
+        with open(os.path.join(self._folder.name, 'mockdown_stars_plugin.py'), 'w') as f:
+            f.write(self.plugin)
+
+        sys.path.insert(0, self._folder.name)
+
+    def tearDown(self):
+        sys.path.remove(self._folder.name)
+        sys.modules.pop('mockdown_stars_plugin', None)
+        self._folder.cleanup()
+
+    def generate(self, content, components):
+        with io.StringIO() as out:
+            MockGenerator(yaml.load(content, Loader=yaml.FullLoader), out, components=components).generate()
+            return out.getvalue()
+
+    def test_plugin_is_imported_on_first_use(self):
+        components = ComponentRegistry({'stars': 'mockdown_stars_plugin:generate'}, group=None)
+
+        self.generate('- text:\n    label: Name\n', components)
+        self.assertNotIn('mockdown_stars_plugin', sys.modules)
+
+        output = self.generate('- stars:\n    count: 5\n', components)
+        self.assertIn('mockdown_stars_plugin', sys.modules)
+        self.assertIn('\n*****\n', output)
+
+    def test_unknown_kinds_are_still_ignored(self):
+        output = self.generate('- nothing:\n    count: 5\n', ComponentRegistry({}, group=None))
+
+        self.assertTrue(output.startswith(MockGenerator.header))
+
+    def test_builtin_fields_do_not_import_plugins(self):
+        script = '''
+import io, sys, yaml
+from mockdown.mockdown import MockGenerator
+MockGenerator(yaml.safe_load("- text:\\n    label: Name\\n"), io.StringIO()).generate()
+print('mockdown.flowchart' in sys.modules)
+'''
+        package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        result = subprocess.run([sys.executable, '-c', script], env=dict(os.environ, PYTHONPATH=package_root), capture_output=True, text=True, check=True)
+
+        self.assertEqual(result.stdout.strip(), 'False')
+
+
+class CorpusTests(unittest.TestCase):
+
+    # Every shape, shrunk to keep the tests fast
+    small_sizes = dict(fields=8, depth=6, rows=20, options=30, includes=3)
+
+    def setUp(self):
+        self._folder = tempfile.TemporaryDirectory()
+        self.folder = self._folder.name
+
+    def tearDown(self):
+        self._folder.cleanup()
+
+    def read(self, path):
+        with open(path, 'r') as f:
+            return f.read()
+
+    def render(self, document):
+        with io.StringIO() as out:
+            MockGenerator(document, out).generate()
+            return out.getvalue()
+
+    def test_same_seed_same_corpus(self):
+        first = corpus.write_corpus(os.path.join(self.folder, 'first'), 3, 42, 'includes', **self.small_sizes)
+        second = corpus.write_corpus(os.path.join(self.folder, 'second'), 3, 42, 'includes', **self.small_sizes)
+
+        self.assertListEqual([self.read(path) for path in first], [self.read(path) for path in second])
+
+    def test_every_shape_is_valid(self):
+        for shape in corpus.shapes:
+            for path in corpus.write_corpus(os.path.join(self.folder, shape), 2, 1, shape, **self.small_sizes):
+                self.assertListEqual(check_file(path), [], f'{shape}: {path}')
+
+    def test_includes_render_as_inlined_fragments(self):
+        path, = corpus.write_corpus(self.folder, 1, 7, 'includes', **self.small_sizes)
+
+        with open(path, 'r') as f:
+            included = yaml.load(f, Loader=loader.Loader)
+
+        inlined = []
+        for field in yaml.load(self.read(path).replace('!include ', ''), Loader=yaml.SafeLoader):
+            if type(field.get('container')) is str:
+                field = {'container': yaml.load(self.read(os.path.join(self.folder, field['container'])), Loader=yaml.SafeLoader)}
+
+            inlined.append(field)
+
+        self.assertEqual(self.render(included), self.render(inlined))
+
+
+class EscapeTests(unittest.TestCase):
+
+    def test_special_characters_are_escaped(self):
+        self.assertEqual(escape('<b>"Tom" & Jerry</b>'), '&lt;b&gt;&quot;Tom&quot; &amp; Jerry&lt;/b&gt;')
+
+    def test_plain_strings_are_not_copied(self):
+        value = ''.join(['Plain', ' label'])
+
+        self.assertIs(escape(value), value)
+
+    def test_other_types_are_converted(self):
+        self.assertEqual(escape(42), '42')
+        self.assertEqual(escape(None), 'None')
+
+    def test_components_escape_their_content(self):
+        document = yaml.load('''
+- text:
+    label: Price < 10 & "cheap"
+    placeholder: Say "hi"
+- select:
+    options:
+        - <none>
+- table:
+    columns:
+        A&B:
+            - <td>
+''', Loader=yaml.FullLoader)
+
+        with io.StringIO() as out:
+            MockGenerator(document, out).generate()
+            output = out.getvalue()
+
+        self.assertIn('<span>Price &lt; 10 &amp; &quot;cheap&quot; *</span>', output)
+        self.assertIn('<input placeholder="Say &quot;hi&quot;"/>', output)
+        self.assertIn('<option>&lt;none&gt;</option>', output)
+        self.assertIn('<td>A&amp;B</td>', output)
+        self.assertIn('<td>&lt;td&gt;</td>', output)
+
+
+class SinkTests(unittest.TestCase):
+
+    document = '''
+- header:
+    label: Title
+- container:
+    - _kwargs:
+        title: Group
+    - text:
+        label: Name
+        placeholder: Full name
+- table:
+    columns:
+        Day:
+            - Monday
+        Done:
+            - check:
+- select:
+    options:
+        - One
+        - Two
+'''
+
+    def generate(self, sinks=()):
+        with io.StringIO() as out:
+            MockGenerator(yaml.load(self.document, Loader=yaml.FullLoader), out, sinks=sinks).generate()
+            return out.getvalue()
+
+    def test_outline(self):
+        outline = OutlineSink()
+        self.generate([outline])
+
+        self.assertListEqual(outline.outline, [
+            {'kind': 'header', 'label': 'Title', 'path': '/0'},
+            {'kind': 'container', 'label': 'Group', 'path': '/1'},
+            {'kind': 'text', 'label': 'Name', 'path': '/1/0'},
+            {'kind': 'table', 'label': None, 'path': '/2'},
+            {'kind': 'check', 'label': None, 'path': '/2/Done[0]'},
+            {'kind': 'select', 'label': None, 'path': '/3'},
+        ])
+
+    def test_text(self):
+        text = TextSink()
+        self.generate([text])
+
+        self.assertListEqual(text.lines, ['Title', 'Group', 'Name', 'Full name', 'Day', 'Monday', 'Done', 'One', 'Two'])
+
+    def test_sinks_do_not_change_html(self):
+        self.assertEqual(self.generate([OutlineSink(), TextSink()]), self.generate())
+
+
+class TableCellTests(unittest.TestCase):
+
+    columns = {
+        'Done': [{'check': None}, {'check': {'checked': True}}, {'check': None}],
+        'Mixed': [{'check': None}, {'text': {'placeholder': 'Name'}}, 'Plain'],
+        'Row': [1, 2, 3],
+    }
+
+    def generate(self, sinks=(), errors=None):
+        with io.StringIO() as out:
+            MockGenerator([{'table': {'columns': self.columns}}], out, errors=errors, sinks=sinks).generate()
+            return out.getvalue()
+
+    def test_reused_cells_match_generated_cells(self):
+        self.assertEqual(self.generate(), self.generate([OutlineSink()]))
+        self.assertEqual(self.generate(), self.generate(errors=[]))
+
+    def test_mixed_column(self):
+        html = self.generate()
+
+        self.assertIn('placeholder="Name"', html)
+        self.assertIn('Plain', html)
+        self.assertEqual(html.count('type="checkbox"'), 4)
+        self.assertEqual(html.count(' checked='), 1)
+
+    def test_every_cell_reaches_sinks(self):
+        outline = OutlineSink()
+        self.generate([outline])
+
+        self.assertListEqual([entry['path'] for entry in outline.outline], ['/0', '/0/Done[0]', '/0/Mixed[0]', '/0/Done[1]', '/0/Mixed[1]', '/0/Done[2]'])
+
+
+class DeepNestingTests(unittest.TestCase):
+
+    depth = 20000
+
+    def nested(self, depth):
+        fields = [{'span': {'label': 'Innermost'}}]
+
+        for level in range(depth):
+            fields = [{'_kwargs': {'title': f'Level {level}'}}, {'text': {'label': 'Name'}}, {'container': fields}]
+
+        return [{'container': fields}, {'span': {'label': 'After'}}]
+
+    def test_deep_containers(self):
+        with io.StringIO() as out:
+            MockGenerator(self.nested(self.depth), out).generate()
+            html = out.getvalue()
+
+        self.assertEqual(html.count('<fieldset'), self.depth)
+        self.assertEqual(html.count('</fieldset>'), self.depth)
+        self.assertLess(html.index('Innermost'), html.index('</fieldset>'))
+        self.assertLess(html.rindex('</fieldset>'), html.index('After'))
+
+    def test_deep_containers_collecting_errors(self):
+        document = self.nested(self.depth)
+        document[0]['container'][1] = {'text': {'label': 1}}
+        errors = []
+
+        with io.StringIO() as out:
+            MockGenerator(document, out, errors=errors).generate()
+
+        self.assertEqual(len(errors), 1)
+
+    def test_error_leaves_generator_usable(self):
+        with io.StringIO() as out:
+            generator = MockGenerator(self.nested(3), out)
+
+            self.assertRaises(AssertionError, generator.generate_root_field, {'container': [{'text': {'label': 1}}, {'span': {'label': 'Skipped'}}]})
+            generator.generate_root_field({'span': {'label': 'Next'}})
+
+            self.assertNotIn('Skipped', out.getvalue())
+            self.assertTrue(out.getvalue().endswith('<span>Next</span><br/>\n      </div>\n    </div><br/>\n'))
+
+    def test_deep_yaml_and_includes(self):
+        with tempfile.TemporaryDirectory() as folder:
+            for i in range(2000):
+                with open(os.path.join(folder, f'level{i}.yaml'), 'w') as f:
+                    f.write(f'- text:\n    label: Level {i}\n- container: !include level{i + 1}.yaml\n')
+
+            with open(os.path.join(folder, 'level2000.yaml'), 'w') as f:
+                f.write('[' + '{container: [' * 1000 + '{span: {label: Innermost}}' + ']}' * 1000 + ']')
+
+            with open(os.path.join(folder, 'level0.yaml'), 'r') as f:
+                document = yaml.load(f, Loader=loader.Loader)
+
+        depth = 0
+        while 'container' in document[-1]:
+            document = document[-1]['container']
+            depth += 1
+
+        self.assertEqual(depth, 3000)
+        self.assertEqual(document, [{'span': {'label': 'Innermost'}}])
+
+    def test_recursive_include(self):
+        with tempfile.TemporaryDirectory() as folder:
+            with open(os.path.join(folder, 'page.yaml'), 'w') as f:
+                f.write('- container: !include page.yaml\n')
+
+            with open(os.path.join(folder, 'page.yaml'), 'r') as f:
+                self.assertRaises(yaml.YAMLError, yaml.load, f, Loader=loader.Loader)
+
+
+class StreamTests(unittest.TestCase):
+
+    stream = '''
+- header:
+    label: First
+---
+- text:
+    label: Second
+---
+- header:
+    level: nine
+---
+- span:
+    label: Fourth
+'''
+
+    def setUp(self):
+        self._folder = tempfile.TemporaryDirectory()
+        self.folder = self._folder.name
+
+    def tearDown(self):
+        self._folder.cleanup()
+
+    def test_documents_in_order(self):
+        documents = list(stream.documents(io.StringIO(self.stream)))
+
+        self.assertListEqual([next(iter(document[0])) for document in documents], ['header', 'text', 'header', 'span'])
+
+    def test_parse_error_after_previous_documents(self):
+        documents = stream.documents(io.StringIO('- span:\n    label: One\n---\n- span: [\n'))
+
+        self.assertEqual(next(documents)[0]['span']['label'], 'One')
+        self.assertRaises(yaml.YAMLError, next, documents)
+
+    def test_folder(self):
+        with archive.open_writer(os.path.join(self.folder, 'out')) as writer:
+            count, failures = stream.render_stream(io.StringIO(self.stream), writer, 'page-{index}.html')
+
+        self.assertEqual(count, 4)
+        self.assertListEqual([index for index, error in failures], [2])
+        self.assertListEqual(sorted(os.listdir(os.path.join(self.folder, 'out'))), ['page-0.html', 'page-1.html', 'page-3.html'])
+
+        with open(os.path.join(self.folder, 'out', 'page-1.html'), 'rb') as f:
+            self.assertEqual(f.read(), stream.render(yaml.load(self.stream.split('---')[1], Loader=loader.Loader)))
+
+    def test_archives(self):
+        import tarfile
+        import zipfile
+
+        for name in ('out.zip', 'out.tar.gz'):
+            path = os.path.join(self.folder, name)
+
+            with archive.open_writer(path) as writer:
+                stream.render_stream(io.StringIO(self.stream), writer)
+
+            if name.endswith('.zip'):
+                with zipfile.ZipFile(path) as f:
+                    names = f.namelist()
+            else:
+                with tarfile.open(path) as f:
+                    names = f.getnames()
+
+            self.assertListEqual(names, ['0000.html', '0001.html', '0003.html'])
+
+
+class EngineTests(unittest.TestCase):
+
+    document = '''
+- header:
+    label: Title
+- container:
+    - text:
+        label: Name
+    - select:
+        options: [One, Two]
+'''
+
+    def setUp(self):
+        self._folder = tempfile.TemporaryDirectory()
+        self.folder = self._folder.name
+        self.engine = Engine(warm=False)
+
+    def tearDown(self):
+        self._folder.cleanup()
+
+    def generate(self, document):
+        with io.StringIO() as out:
+            MockGenerator(yaml.load(document, Loader=loader.Loader), out).generate()
+            return out.getvalue()
+
+    def test_sources(self):
+        import pathlib
+
+        path = pathlib.Path(self.folder, 'page.mock.yaml')
+        path.write_text(self.document)
+
+        expected = self.generate(self.document)
+
+        self.assertEqual(self.engine.render(self.document), expected)
+        self.assertEqual(self.engine.render(self.document.encode()), expected)
+        self.assertEqual(self.engine.render(path), expected)
+        self.assertEqual(self.engine.render(yaml.safe_load(self.document)), expected)
+
+    def test_render_to_with_sinks(self):
+        outline = OutlineSink()
+
+        with io.StringIO() as out:
+            self.engine.render_to(self.document, out, [outline])
+            self.assertEqual(out.getvalue(), self.generate(self.document))
+
+        self.assertListEqual([entry['kind'] for entry in outline.outline], ['header', 'container', 'text', 'select'])
+
+    def test_changed_include_is_loaded_again(self):
+        import pathlib
+
+        page = pathlib.Path(self.folder, 'page.mock.yaml')
+        page.write_text('- container: !include fragment.yaml\n')
+        fragment = pathlib.Path(self.folder, 'fragment.yaml')
+
+        fragment.write_text('- span:\n    label: Before\n')
+        self.assertIn('Before', self.engine.render(page))
+        self.assertIs(self.engine.load(page), self.engine.load(page))
+
+        fragment.write_text('- span:\n    label: Changed\n')
+        self.assertIn('Changed', self.engine.render(page))
+
+    def test_threads(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        documents = [self.document.replace('Title', f'Title {i}') for i in range(20)] * 10
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            rendered = list(executor.map(self.engine.render, documents))
+
+        self.assertListEqual(rendered, [self.generate(document) for document in documents])
+
+
+class TemplateTests(unittest.TestCase):
+
+    template = '''
+- header:
+    label: Orders of ${customer.name}
+- for_each: ${orders}
+  as: order
+  index: i
+  do:
+    - text:
+        label: Order ${i}
+        placeholder: ${order.product}
+- select:
+    options: ${statuses}
+- table:
+    columns:
+        Product: ${columns.products}
+        ${columns.amount_title}: ${columns.amounts}
+- span:
+    label: Constant
+'''
+
+    data = {
+        'customer': {'name': 'Ana & Co'},
+        'orders': [{'product': 'Chair'}, {'product': 'Table'}],
+        'statuses': ['Open', 'Closed'],
+        'columns': {'products': ['Chair', 'Table'], 'amount_title': 'Amount', 'amounts': [1, 2]},
+    }
+
+    def generate(self, document):
+        with io.StringIO() as out:
+            MockGenerator(document, out).generate()
+            return out.getvalue()
+
+    def test_expand(self):
+        document = template.Template(yaml.safe_load(self.template)).expand(self.data)
+
+        self.assertListEqual(document, [
+            {'header': {'label': 'Orders of Ana & Co'}},
+            {'text': {'label': 'Order 0', 'placeholder': 'Chair'}},
+            {'text': {'label': 'Order 1', 'placeholder': 'Table'}},
+            {'select': {'options': ['Open', 'Closed']}},
+            {'table': {'columns': {'Product': ['Chair', 'Table'], 'Amount': [1, 2]}}},
+            {'span': {'label': 'Constant'}},
+        ])
+
+    def test_render_matches_expanded_mock(self):
+        compiled = template.Template(yaml.safe_load(self.template))
+
+        for orders in ([], [{'product': 'Chair'}], [{'product': 'Chair'}, {'product': 'Table'}]):
+            data = dict(self.data, orders=orders)
+
+            self.assertEqual(compiled.render(data), self.generate(compiled.expand(data)))
+
+    def test_errors(self):
+        compiled = template.Template(yaml.safe_load(self.template))
+
+        self.assertRaises(template.TemplateError, compiled.render, {'customer': {}})
+        self.assertRaises(template.TemplateError, compiled.render, dict(self.data, orders={'product': 'Chair'}))
+        self.assertRaises(template.TemplateError, template.Template, [{'for_each': '${orders}', 'each': []}])
+
+    def test_command_line(self):
+        with tempfile.TemporaryDirectory() as folder:
+            with open(os.path.join(folder, 'page.mock.yaml'), 'w') as f:
+                f.write('- header:\n    label: ${name}\n')
+            with open(os.path.join(folder, 'records.yaml'), 'w') as f:
+                f.write('- {id: a, name: First}\n- {id: b, name: Second}\n')
+
+            self.assertEqual(template.main([os.path.join(folder, 'page.mock.yaml'), '--data', os.path.join(folder, 'records.yaml'), '--output', os.path.join(folder, 'out'), '--name', '{record[id]}.html']), 0)
+
+            with open(os.path.join(folder, 'out', 'b.html'), 'r') as f:
+                self.assertIn('Second', f.read())
+
+
+class CatalogTests(unittest.TestCase):
+
+    def setUp(self):
+        self._folder = tempfile.TemporaryDirectory()
+        self.folder = self._folder.name
+
+        with open(os.path.join(self.folder, 'countries.txt'), 'w') as f:
+            f.write(''.join(f'Country {i}\n' for i in range(1000)) + 'Trinidad & Tobago\n')
+
+    def tearDown(self):
+        self._folder.cleanup()
+
+    def generate(self, document):
+        path = os.path.join(self.folder, 'page.mock.yaml')
+
+        with open(path, 'w') as f:
+            f.write(document)
+
+        with open(path, 'r') as f, io.StringIO() as out:
+            MockGenerator(yaml.load(f, Loader=loader.Loader), out).generate()
+            return out.getvalue()
+
+    def selects(self, count):
+        return ''.join(f'- select:\n    label: Country {i}\n    options: !include countries.txt\n' for i in range(count))
+
+    def test_catalog_written_once(self):
+        html = self.generate(self.selects(3) + '- multipleselect:\n    options: !include countries.txt\n    columns:\n        Name: [a]\n')
+
+        self.assertEqual(html.count('<datalist id="catalog-1">'), 1)
+        self.assertEqual(html.count('<datalist'), 1)
+        self.assertEqual(html.count('<script>'), 1)
+        self.assertEqual(html.count('<select data-catalog="catalog-1">'), 3)
+        self.assertIn('list="catalog-1"', html)
+        self.assertIn('<option>Trinidad &amp; Tobago</option>', html)
+        self.assertEqual(html.count('<option>'), 1001)
+
+    def test_size_does_not_grow_with_options(self):
+        growth = len(self.generate(self.selects(30))) - len(self.generate(self.selects(3)))
+
+        self.assertLess(growth, 27 * 200)
+
+    def test_catalogs_in_table_cells(self):
+        html = self.generate('- table:\n    columns:\n        Country:\n' + '            - select:\n                options: !include countries.txt\n' * 3)
+
+        self.assertEqual(html.count('<datalist'), 1)
+        self.assertEqual(html.count('data-catalog="catalog-1"'), 3)
+
+    def test_inline_options(self):
+        html = self.generate('- select:\n    options: [One, Two]\n')
+
+        self.assertNotIn('<datalist', html)
+        self.assertIn('  <option>One</option>\n  <option>Two</option>\n', html)
+
+    def test_included_once_while_unchanged(self):
+        path = os.path.join(self.folder, 'page.mock.yaml')
+
+        with open(path, 'w') as f:
+            f.write(self.selects(1))
+
+        def options():
+            with open(path, 'r') as f:
+                return yaml.load(f, Loader=loader.Loader)[0]['select']['options']
+
+        self.assertIs(options(), options())
+
+        with open(os.path.join(self.folder, 'countries.txt'), 'a') as f:
+            f.write('Another\n')
+
+        self.assertTrue(options().endswith('Another\n'))
+
+
+class GlobIncludeTests(unittest.TestCase):
+
+    def setUp(self):
+        self._folder = tempfile.TemporaryDirectory()
+        self.folder = self._folder.name
+
+        os.makedirs(os.path.join(self.folder, 'fields', 'texts'))
+
+        for name in ('b', 'a', 'c'):
+            with open(os.path.join(self.folder, 'fields', f'{name}.yaml'), 'w') as f:
+                f.write(f'text:\n    label: !include texts/{name}.txt\n')
+
+            with open(os.path.join(self.folder, 'fields', 'texts', f'{name}.txt'), 'w') as f:
+                f.write(f'Label {name}')
+
+        with open(os.path.join(self.folder, 'page.mock.yaml'), 'w') as f:
+            f.write('- container: !include fields/*.yaml\n- span:\n    label: !include fields/texts/*.txt\n')
+
+    def tearDown(self):
+        self._folder.cleanup()
+
+    def load(self):
+        with open(os.path.join(self.folder, 'page.mock.yaml'), 'r') as f:
+            return yaml.load(f, Loader=loader.Loader)
+
+    def test_glob_include(self):
+        self.assertListEqual(self.load(), [
+            {'container': [{'text': {'label': f'Label {name}'}} for name in 'abc']},
+            {'span': {'label': ['Label a', 'Label b', 'Label c']}},
+        ])
+
+    def test_prefetch_reads_every_file_ahead(self):
+        with open(os.path.join(self.folder, 'page.mock.yaml'), 'r') as f:
+            yaml_loader = loader.Loader(f)
+
+            try:
+                document = yaml_loader.get_single_data()
+                prefetched = sorted(os.path.relpath(path, self.folder) for path in yaml_loader._prefetched)
+            finally:
+                yaml_loader.dispose()
+
+        self.assertEqual(document, self.load())
+        self.assertListEqual(prefetched, sorted([f'fields/{name}.yaml' for name in 'abc'] + [f'fields/texts/{name}.txt' for name in 'abc']))
+
+    def test_without_prefetch(self):
+        class SerialLoader(loader.Loader):
+            prefetch = False
+
+        with open(os.path.join(self.folder, 'page.mock.yaml'), 'r') as f:
+            self.assertEqual(yaml.load(f, Loader=SerialLoader), self.load())
+
+    def test_dependencies(self):
+        from . deps import scan_includes
+
+        self.assertListEqual(scan_includes(os.path.join(self.folder, 'page.mock.yaml')), [os.path.join(self.folder, 'fields', f'{name}.yaml') for name in 'abc'] + [os.path.join(self.folder, 'fields', 'texts', f'{name}.txt') for name in 'abc'])
+
+    def test_folder_with_pattern_characters(self):
+        # Only the include values are patterns, not the folder of the mock
+        folder = os.path.join(self.folder, 'dir[1]')
+        shutil.copytree(os.path.join(self.folder, 'fields'), os.path.join(folder, 'fields'))
+
+        with open(os.path.join(folder, 'frag.yaml'), 'w') as f:
+            f.write('- text: {label: !include fields/texts/a.txt}\n')
+
+        with open(os.path.join(folder, 'page.mock.yaml'), 'w') as f:
+            f.write('- container: !include frag.yaml\n- container: !include fields/*.yaml\n- span: {label: !include fields/texts/b.txt}\n')
+
+        with open(os.path.join(folder, 'page.mock.yaml'), 'r') as f:
+            self.assertListEqual(yaml.load(f, Loader=loader.Loader), [
+                {'container': [{'text': {'label': 'Label a'}}]},
+                {'container': [{'text': {'label': f'Label {name}'}} for name in 'abc']},
+                {'span': {'label': 'Label b'}},
+            ])
+
+
+class LimitsTests(unittest.TestCase):
+
+    def setUp(self):
+        self._folder = tempfile.TemporaryDirectory()
+        self.folder = self._folder.name
+
+    def tearDown(self):
+        self._folder.cleanup()
+
+    def write(self, name, content):
+        with open(os.path.join(self.folder, name), 'w') as f:
+            f.write(content)
+
+    def load(self, name, limits):
+        with open(os.path.join(self.folder, name), 'r') as f:
+            return yaml.load(f, Loader=loader.Loader.limited(limits))
+
+    @staticmethod
+    def spans(count):
+        return [{'span': {'label': f'Label {i}'}} for i in range(count)]
+
+    def assertExceeds(self, limit, render):
+        with self.assertRaises(LimitExceeded) as context:
+            render()
+
+        self.assertEqual(context.exception.limit, limit)
+
+    def test_alias_bomb(self):
+        # 9 ** 12 spans from a dozen lines
+        lines = ['l0: &l0 [{span: {label: x}}]']
+        for i in range(1, 13):
+            lines.append(f'l{i}: &l{i} [' + ', '.join([f'{{container: *l{i - 1}}}'] * 9) + ']')
+
+        document = yaml.load('\n'.join(lines) + '\nfields: *l12\n', Loader=loader.Loader)['fields']
+
+        self.assertExceeds('nodes', lambda: Engine(limits=Limits(nodes=1000)).render(document))
+
+    def test_alias_bomb_written_as_text(self):
+        # Lists in table cells and options are written as text, which would expand 9 ** 12 items
+        lines = ['l0: &l0 [xxxxxxxx]']
+        for i in range(1, 13):
+            lines.append(f'l{i}: &l{i} [' + ', '.join([f'*l{i - 1}'] * 9) + ']')
+
+        bomb = yaml.load('\n'.join(lines), Loader=loader.Loader)['l12']
+        documents = [
+            [{'table': {'columns': {'A': [bomb]}}}],
+            [{'select': {'options': [bomb]}}],
+            [{'multipleselect': {'options': [bomb], 'columns': {'A': [1]}}}],
+        ]
+
+        for document in documents:
+            with self.subTest(document=next(iter(document[0]))):
+                start = time.monotonic()
+                self.assertExceeds('nodes', lambda: Engine(limits=Limits.untrusted()).render(document))
+                self.assertExceeds('nodes', lambda: clientside.encode(document, limits=Limits.untrusted()))
+                self.assertLess(time.monotonic() - start, 5)
+
+        self.assertExceeds('output_bytes', lambda: Engine(limits=Limits(output_bytes=1000)).render(documents[0]))
+
+    def test_within_limits(self):
+        document = corpus.CorpusGenerator(tables=0.3).document()
+
+        self.assertEqual(Engine(limits=Limits.untrusted()).render(document), Engine().render(document))
+
+    def test_nodes_loaded(self):
+        self.write('page.mock.yaml', '- span:\n    label: x\n' * 100)
+
+        self.assertEqual(len(self.load('page.mock.yaml', Limits(nodes=1000))), 100)
+        self.assertExceeds('nodes', lambda: self.load('page.mock.yaml', Limits(nodes=100)))
+
+    def test_include_depth(self):
+        for i in range(5):
+            self.write(f'{i}.yaml', f'container:\n    - !include {i + 1}.yaml\n')
+        self.write('5.yaml', 'span:\n    label: x\n')
+
+        self.load('0.yaml', Limits(include_depth=5))
+        self.assertExceeds('include_depth', lambda: self.load('0.yaml', Limits(include_depth=4)))
+
+    def test_include_bytes(self):
+        self.write('big.txt', 'x' * 1000)
+        self.write('page.mock.yaml', '- span:\n    label: !include big.txt\n- span:\n    label: !include big.txt\n')
+
+        self.load('page.mock.yaml', Limits(include_bytes=2000))
+        self.assertExceeds('include_bytes', lambda: self.load('page.mock.yaml', Limits(include_bytes=1500)))
+        # A file larger than the limit isn't read at all
+        self.assertExceeds('include_bytes', lambda: self.load('page.mock.yaml', Limits(include_bytes=999)))
+
+    def test_yaml_files_of_globs(self):
+        # YAML files matched by a pattern without an extension are limited like any other YAML include
+        os.makedirs(os.path.join(self.folder, 'parts'))
+        self.write(os.path.join('parts', 'big.yaml'), 'span: {label: ' + 'x' * 1000 + '}\n')
+        self.write(os.path.join('parts', 'deep.yaml'), 'container: [!include ../leaf.yaml]\n')
+        self.write('leaf.yaml', 'span: {label: x}\n')
+        self.write('page.mock.yaml', '- container: !include parts/*\n')
+
+        self.assertEqual(len(self.load('page.mock.yaml', Limits())[0]['container']), 2)
+        self.assertExceeds('include_bytes', lambda: self.load('page.mock.yaml', Limits(include_bytes=1000)))
+        self.assertExceeds('include_depth', lambda: self.load('page.mock.yaml', Limits(include_depth=1)))
+
+    def test_prefetch_within_include_bytes(self):
+        os.makedirs(os.path.join(self.folder, 'parts'))
+
+        for i in range(10):
+            self.write(os.path.join('parts', f'{i}.txt'), 'x' * 1000)
+
+        self.write('page.mock.yaml', '- span: {label: !include parts/*.txt}\n')
+
+        with open(os.path.join(self.folder, 'page.mock.yaml'), 'r') as f:
+            yaml_loader = loader.Loader.limited(Limits(include_bytes=2500))(f)
+
+            try:
+                self.assertExceeds('include_bytes', yaml_loader.get_single_data)
+                self.assertEqual(len(yaml_loader._prefetched), 2)
+            finally:
+                yaml_loader.dispose()
+
+    def test_glob_including_itself(self):
+        self.write('page.mock.yaml', '- container: !include ./*\n')
+
+        with self.assertRaisesRegex(yaml.composer.ComposerError, 'recursive include'):
+            self.load('page.mock.yaml', Limits())
+
+    def test_table_cells(self):
+        document = [{'table': {'columns': {'A': list(range(100)), 'B': list(range(100))}}}]
+
+        Engine(limits=Limits(table_cells=200)).render(document)
+        self.assertExceeds('table_cells', lambda: Engine(limits=Limits(table_cells=199)).render(document))
+
+    def test_output_bytes(self):
+        document = self.spans(50)
+        size = len(Engine().render(document))
+
+        self.assertEqual(len(Engine(limits=Limits(output_bytes=size)).render(document)), size)
+        self.assertExceeds('output_bytes', lambda: Engine(limits=Limits(output_bytes=size - 1)).render(document))
+
+    def test_seconds(self):
+        self.assertExceeds('seconds', lambda: Engine(limits=Limits(seconds=-1)).render(self.spans(1)))
+
+    def test_not_collected_as_field_error(self):
+        errors = []
+
+        self.assertExceeds('nodes', lambda: MockGenerator(self.spans(10), io.StringIO(), errors=errors, limits=Limits(nodes=5)).generate())
+        self.assertListEqual(errors, [])
+
+    def test_build_reports_pages_over_limits(self):
+        self.write('small.mock.yaml', '- span:\n    label: x\n')
+        self.write('large.mock.yaml', '- span:\n    label: x\n' * 100)
+
+        failures = build.build(find_mocks([self.folder]), os.path.join(self.folder, 'out'), self.folder, jobs=1, limits=Limits(nodes=100))
+
+        self.assertListEqual([os.path.basename(source) for source, error in failures], ['large.mock.yaml'])
+        self.assertIn('nodes over the limit of 100', failures[0][1])
+
+
+@unittest.skipUnless(hasattr(os, 'fork'), 'The render server forks its workers')
+class ServerTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls._folder = tempfile.TemporaryDirectory()
+        cls.folder = cls._folder.name
+        cls.socket = os.path.join(cls.folder, 'mockdown.sock')
+
+        package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        cls.server = subprocess.Popen([sys.executable, '-m', 'mockdown.mockdown', 'server', '--socket', cls.socket, '--workers', '2'], env=dict(os.environ, PYTHONPATH=package_root))
+
+        for i in range(100):
+            if os.path.exists(cls.socket):
+                break
+
+            time.sleep(0.05)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.terminate()
+        cls.server.wait()
+        cls._folder.cleanup()
+
+    def forward(self, *argv, stdin=''):
+        out, err = io.StringIO(), io.StringIO()
+        code = client.forward(list(argv), self.socket, io.StringIO(stdin), out, err)
+
+        return code, out.getvalue(), err.getvalue()
+
+    def test_renders_files(self):
+        source = os.path.join(self.folder, 'page.mock.yaml')
+        with open(source, 'w') as f:
+            f.write('- header:\n    label: Title\n')
+
+        self.assertEqual(self.forward(source, os.path.join(self.folder, 'page.html')), (0, '', ''))
+
+        with open(os.path.join(self.folder, 'page.html'), 'r') as f:
+            self.assertEqual(f.read(), Engine().render([{'header': {'label': 'Title'}}]))
+
+    def test_renders_stdin(self):
+        self.assertEqual(self.forward(stdin='- header:\n    label: Title\n'), (0, Engine().render([{'header': {'label': 'Title'}}]), ''))
+
+    def test_exit_code_and_stderr(self):
+        code, out, err = self.forward('--max-nodes', '1', stdin='- header:\n    label: Title\n')
+
+        self.assertEqual(code, 1)
+        self.assertIn('nodes over the limit of 1', err)
+
+    def test_without_server(self):
+        self.assertIsNone(client.forward(['page.mock.yaml'], os.path.join(self.folder, 'none.sock')))
+        self.assertIsNone(client.forward(['page.mock.yaml'], ''))
+
+    def test_server_of_another_user(self):
+        err = io.StringIO()
+
+        with unittest.mock.patch('os.getuid', return_value=os.getuid() + 1):
+            self.assertIsNone(client.forward(['--help'], self.socket, io.StringIO(), io.StringIO(), err))
+
+        self.assertIn('runs as another user', err.getvalue())
+
+    def test_missing_working_directory(self):
+        missing = os.path.join(self.folder, 'missing')
+
+        with unittest.mock.patch('os.getcwd', return_value=missing):
+            code, out, err = self.forward('page.mock.yaml')
+
+        self.assertEqual(code, 1)
+        self.assertIn(f"can't run in {missing}", err)
+        self.assertEqual(self.forward(stdin='- header:\n    label: Title\n')[0], 0)
+
+    def test_socket_is_never_usable_by_others(self):
+        path = os.path.join(self.folder, 'private.sock')
+
+        # Created private by bind already, not only by the chmod after it
+        with unittest.mock.patch('os.chmod'):
+            listener = server.listen(path)
+
+        try:
+            self.assertEqual(os.stat(path).st_mode & 0o777, 0o600)
+        finally:
+            listener.close()
+            os.unlink(path)
+
+
+
+class FragmentTests(unittest.TestCase):
+
+    def setUp(self):
+        self._folder = tempfile.TemporaryDirectory()
+        self.folder = self._folder.name
+        self.store = FragmentStore(os.path.join(self.folder, 'store'))
+
+    def tearDown(self):
+        self._folder.cleanup()
+
+    def render(self, document, fragments=None):
+        with io.StringIO() as out:
+            MockGenerator(document, out, fragments=fragments).generate()
+            return out.getvalue()
+
+    def test_pages_match_rendering_without_store(self):
+        generator = corpus.CorpusGenerator(tables=0.5, rows=20)
+        documents = [generator.document() for i in range(5)]
+        toolbar = {'container': [{'button': {'text': f'Action {i}'}} for i in range(20)]}
+
+        for document in documents:
+            document.insert(0, toolbar)
+
+        for i in range(2):
+            self.assertListEqual([self.render(document, self.store) for document in documents], [self.render(document) for document in documents])
+
+        stats = self.store.take_stats()
+        self.assertGreater(stats.hits, stats.misses)
+        self.assertGreater(stats.saved, 0)
+
+        # A new store on the same folder, like the next build, only reads
+        store = FragmentStore(self.store.path)
+        [self.render(document, store) for document in documents]
+        self.assertEqual(store.stats.misses, 0)
+
+    def test_last_field_is_stored_apart(self):
+        field = {'container': [{'text': {'label': f'Name {i}'}} for i in range(10)]}
+
+        self.assertNotEqual(FragmentStore.key(field, True), FragmentStore.key(field, False))
+        self.assertEqual(self.render([field, field], self.store), self.render([field, field]))
+
+    def test_catalogs_and_plugins_are_not_stored(self):
+        countries = '\n'.join(f'Country {i}' for i in range(100))
+        document = [
+            {'select': {'label': 'Country', 'options': countries}},
+            {'flowchart': {'nodes': [{'start': 'Begin'}, {'action': 'Step'}, {'end': 'Finish'}]}},
+        ]
+
+        for i in range(2):
+            self.assertEqual(self.render(document, self.store), self.render(document))
+
+        self.assertEqual((self.store.stats.hits, self.store.stats.misses), (0, 0))
+        self.assertFalse(os.path.exists(self.store.path))
+
+    def test_least_recently_used_are_evicted(self):
+        keys = [FragmentStore.key({'span': {'label': str(i)}}, False) for i in range(3)]
+
+        for i, key in enumerate(keys):
+            self.store.put(key, 'x' * 1000)
+            os.utime(self.store._file(key), ns=(i * 10 ** 9, i * 10 ** 9))
+
+        self.store.get(keys[0])
+        self.store.max_bytes = 2000
+
+        self.assertEqual(self.store.evict(), 1)
+        self.assertListEqual([self.store.get(key) is not None for key in keys], [True, False, True])
+
+    def test_build_reports_stats(self):
+        os.makedirs(os.path.join(self.folder, 'src'))
+
+        for i in range(3):
+            with open(os.path.join(self.folder, 'src', f'{i}.mock.yaml'), 'w') as f:
+                yaml.dump([{'container': [{'text': {'label': f'Field {j}'}} for j in range(20)]}, {'span': {'label': f'Page {i}'}}], f)
+
+        sources = find_mocks([os.path.join(self.folder, 'src')])
+        build.build(sources, os.path.join(self.folder, 'out'), os.path.join(self.folder, 'src'), jobs=2, fragments=self.store)
+
+        # Workers may render the container at the same time, before either stored it
+        self.assertEqual(self.store.stats.hits + self.store.stats.misses, 3)
+        self.assertGreaterEqual(self.store.stats.misses, 1)
+
+
+class SearchTests(unittest.TestCase):
+
+    document = [
+        {'header': {'label': 'Customer'}},
+        {'text': {'label': 'Name'}},
+        {'container': [{'button': {'text': 'Save'}}, {'button': {'text': 'Save'}}]},
+        {'table': {'columns': {'Product': ['Pen', 'Ink'], 'Done': [{'check': {'label': 'Done'}}, {'check': {'label': 'Done'}}]}}},
+    ]
+
+    def setUp(self):
+        self._folder = tempfile.TemporaryDirectory()
+        self.folder = self._folder.name
+
+    def tearDown(self):
+        self._folder.cleanup()
+
+    def test_sink_collects_each_text_once(self):
+        sink = SearchSink()
+
+        with io.StringIO() as out:
+            MockGenerator(self.document, out, sinks=[sink]).generate()
+            html = out.getvalue()
+
+        self.assertEqual(html, Engine().render(self.document))
+        self.assertListEqual(sink.entries, [('header', 'Customer'), ('text', 'Name'), ('button', 'Save'), ('column', 'Product'), ('column', 'Done'), ('check', 'Done')])
+
+    def test_index(self):
+        index = SearchIndex()
+        index.add('a.html', [('header', 'Customer orders'), ('button', 'Save')])
+        index.add('b.html', [('button', 'Save')])
+
+        content = json.loads(index.to_json())
+
+        self.assertListEqual(content['texts'], ['Save', 'Customer orders'])
+        self.assertListEqual(content['postings'], [[0, 0, 1, 0], [0, 1]])
+        self.assertDictEqual(content['index'], {'customer': [1], 'orders': [1], 'save': [0]})
+        self.assertDictEqual(SearchIndex.from_json(index.to_json()).entries(), index.entries())
+
+    def test_build_and_merge(self):
+        os.makedirs(os.path.join(self.folder, 'src', 'sub'))
+
+        for i, name in enumerate(['a', 'b', 'sub/c', 'sub/d']):
+            with open(os.path.join(self.folder, 'src', f'{name}.mock.yaml'), 'w') as f:
+                yaml.dump(self.document + [{'span': {'label': f'Page {i}'}}], f)
+
+        sources = list(find_mocks([os.path.join(self.folder, 'src')]))
+        root = os.path.join(self.folder, 'src')
+
+        build.build(sources, os.path.join(self.folder, 'full'), root, jobs=2, search=True)
+
+        for shard in (1, 2):
+            build.build(sources, os.path.join(self.folder, f'shard-{shard}'), root, jobs=1, shard=(shard, 2), search=True)
+
+        build.merge([os.path.join(self.folder, f'shard-{shard}') for shard in (1, 2)], os.path.join(self.folder, 'merged'))
+
+        with open(os.path.join(self.folder, 'full', 'search.json'), 'rb') as f:
+            full = f.read()
+
+        with open(os.path.join(self.folder, 'merged', 'search.json'), 'rb') as f:
+            self.assertEqual(f.read(), full)
+
+        entries = SearchIndex.from_json(full).entries()
+        self.assertListEqual(sorted(entries), ['a.html', 'b.html', 'sub/c.html', 'sub/d.html'])
+        self.assertIn(('span', 'Page 2'), entries['sub/c.html'])
+        self.assertTrue(os.path.exists(os.path.join(self.folder, 'merged', 'search.html')))
+
+
+class DiffTests(unittest.TestCase):
+
+    old = [
+        {'header': {'label': 'Customers'}},
+        {'text': {'label': 'Name'}},
+        {'container': [{'text': {'label': 'Email'}}, {'button': {'text': 'Save'}}]},
+        {'table': {'columns': {'Name': ['Ann', 'Bob'], 'Edit': [{'button': {'text': 'Edit'}}, {'button': {'text': 'Edit'}}]}}},
+        {'check': {'label': 'Active'}},
+    ]
+
+    new = [
+        {'header': {'label': 'Customers'}},
+        {'text': {'label': 'Full name'}},
+        {'container': [{'text': {'label': 'Email'}}, {'text': {'label': 'Phone'}}, {'button': {'text': 'Save'}}]},
+        {'table': {'columns': {'Name': ['Ann', 'Bob'], 'Edit': [{'button': {'text': 'Edit'}}, {'button': {'text': 'Change'}}]}}},
+    ]
+
+    def test_changes(self):
+        self.assertListEqual([str(change) for change in diff.diff(self.old, self.new)], [
+            '~ /1 text "Full name": label "Name" -> "Full name"',
+            '+ /2/1 text "Phone"',
+            '~ /3/Edit[1] button "Change": text "Edit" -> "Change"',
+            '- /4 check "Active"',
+        ])
+
+    def test_normalized_params(self):
+        old = [{'text': {'label': 'Name', 'required': True}}, {'button': ['Save', {'_kwargs': {'color': 'red'}}]}]
+        new = [{'text': {'required': True, 'label': 'Name', '_comments': 'Full name?'}}, {'button': {'_args': ['Save'], 'color': 'red'}}]
+
+        self.assertEqual(diff.tree(old).digest, diff.tree(new).digest)
+        self.assertListEqual(diff.diff(old, new), [])
+
+    def test_inserted_field_is_one_change(self):
+        old = [{'text': {'label': f'Field {i}'}} for i in range(1000)]
+        new = old[:500] + [{'check': {'label': 'New'}}] + old[500:]
+
+        self.assertListEqual([str(change) for change in diff.diff(old, new)], ['+ /500 check "New"'])
+
+    def test_aliases_are_hashed_once(self):
+        loaded = yaml.load('''
+- container: &form
+  - text: {label: Name}
+  - check: {label: Active}
+- container: *form
+''', Loader=loader.Loader)
+
+        root = diff.tree(loaded)
+
+        self.assertIs(root.children[0][1].children[1][1], root.children[1][1].children[1][1])
+        self.assertListEqual(diff.diff(loaded, yaml.safe_load(yaml.safe_dump(loaded))), [])
+
+    def test_html(self):
+        changes = diff.diff(self.old, self.new)
+
+        with io.StringIO() as out:
+            diff.DiffGenerator(self.new, out, changes).generate()
+            html = out.getvalue()
+
+        self.assertEqual(html.count('class="mockdown-changed"'), 2)
+        self.assertEqual(html.count('class="mockdown-added"'), 1)
+        self.assertIn('<li>/4 check &quot;Active&quot;</li>', html)
+
+    def test_command(self):
+        with tempfile.TemporaryDirectory() as folder:
+            paths = []
+
+            for name, document in (('old', self.old), ('new', self.new)):
+                paths.append(os.path.join(folder, f'{name}.mock.yaml'))
+
+                with open(paths[-1], 'w') as f:
+                    yaml.dump(document, f)
+
+            with io.StringIO() as out:
+                saved, sys.stdout = sys.stdout, out
+
+                try:
+                    self.assertEqual(diff.main([paths[0], paths[0]]), 0)
+                    self.assertEqual(diff.main([*paths, '--html', os.path.join(folder, 'diff.html')]), 1)
+                finally:
+                    sys.stdout = saved
+
+                self.assertEqual(len(out.getvalue().splitlines()), 4)
+
+            self.assertTrue(os.path.exists(os.path.join(folder, 'diff.html')))
+
+
+@unittest.skipUnless(shutil.which('node'), 'Needs node to run mockdown.js')
+class ClientSideTests(unittest.TestCase):
+
+    document = '''
+- select: {label: A, options: "x\\n y <b>\\n"}
+- select: {label: B, options: "x\\n y <b>\\n", enabled: false}
+- select: {label: C, options: [1, 2.5, null, true, "a&b"], required: false}
+- multipleselect: {label: M, options: &options [p, q], columns: {"1": [a, b], Done: [{check: {label: x}}, {check: null}]}, editable: true}
+- multipleselect: {label: N, options: *options, enabled: false, columns: {X: [1]}}
+- container:
+  - _kwargs: {align: right, direction: vertical, title: "T<"}
+  - text: {label: L, enabled: false, placeholder: "p\\"q"}
+  - radio: {checked: true}
+  - unknown: {a: 1}
+  - br:
+  - span: {label: S, styles: overstrike}
+- container: [{_kwargs: {enabled: false}}, {check: {enabled: false, checked: true, label: c}}]
+- header: {level: 3}
+- link: {}
+- unknown: 1
+- flowchart: {nodes: [{start: Begin}, {action: Do}, {end: Finish}]}
+- finder: {label: F, required: false}
+- textarea: {placeholder: "", label: T, enabled: false}
+- table: {enabled: false, columns: {A: [{button: {text: X, color: red}}, {container: [{text: null}, {button: [{_kwargs: {text: Y}}]}]}], B: [{nothing: 1}, null]}}
+- button: {text: Last}
+'''
+
+    def setUp(self):
+        self._folder = tempfile.TemporaryDirectory()
+        self.folder = self._folder.name
+        self.script = os.path.join(self.folder, 'render.js')
+
+        with open(os.path.join(self.folder, clientside.renderer_name), 'w') as f:
+            f.write(clientside.renderer)
+
+        with open(self.script, 'w') as f:
+            f.write('''
+var mockdown = require('./mockdown.js');
+var chunks = [];
+process.stdin.on('data', function (chunk) { chunks.push(chunk); });
+process.stdin.on('end', function () { process.stdout.write(mockdown.render(JSON.parse(Buffer.concat(chunks).toString('utf8')))); });
+''')
+
+    def tearDown(self):
+        self._folder.cleanup()
+
+    def assertRendersTheSame(self, document):
+        with io.StringIO() as out:
+            MockGenerator(document, out).generate()
+            html = out.getvalue()
+
+        rendered = subprocess.run(['node', self.script], input=clientside.encode(document).encode(), capture_output=True, check=True)
+
+        self.assertEqual(rendered.stdout.decode(), html)
+
+    def test_components(self):
+        self.assertRendersTheSame(yaml.load(self.document, Loader=loader.Loader))
+
+    def test_corpus(self):
+        for shape in corpus.shapes:
+            folder = os.path.join(self.folder, shape)
+            os.makedirs(folder)
+
+            for path in corpus.write_corpus(folder, 2, 1, shape, **(dict(rows=100) if shape == 'table' else {})):
+                with open(path, 'r') as f:
+                    document = yaml.load(f, Loader=loader.Loader)
+
+                with self.subTest(shape=shape, path=path):
+                    self.assertRendersTheSame(document)
+
+    def test_params_match_the_checkers(self):
+        class RecordingChecker(ArgsChecker):
+            '''
+            Records the checks of each param as clientside.params declares them, (param, default, types, allowed)
+            '''
+
+            samples = {str: 'x', dict: {'A': ['x']}, list: ['x']}
+
+            def reset(self, context, args, kwargs):
+                self.context = context
+
+                return self
+
+            def param(self, param):
+                self.params.append([param, None, None, None])
+
+                return self
+
+            def default(self, value):
+                self.params[-1][1] = value
+
+                return self
+
+            def isNotNone(self):
+                self.params[-1][1] = clientside.required
+
+                return self
+
+            def istype(self, *ptypes):
+                self.params[-1][2] = ptypes
+
+                return self
+
+            def isin(self, *values):
+                self.params[-1][3] = values
+
+                return self
+
+            def is_(self, checker):
+                return self
+
+            def allArgs(self):
+                # Positional args aren't params, checked by a checker without any
+                return ArgsChecker().reset(self.context, (), {}).allArgs()
+
+            def get(self):
+                param, default, types, allowed = self.params[-1]
+
+                return RecordingChecker.samples[types[0]] if default is clientside.required else default
+
+        generator = MockGenerator([], io.StringIO())
+        generator._checker = checker = RecordingChecker()
+
+        self.assertListEqual(list(clientside.params), list(generator._field_kinds))
+
+        for kind, generate in generator._field_kinds.items():
+            checker.context, checker.params = kind, []
+            generate()
+
+            with self.subTest(kind=kind):
+                self.assertEqual(clientside.params[kind], (checker.context, [tuple(param) for param in checker.params]))
+
+    def test_same_errors(self):
+        for document in ([{'button': {'color': 'pink', 'text': 'x'}}], [{'text': {'label': None}}], [{'button': {}}], [{'select': {'options': 3}}]):
+            with self.assertRaises(AssertionError) as rendered:
+                MockGenerator(document, io.StringIO()).generate()
+
+            with self.assertRaises(AssertionError) as encoded:
+                clientside.encode(document)
+
+            self.assertEqual(str(encoded.exception), str(rendered.exception))
+
+    def test_shared_cells(self):
+        document = [{'table': {'columns': {'Name': [f'Name {i}' for i in range(100)], 'Done': [{'check': None}] * 100}}}]
+        encoded = json.loads(clientside.encode(document))
+
+        self.assertEqual(len(encoded['shared']), 1)
+        self.assertRendersTheSame(document)
+
+    def test_shared_cells_with_definitions(self):
+        chart = {'flowchart': {'nodes': [{'start': 'Begin'}, {'end': 'Finish'}]}}
+        document = [{'table': {'columns': {'Flow': [chart] * 5, 'Pick': [{'select': {'options': 'a\nb\n'}}] * 5}}}]
+
+        self.assertEqual(clientside.encode(document).count('flowchart-arrow\\"'), 1)
+        self.assertRendersTheSame(document)
+
+    def test_build(self):
+        source = os.path.join(self.folder, 'src', 'sub', 'page.mock.yaml')
+        os.makedirs(os.path.dirname(source))
+
+        with open(source, 'w') as f:
+            f.write('- text: {label: "</script>"}\n')
+
+        output = os.path.join(self.folder, 'out')
+        build.build([source], output, os.path.join(self.folder, 'src'), jobs=1, client=True)
+
+        with open(os.path.join(output, 'sub', 'page.html'), 'r') as f:
+            page = f.read()
+
+        self.assertIn('<script src="../mockdown.js"></script>', page)
+        self.assertNotIn('</script>"', page)
+        self.assertTrue(os.path.exists(os.path.join(output, clientside.renderer_name)))
+
+
+class ClientSideSinkTests(unittest.TestCase):
+
+    document = [
+        {'table': {'columns': {'Name': ['a', 'b'], 'Go': [{'link': {'href': 'a.html'}}, {'link': {'href': 'b.html'}}], 'Done': [{'check': None}] * 2}}},
+        {'container': [{'text': {'label': 'T'}}, {'link': {'href': 'c.html'}}]},
+    ]
+
+    def test_same_paths(self):
+        for sink_type in (OutlineSink, LinkSink):
+            rendered, encoded = sink_type(), sink_type()
+            MockGenerator(self.document, io.StringIO(), sinks=[rendered]).generate()
+            clientside.encode(self.document, sinks=[encoded])
+
+            with self.subTest(sink=sink_type.__name__):
+                if sink_type is OutlineSink:
+                    self.assertListEqual(encoded.outline, rendered.outline)
+                    self.assertIn('/0/Go[1]', [entry['path'] for entry in encoded.outline])
+                else:
+                    self.assertListEqual(encoded.links, rendered.links)
+                    self.assertIn(('b.html', '/0/Go[1]'), encoded.links)
+
+
+class ParallelTests(unittest.TestCase):
+
+    def render(self, document):
+        with io.StringIO() as out:
+            MockGenerator(document, out).generate()
+            return out.getvalue()
+
+    def render_parallel(self, document, jobs=2, min_fields=3):
+        with io.StringIO() as out:
+            parallel.render(document, out, jobs, min_fields)
+            return out.getvalue()
+
+    def test_chunks(self):
+        self.assertListEqual(parallel.chunks(10, 2, 3), [(0, 3), (3, 6), (6, 9), (9, 10)])
+        self.assertListEqual(parallel.chunks(10, 2, 100), [(0, 10)])
+        self.assertListEqual(parallel.chunks(0, 2, 3), [])
+
+    def test_same_html(self):
+        document = corpus.CorpusGenerator(3, **corpus.shapes['mixed']).document()
+
+        self.assertEqual(self.render_parallel(document), self.render(document))
+
+    def test_last_field(self):
+        # The last field of the page has no line break after it, the last ones of other chunks do
+        document = [{'button': {'text': f'Button {i}'}} for i in range(7)]
+        html = self.render_parallel(document)
+
+        self.assertEqual(html, self.render(document))
+        self.assertEqual(html.count('class="btn btn-primary"/><br/>'), 6)
+
+    def test_catalogs(self):
+        options = 'Red\nGreen\nBlue'
+        one_chunk = [{'select': {'options': options}}] + [{'text': {'label': f'Text {i}'}} for i in range(8)]
+        two_chunks = one_chunk + [{'select': {'label': 'Again', 'options': options}}, {'select': {'options': 'Other'}}]
+
+        for document in (one_chunk, two_chunks):
+            with self.subTest(fields=len(document)):
+                self.assertEqual(self.render_parallel(document), self.render(document))
+
+
+class SiteTests(unittest.TestCase):
+
+    pages = {
+        'index.mock.yaml': [{'link': {'href': 'forms/customer.html'}}, {'link': {'href': 'https://example.com'}}, {'link': {'href': '#top'}}],
+        'forms/customer.mock.yaml': [{'link': {'href': '../index.html'}}, {'container': [{'link': {'href': 'order.html#total'}}]}, {'link': {'href': '/forms/'}}],
+        'forms/order.mock.yaml': [{'flowchart': {'nodes': [{'start': 'Begin'}, {'action': 'Pay', 'form': 'payment.html'}, {'end': 'End'}]}}],
+    }
+
+    def setUp(self):
+        self._folder = tempfile.TemporaryDirectory()
+        self.folder = self._folder.name
+        self.sources = []
+
+        for name, document in self.pages.items():
+            path = os.path.join(self.folder, 'src', name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+            with open(path, 'w') as f:
+                yaml.dump(document, f)
+
+            self.sources.append(path)
+
+    def tearDown(self):
+        self._folder.cleanup()
+
+    def test_local_target(self):
+        self.assertEqual(site.local_target('a/b.html', 'c.html#x'), 'a/c.html')
+        self.assertEqual(site.local_target('a/b.html', '../c%20d.html?q=1'), 'c d.html')
+        self.assertEqual(site.local_target('a/b.html', '/e/'), 'e/index.html')
+        self.assertEqual(site.local_target('a/b.html', '../../out.html'), '../out.html')
+        self.assertIsNone(site.local_target('a/b.html', 'https://example.com/c.html'))
+        self.assertIsNone(site.local_target('a/b.html', 'mailto:someone@example.com'))
+        self.assertIsNone(site.local_target('a/b.html', '#top'))
+
+    def test_sink(self):
+        sink = LinkSink()
+
+        with io.StringIO() as out:
+            MockGenerator(self.pages['forms/customer.mock.yaml'] + self.pages['forms/order.mock.yaml'], out, sinks=[sink]).generate()
+
+        self.assertListEqual(sink.links, [('../index.html', '/0'), ('order.html#total', '/1/0'), ('/forms/', '/2'), ('payment.html', '/3')])
+
+    def test_check(self):
+        graph = {'a.html': [('b.html', '/0'), ('c.html', '/1'), ('d.html', '/2')]}
+        looked_up = []
+
+        def exists(target):
+            looked_up.append(target)
+            return target == 'c.html'
+
+        self.assertListEqual(site.check(graph, {'b.html'}, exists), [('a.html', '/2', 'd.html')])
+        self.assertListEqual(sorted(looked_up), ['c.html', 'd.html'])
+
+    def test_build(self):
+        output = os.path.join(self.folder, 'out')
+        failures = build.build(self.sources, output, os.path.join(self.folder, 'src'), jobs=1, site=True)
+
+        self.assertListEqual(failures, [(os.path.join(self.folder, 'src', 'forms', 'order.mock.yaml'), 'Broken link to "payment.html" at /0')])
+
+        with open(os.path.join(output, site.graph_name), 'rb') as f:
+            graph = site.load_graph(f.read())
+
+        self.assertListEqual(graph['forms/customer.html'], [('../index.html', '/0'), ('order.html#total', '/1/0'), ('/forms/', '/2')])
+
+        # The index.html page is kept, forms/ gets an index
+        with open(os.path.join(output, 'index.html'), 'r') as f:
+            self.assertNotIn('Linked from', f.read())
+
+        with open(os.path.join(output, 'forms', 'index.html'), 'r') as f:
+            index = f.read()
+
+        self.assertIn('<a href="order.html">order.html</a><br/><small>Links to: <a href="payment.html">forms/payment.html</a></small><br/><small>Linked from: <a href="customer.html">forms/customer.html</a></small>', index)
+
+    def test_merge(self):
+        root = os.path.join(self.folder, 'src')
+        shards = [os.path.join(self.folder, f'shard-{shard}') for shard in (1, 2)]
+
+        for shard, output in enumerate(shards, 1):
+            # Links to pages of other shards aren't checked by the shards
+            self.assertListEqual(build.build(self.sources, output, root, jobs=1, shard=(shard, 2), site=True), [])
+
+        broken = []
+        build.merge(shards, os.path.join(self.folder, 'merged'), broken)
+
+        self.assertListEqual(broken, [('forms/order.html', '/0', 'payment.html')])
+        self.assertTrue(os.path.exists(os.path.join(self.folder, 'merged', 'forms', 'index.html')))
@@ -0,0 +1,95 @@
+'''
+Renders the top level fields of one large document in worker processes, in chunks of consecutive fields written back
+in order, which makes the same HTML as MockGenerator.generate(). Each top level field has its own row, so fields
+only depend on each other through option catalogs, which are written on their first use on the page: when more than
+one chunk uses catalogs, the page is rendered again by a single generator.
+
+Workers are forked with the document, where fork is available, so only the HTML of chunks is sent between processes.
+'''
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .mockdown import MockGenerator
+
+
+# Fewer fields than this aren't worth a worker
+min_chunk_fields = 256
+
+# Document inherited by forked workers
+_fields = None
+
+
+def chunks(count, jobs, min_fields=min_chunk_fields):
+    '''
+    (start, end) of the chunks of count fields, about 4 per job so workers finish together, of at least min_fields
+    '''
+    size = max(min_fields, -(-count // (jobs * 4)))
+
+    return [(start, min(start + size, count)) for start in range(0, count, size)]
+
+
+def render_fields(fields, is_last, components=None):
+    '''
+    (HTML of fields, whether they write catalogs or definitions), is_last when the last one is the last of the page
+    '''
+    with io.StringIO() as out:
+        generator = MockGenerator(None, out, components=components)
+        last = len(fields) - 1
+
+        for i, field in enumerate(fields):
+            generator.generate_root_field(field, is_last and i == last)
+
+        return out.getvalue(), bool(generator._catalogs or generator._defined)
+
+
+def _render_chunk(start, end, is_last):
+    return render_fields(_fields[start:end], is_last)
+
+
+def _render_chunk_fields(fields, is_last):
+    return render_fields(fields, is_last)
+
+
+def render(fields, out, jobs=None, min_fields=min_chunk_fields):
+    '''
+    Writes the page of the top level fields to out, rendering them with jobs processes, defaulting to the number of
+    CPUs. Small documents are rendered in this process.
+    '''
+    global _fields
+
+    jobs = jobs or os.cpu_count() or 1
+    ranges = chunks(len(fields), jobs, min_fields)
+
+    if jobs == 1 or len(ranges) < 2:
+        MockGenerator(fields, out).generate()
+        return
+
+    last = [end == len(fields) for start, end in ranges]
+
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+        work, args = _render_chunk, ([start for start, end in ranges], [end for start, end in ranges], last)
+        _fields = fields
+    else:
+        context = None
+        work, args = _render_chunk_fields, ([fields[start:end] for start, end in ranges], last)
+
+    try:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(ranges)), mp_context=context) as executor:
+            results = list(executor.map(work, *args))
+    finally:
+        _fields = None
+
+    if sum(catalogs for html, catalogs in results) > 1:
+        # Catalogs are numbered, and they and definitions are written once, across the whole page
+        MockGenerator(fields, out).generate()
+        return
+
+    out.write(MockGenerator.header)
+
+    for html, catalogs in results:
+        out.write(html)
+
+    out.write(MockGenerator.footer)
@@ -0,0 +1,72 @@
+import importlib
+
+
+entry_point_group = 'mockdown.components'
+
+# Components shipped with mockdown but kept out of MockGenerator, so they are only imported when used
+builtin_components = {
+    'flowchart': 'mockdown.flowchart:generate',
+}
+
+
+class ComponentRegistry(object):
+    '''
+    Components provided by plugins, declared as entry points of the "mockdown.components" group, like:
+
+        entry_points={'mockdown.components': ['kind = package.module:function']}
+
+    The function is called as function(generator, *args, **kwargs) for each field of that kind, and writes its HTML
+    through the generator's _w, _wn and _wbr helpers, validating its params with generator._checker, like the
+    methods of MockGenerator do. Markup the page needs once, like styles, is written with generator._define.
+
+    Entry points are only listed the first time a field of an unknown kind is found, and each plugin module is
+    only imported the first time its kind is used.
+    '''
+
+    def __init__(self, components=None, group=entry_point_group):
+        self._specs = dict(builtin_components if components is None else components)
+        self._group = group
+        self._discovered = group is None
+        self._components = {}
+
+    def _discover(self):
+        from importlib.metadata import entry_points
+
+        for entry_point in entry_points(group=self._group):
+            self._specs[entry_point.name] = entry_point
+
+        self._discovered = True
+
+    def kinds(self):
+        if not self._discovered:
+            self._discover()
+
+        return sorted(self._specs)
+
+    def get(self, kind):
+        '''
+        Returns the component function of kind, or None when there is no plugin for it
+        '''
+        if kind in self._components:
+            return self._components[kind]
+
+        if kind not in self._specs and not self._discovered:
+            self._discover()
+
+        spec = self._specs.get(kind)
+
+        if spec is None:
+            return None
+
+        if isinstance(spec, str):
+            module, _, attribute = spec.partition(':')
+            component = getattr(importlib.import_module(module), attribute)
+        else:
+            component = spec.load()
+
+        self._components[kind] = component
+
+        return component
+
+
+registry = ComponentRegistry()
@@ -0,0 +1,316 @@
+import argparse
+import functools
+import hashlib
+import http.server
+import io
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+import yaml
+
+from . import loader
+from . import logger_factory
+from .deps import IncludeIndex
+from .mockdown import MockGenerator
+
+
+# Replaces the fragments pushed by the server, keeping the rest of the page (and its scroll position) untouched.
+# Scripts of fragments set as innerHTML don't run, so selects are filled from their catalogs here.
+client_script = '''
+  <script>
+  (function() {
+    var body = document.querySelector('body > .container');
+    var events = new EventSource('/events');
+
+    events.addEventListener('fields', function(event) {
+      var update = JSON.parse(event.data);
+
+      document.getElementById('mockdown-definitions').innerHTML = update.definitions;
+
+      for (var index in update.fields) {
+        var id = 'mockdown-field-' + index;
+        var element = document.getElementById(id);
+
+        if (!element) {
+          element = document.createElement('div');
+          element.id = id;
+          body.appendChild(element);
+        }
+
+        element.innerHTML = update.fields[index];
+      }
+
+      var extra;
+      while ((extra = document.getElementById('mockdown-field-' + update.count))) {
+        extra.remove();
+        update.count++;
+      }
+
+      document.querySelectorAll('select[data-catalog]').forEach(function (select) {
+        var catalog = document.getElementById(select.dataset.catalog);
+
+        if (catalog) {
+          select.innerHTML = catalog.innerHTML;
+        }
+      });
+    });
+
+    events.addEventListener('failure', function(event) {
+      console.error('mockdown: ' + JSON.parse(event.data));
+    });
+  })();
+  </script>
+'''
+
+
+def field_wrapper(index, fragment):
+    return f'<div id="mockdown-field-{index}">{fragment}</div>'
+
+
+class FieldGenerator(MockGenerator):
+    '''
+    Generates top level fields of a preview page one at a time. Option catalogs and definitions are numbered and
+    written once for the whole page, to definitions instead of the field, since fields are replaced on their own.
+    '''
+
+    def __init__(self, out, definitions, catalogs, defined):
+        super().__init__(None, out)
+
+        self._definitions = definitions
+        self._catalogs = catalogs
+        self._defined = defined
+
+    def _catalog_key(self, options):
+        # Each update loads new lists, so lists are equal by contents too, or every update would add their catalogs again
+        return options if type(options) is str else tuple(str(option) for option in options)
+
+    def _catalog(self, options):
+        out, self._out = self._out, self._definitions
+
+        try:
+            return super()._catalog(options)
+        finally:
+            self._out = out
+
+    def _define(self, name, html):
+        out, self._out = self._out, self._definitions
+
+        try:
+            super()._define(name, html)
+        finally:
+            self._out = out
+
+
+class FieldRenderer(object):
+    '''
+    Renders the top level fields of a document one by one, keeping a hash of each, so a new version of the
+    document only re-renders the fields which hash changed.
+
+    Catalogs and definitions of the fields are kept for the life of the renderer, so the fields which didn't change
+    keep referring to the same ones, in definitions.
+    '''
+
+    def __init__(self):
+        self._hashes = []
+        self.fragments = []
+        self._definitions = io.StringIO()
+        self._catalogs = {}
+        self._defined = set()
+
+    @staticmethod
+    def _hash(field, is_last):
+        # repr keeps the keys order, which matters for some components, like table columns
+        return hashlib.blake2b(f'{is_last}{field!r}'.encode(), digest_size=16).digest()
+
+    def update(self, document):
+        '''
+        Returns a dict with the index and HTML of the fields which changed
+        '''
+        hashes = []
+        fragments = []
+        changed = {}
+
+        for i, field in enumerate(document):
+            digest = FieldRenderer._hash(field, i == len(document) - 1)
+
+            if i < len(self._hashes) and self._hashes[i] == digest:
+                fragment = self.fragments[i]
+            else:
+                with io.StringIO() as out:
+                    FieldGenerator(out, self._definitions, self._catalogs, self._defined).generate_root_field(field, i == len(document) - 1)
+                    fragment = out.getvalue()
+
+                changed[i] = fragment
+
+            hashes.append(digest)
+            fragments.append(fragment)
+
+        self._hashes = hashes
+        self.fragments = fragments
+
+        return changed
+
+    def definitions(self):
+        '''
+        HTML of the catalogs and definitions of the page
+        '''
+        return self._definitions.getvalue()
+
+    def page(self):
+        definitions = f'<div id="mockdown-definitions">{self.definitions()}</div>'
+        fields = ''.join(field_wrapper(i, fragment) for i, fragment in enumerate(self.fragments))
+        footer = MockGenerator.footer.replace('</body>', f'{client_script}</body>')
+
+        return f'{MockGenerator.header}{definitions}{fields}{footer}'
+
+
+class Preview(object):
+    '''
+    Watches a mock file, and the files it includes, and pushes the fields changed on each save to the connected
+    browsers
+    '''
+
+    def __init__(self, path, logger):
+        self._path = path
+        self._logger = logger
+        self._renderer = FieldRenderer()
+        self._lock = threading.Lock()
+        self._clients = []
+        self._includes = IncludeIndex()
+
+    def page(self):
+        with self._lock:
+            return self._renderer.page()
+
+    def subscribe(self):
+        client = queue.Queue()
+
+        with self._lock:
+            self._clients.append(client)
+
+        return client
+
+    def unsubscribe(self, client):
+        with self._lock:
+            self._clients.remove(client)
+
+    def _publish(self, event, data):
+        message = f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+        for client in self._clients:
+            client.put(message)
+
+    def refresh(self):
+        '''
+        Re-renders the document if the file, or any file it includes, changed since last call
+        '''
+        try:
+            if not self._includes.update([self._path]):
+                return
+
+            with open(self._path, 'r') as f:
+                document = yaml.load(f, Loader=loader.Loader)
+
+            with self._lock:
+                changed = self._renderer.update(document)
+                self._publish('fields', {'count': len(document), 'fields': changed, 'definitions': self._renderer.definitions()})
+
+            self._logger.info(f'{len(changed)} of {len(document)} fields changed')
+        except Exception as e:
+            self._logger.error(f'{self._path}: {e}')
+
+            with self._lock:
+                self._publish('failure', str(e))
+
+    def watch(self, interval):
+        while True:
+            self.refresh()
+            time.sleep(interval)
+
+
+class PreviewRequestHandler(http.server.SimpleHTTPRequestHandler):
+    '''
+    Serves the mock at /, its updates at /events and any other file (like icons) from the mock folder
+    '''
+
+    def __init__(self, *args, preview, **kwargs):
+        self._preview = preview
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        if self.path == '/':
+            self._send_page()
+        elif self.path == '/events':
+            self._send_events()
+        else:
+            super().do_GET()
+
+    def _send_page(self):
+        content = self._preview.page().encode()
+
+        self.send_response(200)
+        self.send_header('Content-type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _send_events(self):
+        self.send_response(200)
+        self.send_header('Content-type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+
+        client = self._preview.subscribe()
+
+        try:
+            while True:
+                self.wfile.write(client.get().encode())
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            self._preview.unsubscribe(client)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def parse_command_line(argv):
+    parser = argparse.ArgumentParser(prog='mockdown serve', description='Serves a mock, updating the changed fields in the browser when the file is saved')
+
+    logger_factory.make_verbosity_argument(parser)
+
+    parser.add_argument('input', help='Mock input file')
+    parser.add_argument('--port', '-p', type=int, default=8000, help='HTTP port, defaults to 8000')
+    parser.add_argument('--bind', '-b', default='127.0.0.1', help='Address to listen on, defaults to 127.0.0.1')
+    parser.add_argument('--interval', type=float, default=0.3, help='Seconds between checks for changes in the input file')
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_command_line(argv)
+
+    logger = logger_factory.create(__name__, args.verbosity, log_level=logging.INFO)
+
+    preview = Preview(args.input, logger)
+    preview.refresh()
+
+    threading.Thread(target=preview.watch, args=(args.interval, ), daemon=True).start()
+
+    directory = os.path.dirname(os.path.abspath(args.input))
+    handler = functools.partial(PreviewRequestHandler, preview=preview, directory=directory)
+
+    with http.server.ThreadingHTTPServer((args.bind, args.port), handler) as server:
+        logger.warning(f'Serving {args.input} at http://{args.bind}:{args.port}/')
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+    return 0
@@ -0,0 +1,196 @@
+'''
+Search index of a build: which pages show each label, header, button text and table column name, with a page which
+searches it in the browser. The texts are collected by a sinks.SearchSink while the pages are rendered.
+
+search.json holds each distinct text once, the (page, kind) of each of its uses, and an inverted index from the
+lower cased words of the texts to the texts having them. search.html loads it, matches every word of the query as a
+prefix, and links each result to its page with a text fragment (#:~:text=...), which browsers scroll to and highlight.
+'''
+import json
+import re
+
+
+index_name = 'search.json'
+page_name = 'search.html'
+
+words = re.compile(r'\w+')
+
+
+class SearchIndex(object):
+    '''
+    Texts of pages, added page by page, written as search.json with to_json
+    '''
+
+    def __init__(self):
+        self.pages = []
+        self.kinds = []
+        self.texts = []
+        # [page, kind, page, kind, ...] of each text, as indexes of pages and kinds
+        self.postings = []
+        self._kind_ids = {}
+        self._text_ids = {}
+
+    def add(self, page, entries):
+        '''
+        Adds page, a path relative to search.html, with the (kind, text) entries of a SearchSink. Pages added in the
+        same order make the same index, whatever the order of their entries.
+        '''
+        page_id = len(self.pages)
+        self.pages.append(page)
+
+        for kind, text in sorted(entries):
+            kind_id = self._kind_ids.get(kind)
+
+            if kind_id is None:
+                kind_id = self._kind_ids[kind] = len(self.kinds)
+                self.kinds.append(kind)
+
+            text_id = self._text_ids.get(text)
+
+            if text_id is None:
+                text_id = self._text_ids[text] = len(self.texts)
+                self.texts.append(text)
+                self.postings.append([])
+
+            self.postings[text_id] += (page_id, kind_id)
+
+    def entries(self):
+        '''
+        {page: [(kind, text)]} of the pages added
+        '''
+        pages = {page: [] for page in self.pages}
+
+        for text, postings in zip(self.texts, self.postings):
+            for i in range(0, len(postings), 2):
+                pages[self.pages[postings[i]]].append((self.kinds[postings[i + 1]], text))
+
+        return pages
+
+    def to_json(self):
+        index = {}
+
+        for text_id, text in enumerate(self.texts):
+            for word in set(words.findall(text.lower())):
+                index.setdefault(word, []).append(text_id)
+
+        content = {
+            'version': 1,
+            'pages': self.pages,
+            'kinds': self.kinds,
+            'texts': self.texts,
+            'postings': self.postings,
+            'index': dict(sorted(index.items())),
+        }
+
+        return json.dumps(content, ensure_ascii=False, separators=(',', ':')).encode()
+
+    @classmethod
+    def from_json(cls, content):
+        loaded = json.loads(content)
+        pages = {page: [] for page in loaded['pages']}
+
+        for text, postings in zip(loaded['texts'], loaded['postings']):
+            for i in range(0, len(postings), 2):
+                pages[loaded['pages'][postings[i]]].append((loaded['kinds'][postings[i + 1]], text))
+
+        index = cls()
+
+        for page, entries in pages.items():
+            index.add(page, entries)
+
+        return index
+
+
+# Searches search.json, the texts are written with textContent, so pages can't inject HTML
+search_page = '''<html>
+<head>
+  <meta charset="UTF-8"/>
+  <title>Search mocks</title>
+  <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.0.0-beta1/dist/css/bootstrap.min.css" rel="stylesheet" integrity="sha384-giJF6kkoqNQ00vy+HMDP7azOuL0xtbfIcaT9wjKHr8RbDVddVHyTfAAsrekwKmP1" crossorigin="anonymous">
+</head>
+<body>
+  <div class="container">
+    <h1>Search mocks</h1>
+    <input id="query" class="form-control" placeholder="Labels, headers, buttons, columns" autofocus/>
+    <p id="status"></p>
+    <ul id="results"></ul>
+  </div>
+  <script>
+  (function() {
+    var query = document.getElementById('query');
+    var status = document.getElementById('status');
+    var results = document.getElementById('results');
+    var search = null;
+    var words = null;
+
+    function tokens(text) {
+      return text.toLowerCase().match(/[\\p{L}\\p{N}_]+/gu) || [];
+    }
+
+    function textsOf(token) {
+      var found = new Set();
+
+      for (var i = 0; i < words.length; i++) {
+        if (words[i].startsWith(token)) {
+          search.index[words[i]].forEach(function (text) { found.add(text); });
+        }
+      }
+
+      return found;
+    }
+
+    function link(page, text) {
+      // Text directives need "-", "&" and "," escaped too
+      var directive = encodeURIComponent(text).replace(/-/g, '%2D').replace(/&/g, '%26').replace(/,/g, '%2C');
+
+      return page + '#:~:text=' + directive;
+    }
+
+    function update() {
+      var query_tokens = tokens(query.value);
+      results.innerHTML = '';
+
+      if (!search || query_tokens.length === 0) {
+        status.textContent = search ? search.pages.length + ' pages' : 'Loading...';
+        return;
+      }
+
+      var matches = null;
+
+      query_tokens.forEach(function (token) {
+        var texts = textsOf(token);
+        matches = matches === null ? texts : new Set(Array.from(matches).filter(function (text) { return texts.has(text); }));
+      });
+
+      var shown = 0;
+
+      matches.forEach(function (text) {
+        var postings = search.postings[text];
+
+        for (var i = 0; i < postings.length && shown < 200; i += 2, shown++) {
+          var item = document.createElement('li');
+          var anchor = document.createElement('a');
+
+          anchor.href = link(search.pages[postings[i]], search.texts[text]);
+          anchor.textContent = search.texts[text];
+          item.appendChild(anchor);
+          item.appendChild(document.createTextNode(' (' + search.kinds[postings[i + 1]] + ') ' + search.pages[postings[i]]));
+          results.appendChild(item);
+        }
+      });
+
+      status.textContent = shown + ' results' + (shown === 200 ? ', refine the search to see others' : '');
+    }
+
+    fetch('search.json').then(function (response) { return response.json(); }).then(function (loaded) {
+      search = loaded;
+      words = Object.keys(search.index);
+      update();
+    });
+
+    query.addEventListener('input', update);
+  })();
+  </script>
+</body>
+</html>
+'''
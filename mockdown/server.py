@@ -0,0 +1,230 @@
+'''
+Render server: a process which imports mockdown, its subcommands and component plugins once, then forks workers
+taking mockdown command lines on a Unix socket, so each call of the mockdown command (see client.py) skips the
+start up of Python and the imports.
+
+    mockdown server &
+    mockdown page.mock.yaml page.html    # rendered by a worker of the server
+
+A worker runs each command line as the command would, in the caller's working folder, reading stdin from the caller
+only when the command reads it, and sends back what the command wrote to stdout and stderr, and its exit code.
+'''
+import argparse
+import importlib
+import io
+import logging
+import os
+import signal
+import socket
+import sys
+import traceback
+
+from . import plugins
+from .client import receive, send, socket_path
+
+
+class _RemoteStdin(object):
+    '''
+    stdin of the client, asked for on the first use
+    '''
+
+    name = '<stdin>'
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._text = None
+
+    def _text_stream(self):
+        if self._text is None:
+            send(self._stream, {'read': True})
+            message = receive(self._stream)
+            self._text = io.StringIO(message['stdin'] if message else '')
+
+        return self._text
+
+    def __getattr__(self, name):
+        return getattr(self._text_stream(), name)
+
+    def __iter__(self):
+        return iter(self._text_stream())
+
+
+def warm():
+    '''
+    Imports everything a command may need, before the workers are forked
+    '''
+    from . import mockdown
+
+    for module in set(value.partition(':')[0] for value in mockdown.subcommands.values()):
+        importlib.import_module(f'.{module}', __package__)
+
+    for kind in plugins.registry.kinds():
+        plugins.registry.get(kind)
+
+    # Log handlers are created now, on the real stderr, and pointed to each caller's while handling it
+    logging.basicConfig()
+
+
+def run(argv, cwd, stdin):
+    '''
+    (exit code, stdout, stderr) of the command line argv, run in cwd
+    '''
+    from .mockdown import main
+
+    out, err = io.StringIO(), io.StringIO()
+    handlers = [handler for handler in logging.root.handlers if isinstance(handler, logging.StreamHandler)]
+    saved = sys.argv, sys.stdin, sys.stdout, sys.stderr, os.getcwd()
+
+    try:
+        try:
+            os.chdir(cwd)
+        except OSError as e:
+            # Like the working directory of the client removed since, it's its error and not the server's
+            return 1, '', f'mockdown: can\'t run in {cwd}: {e.strerror}\n'
+
+        sys.argv, sys.stdin, sys.stdout, sys.stderr = ['mockdown', *argv], stdin, out, err
+        streams = [handler.stream for handler in handlers]
+
+        for handler in handlers:
+            handler.setStream(err)
+
+        try:
+            main()
+            code = 0
+        except SystemExit as e:
+            if e.code is None or type(e.code) is int:
+                code = e.code or 0
+            else:
+                print(e.code, file=err)
+                code = 1
+        except Exception:
+            traceback.print_exc(file=err)
+            code = 1
+        finally:
+            for handler, stream in zip(handlers, streams):
+                handler.setStream(stream)
+    finally:
+        sys.argv, sys.stdin, sys.stdout, sys.stderr, cwd = saved
+        os.chdir(cwd)
+
+    return code, out.getvalue(), err.getvalue()
+
+
+def handle(stream):
+    request = receive(stream)
+
+    if request is None:
+        return
+
+    code, out, err = run(request['argv'], request['cwd'], _RemoteStdin(stream))
+
+    send(stream, {'stdout': out, 'stderr': err, 'exit': code})
+
+
+def _work(listener):
+    while True:
+        connection, address = listener.accept()
+
+        with connection, connection.makefile('rwb') as stream:
+            try:
+                handle(stream)
+            except (OSError, ValueError):
+                # The client went away
+                pass
+
+
+def listen(path):
+    '''
+    A socket listening on path, only usable by this user. A socket file left by a server which is gone is replaced.
+    '''
+    if os.path.exists(path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        try:
+            probe.connect(path)
+        except OSError:
+            os.unlink(path)
+        else:
+            raise OSError(f'A server is already listening on {path}')
+        finally:
+            probe.close()
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # The socket file is created with the umask, so it's never usable by others, not even until the chmod
+    umask = os.umask(0o177)
+
+    try:
+        listener.bind(path)
+    finally:
+        os.umask(umask)
+
+    os.chmod(path, 0o600)
+    listener.listen(64)
+
+    return listener
+
+
+def serve(path, workers):
+    '''
+    Serves on path with workers processes until interrupted, forking a new worker for each one which dies
+    '''
+    warm()
+
+    listener = listen(path)
+    children = set()
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    try:
+        while True:
+            while len(children) < workers:
+                pid = os.fork()
+
+                if pid == 0:
+                    try:
+                        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                        _work(listener)
+                    finally:
+                        os._exit(0)
+
+                children.add(pid)
+
+            pid, status = os.wait()
+            children.discard(pid)
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                pass
+
+        listener.close()
+        os.unlink(path)
+
+
+def parse_command_line(argv):
+    parser = argparse.ArgumentParser(prog='mockdown server', description='Serves mockdown command lines on a Unix socket, from workers which have everything imported, so each call of the mockdown command starts fast')
+
+    parser.add_argument('--socket', '-s', default=None, help='Socket path, defaults to $MOCKDOWN_SOCKET, or mockdown-<uid>.sock in $XDG_RUNTIME_DIR or $TMPDIR')
+    parser.add_argument('--workers', '-w', type=int, default=os.cpu_count() or 1, help='Worker processes, each running one command at a time, defaults to the number of CPUs')
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_command_line(argv)
+    path = args.socket or socket_path()
+
+    if not path:
+        print('MOCKDOWN_SOCKET is empty, which disables the server', file=sys.stderr)
+        return 1
+
+    try:
+        serve(path, args.workers)
+    except OSError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    return 0
@@ -0,0 +1,141 @@
+import json
+
+
+def label_of(kwargs):
+    '''
+    The text which best names a component
+    '''
+    for param in ('label', 'title', 'text', 'href', 'placeholder'):
+        value = kwargs.get(param)
+
+        if type(value) is str:
+            return value
+
+    return None
+
+
+class Sink(object):
+    '''
+    Receives every component while MockGenerator writes the HTML, so other outputs come from the same traversal.
+
+    path is the position of the component on the document, like "/3/0" for the first field of the container
+    which is the fourth top level field, or "/5/Name[2]" for the cell on the third row of the "Name" column of the
+    table which is the sixth top level field.
+
+    A sink which doesn't use paths sets paths to False, and gets None instead, which saves tracking them. One which
+    doesn't need to see a table cell again when it's the same as a previous cell of its column sets repeats to False,
+    which lets the generator reuse the HTML of such cells.
+    '''
+
+    paths = True
+    repeats = True
+
+    def component(self, kind, args, kwargs, path):
+        pass
+
+
+class OutlineSink(Sink):
+    '''
+    Structure of the document, a list of {"kind", "label", "path"}
+    '''
+
+    def __init__(self):
+        self.outline = []
+
+    def component(self, kind, args, kwargs, path):
+        self.outline.append({'kind': kind, 'label': label_of(kwargs), 'path': path})
+
+    def write(self, out):
+        json.dump(self.outline, out, ensure_ascii=False, indent=1)
+
+
+class TextSink(Sink):
+    '''
+    Every text shown by the document, one per line, like for full text search
+    '''
+
+    def __init__(self):
+        self.lines = []
+
+    def component(self, kind, args, kwargs, path):
+        for param in ('label', 'title', 'text', 'placeholder'):
+            value = kwargs.get(param)
+
+            if type(value) is str:
+                self.lines.append(value)
+
+        options = kwargs.get('options')
+        if type(options) is list:
+            self.lines.extend(str(option) for option in options)
+
+        columns = kwargs.get('columns')
+        if type(columns) is dict:
+            for column, cells in columns.items():
+                self.lines.append(str(column))
+
+                if type(cells) is list:
+                    # Component cells are components by themselves
+                    self.lines.extend(str(cell) for cell in cells if type(cell) is not dict)
+
+    def write(self, out):
+        for line in self.lines:
+            out.write(f'{line}\n')
+
+
+class SearchSink(Sink):
+    '''
+    Texts to find the page by, as (kind, text): labels, titles and button texts of components, and names of table
+    columns, as kind "column". Each one is kept once.
+    '''
+
+    paths = False
+    repeats = False
+
+    def __init__(self):
+        self.entries = []
+        self._seen = set()
+
+    def _add(self, kind, text):
+        text = ' '.join(text.split())
+
+        if text and (kind, text) not in self._seen:
+            self._seen.add((kind, text))
+            self.entries.append((kind, text))
+
+    def component(self, kind, args, kwargs, path):
+        for param in ('label', 'title', 'text'):
+            value = kwargs.get(param)
+
+            if type(value) is str:
+                self._add(kind, value)
+
+        columns = kwargs.get('columns')
+        if type(columns) is dict:
+            for column in columns:
+                self._add('column', str(column))
+
+
+class LinkSink(Sink):
+    '''
+    Links of the document, as (href, path) of the first component linking to each href: links, and forms of
+    flowchart actions
+    '''
+
+    repeats = False
+
+    def __init__(self):
+        self.links = []
+        self._seen = set()
+
+    def _add(self, href, path):
+        if type(href) is str and href not in self._seen:
+            self._seen.add(href)
+            self.links.append((href, path))
+
+    def component(self, kind, args, kwargs, path):
+        if kind == 'link':
+            self._add(kwargs.get('href'), path)
+        elif kind == 'flowchart' and type(kwargs.get('nodes')) is list:
+            for node in kwargs['nodes']:
+                if type(node) is dict:
+                    self._add(node.get('form'), path)
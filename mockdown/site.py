@@ -0,0 +1,164 @@
+'''
+Site mode of a build: the links of every page, collected by a sinks.LinkSink while the pages are rendered, written
+as a link graph, links.json, with an index.html in each folder listing its pages, their links and the pages linking
+to them. Links to local targets are checked once the site is written: targets which are pages or files of the build
+are found in memory, others are looked up on disk by a thread pool.
+
+links.json is {page: [[href, path of the component], ...]}, with pages relative to the site root.
+'''
+import json
+import os
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote, urlsplit
+
+from .escaping import escape
+
+
+graph_name = 'links.json'
+index_name = 'index.html'
+
+
+def local_target(page, href):
+    '''
+    Path relative to the site root of the file href points to from page, or None when href isn't local, like an URL
+    or a fragment of the page itself. Targets out of the site start with "../".
+    '''
+    parts = urlsplit(href)
+
+    if parts.scheme or parts.netloc or not parts.path:
+        return None
+
+    path = unquote(parts.path)
+
+    if path.startswith('/'):
+        target = path.lstrip('/')
+    else:
+        target = posixpath.join(posixpath.dirname(page), path)
+
+    # Links to folders are links to their index
+    if path.endswith('/') or not target:
+        target = posixpath.join(target, index_name)
+
+    return posixpath.normpath(target)
+
+
+def graph_json(graph):
+    return json.dumps({page: [list(link) for link in links] for page, links in sorted(graph.items())}, ensure_ascii=False, indent=1).encode()
+
+
+def load_graph(content):
+    return {page: [tuple(link) for link in links] for page, links in json.loads(content).items()}
+
+
+def targets(graph):
+    '''
+    {page: sorted local targets of its links}
+    '''
+    return {page: sorted(set(filter(None, (local_target(page, href) for href, path in links)))) for page, links in graph.items()}
+
+
+def _folders(pages):
+    '''
+    {folder: ([subfolders], [pages])} of the folders holding pages, and their parents, "" being the root
+    '''
+    folders = {'': (set(), [])}
+
+    for page in sorted(pages):
+        folder = posixpath.dirname(page)
+        folders.setdefault(folder, (set(), []))[1].append(page)
+
+        while folder:
+            parent = posixpath.dirname(folder)
+            folders.setdefault(parent, (set(), []))[0].add(folder)
+            folders.setdefault(folder, (set(), []))
+            folder = parent
+
+    return {folder: (sorted(subfolders), pages) for folder, (subfolders, pages) in folders.items()}
+
+
+def _page_list(page, folder, names):
+    links = ', '.join(f'<a href="{escape(posixpath.relpath(name, folder or "."))}">{escape(name)}</a>' for name in names)
+
+    return links or '-'
+
+
+def index_pages(pages, graph):
+    '''
+    {name: HTML} of the index page of each folder of pages, except folders having an index.html page
+    '''
+    outgoing = targets(graph)
+    incoming = {}
+
+    for page, page_targets in outgoing.items():
+        for target in page_targets:
+            incoming.setdefault(target, []).append(page)
+
+    indexes = {}
+
+    for folder, (subfolders, folder_pages) in _folders(pages).items():
+        name = posixpath.join(folder, index_name)
+
+        if name in pages:
+            continue
+
+        title = escape(folder + '/' if folder else 'Pages')
+        items = []
+
+        if folder:
+            items.append(f'    <li><a href="../{index_name}">..</a></li>')
+
+        for subfolder in subfolders:
+            items.append(f'    <li><a href="{escape(posixpath.basename(subfolder))}/{index_name}">{escape(posixpath.basename(subfolder))}/</a></li>')
+
+        for page in folder_pages:
+            items.append(
+                f'    <li><a href="{escape(posixpath.basename(page))}">{escape(posixpath.basename(page))}</a>'
+                f'<br/><small>Links to: {_page_list(page, folder, outgoing.get(page, []))}</small>'
+                f'<br/><small>Linked from: {_page_list(page, folder, sorted(incoming.get(page, [])))}</small></li>'
+            )
+
+        indexes[name] = (index_page % {'title': title, 'items': '\n'.join(items)}).encode()
+
+    return indexes
+
+
+def check(graph, known, exists=None, jobs=None):
+    '''
+    (page, path, href) of the links of graph whose local target isn't in known, the names of the files of the site,
+    nor found by exists(target), called for each distinct target on a thread pool of jobs threads
+    '''
+    unknown = {}
+
+    for page, links in sorted(graph.items()):
+        for href, path in links:
+            target = local_target(page, href)
+
+            if target is not None and target not in known:
+                unknown.setdefault(target, []).append((page, path, href))
+
+    missing = list(unknown)
+
+    if exists is not None and missing:
+        with ThreadPoolExecutor(max_workers=jobs or min(32, (os.cpu_count() or 1) + 4)) as executor:
+            missing = [target for target, found in zip(missing, executor.map(exists, missing)) if not found]
+
+    return sorted(link for target in missing for link in unknown[target])
+
+
+index_page = '''<html>
+<head>
+  <meta charset="UTF-8"/>
+  <title>%(title)s</title>
+  <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.0.0-beta1/dist/css/bootstrap.min.css" rel="stylesheet" integrity="sha384-giJF6kkoqNQ00vy+HMDP7azOuL0xtbfIcaT9wjKHr8RbDVddVHyTfAAsrekwKmP1" crossorigin="anonymous">
+</head>
+<body>
+  <div class="container">
+    <h1>%(title)s</h1>
+    <ul>
+%(items)s
+    </ul>
+  </div>
+</body>
+</html>
+'''
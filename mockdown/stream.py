@@ -0,0 +1,119 @@
+'''
+Renders a stream of "---" separated mocks, like the ones written by generator scripts, into one page per document.
+
+The stream is parsed on a background thread, one document ahead of the renderer, so reading and parsing the next
+document overlaps with rendering the current one while at most a couple of documents are held in memory.
+'''
+import argparse
+import io
+import queue
+import sys
+import threading
+
+from . import limits as limits_
+from . import loader
+from .archive import open_writer
+from .mockdown import MockGenerator
+
+
+default_name = '{index:04d}.html'
+
+_end = object()
+
+
+def _parse(stream, documents, loader_class):
+    try:
+        parser = loader_class(stream)
+
+        try:
+            while parser.check_data():
+                documents.put((parser.get_data(), None))
+        finally:
+            parser.dispose()
+    except Exception as e:
+        documents.put((None, e))
+    else:
+        documents.put((_end, None))
+
+
+def documents(stream, prefetch=1, limits=None):
+    '''
+    Yields each document of stream, parsed by a background thread at most prefetch documents ahead.
+    A parse error is raised once the documents before it have been yielded. limits (see limits.Limits) apply to
+    each document.
+    '''
+    pending = queue.Queue(maxsize=prefetch)
+    loader_class = loader.Loader.limited(limits) if limits else loader.Loader
+
+    # Daemon, so a consumer which stops early doesn't wait for a parser blocked on the full queue
+    threading.Thread(target=_parse, args=(stream, pending, loader_class), daemon=True).start()
+
+    while True:
+        document, error = pending.get()
+
+        if error:
+            raise error
+
+        if document is _end:
+            return
+
+        yield document
+
+
+def render(document, limits=None):
+    with io.StringIO() as out:
+        MockGenerator(document, out, limits=limits).generate()
+        return out.getvalue().encode()
+
+
+def render_stream(stream, writer, name=default_name, limits=None):
+    '''
+    Renders each document of stream into writer (see archive.open_writer) as name.format(index=i), from 0.
+    Documents which fail to render, or go over limits, are skipped.
+
+    Returns (count of documents, list of (index, error) of the ones which failed). A parse error stops the stream
+    and is reported with the index of the document it was found on.
+    '''
+    failures = []
+    count = 0
+
+    try:
+        for document in documents(stream, limits=limits):
+            try:
+                writer.write(name.format(index=count), render(document, limits))
+            except Exception as e:
+                failures.append((count, f'{type(e).__name__}: {e}'))
+
+            count += 1
+    except Exception as e:
+        failures.append((count, f'{type(e).__name__}: {e}'))
+
+    return count, failures
+
+
+def parse_command_line(argv):
+    parser = argparse.ArgumentParser(prog='mockdown stream', description='Renders each document of a "---" separated stream of mocks into its own page')
+
+    parser.add_argument('input', nargs='?', type=argparse.FileType('r'), default=sys.stdin, help='Stream of mocks, defaults to stdin')
+    parser.add_argument('--output', '-o', required=True, help='Output folder, or archive when it ends with .zip, .tar, .tar.gz, .tgz, .tar.bz2 or .tar.xz')
+    parser.add_argument('--name', '-n', default=default_name, help=f'Name of each page, formatted with the document index, defaults to "{default_name}"')
+
+    limits_.make_limit_arguments(parser)
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_command_line(argv)
+
+    with open_writer(args.output) as writer:
+        count, failures = render_stream(args.input, writer, args.name, limits_.from_arguments(args))
+
+    for index, error in failures:
+        print(f'{args.input.name}: document {index}: {error}', file=sys.stderr)
+
+    # A parse error is reported on the index after the last parsed document
+    rendered = count - sum(1 for index, error in failures if index < count)
+    print(f'{rendered} of {count} documents rendered', file=sys.stderr)
+
+    return 1 if failures else 0
@@ -0,0 +1,309 @@
+'''
+Mock templates: mocks with variables and loops, compiled once and rendered for many data records.
+
+    - header:
+        label: Orders of ${customer.name}
+    - for_each: ${orders}
+      as: order
+      index: i
+      do:
+        - text:
+            label: Order ${i}
+            placeholder: ${order.product}
+
+A string which is just "${path}" takes the value at path as is, like a list for table columns or options, while
+variables inside longer strings are formatted into them. Paths are dot separated keys, or indexes of lists. A
+for_each entry of a list is replaced by its "do" entries, repeated for each item of the list it names, which is
+visible to them as "as" (defaults to "item"), with its position as "index", when given.
+
+Compiling splits the template between what depends on the data and what doesn't. Parts without variables are
+shared by every render, and top level fields without variables are generated into HTML just once.
+'''
+import argparse
+import io
+import re
+import sys
+
+import yaml
+
+from . import loader
+from . import plugins
+from .archive import open_writer
+from .mockdown import MockGenerator
+
+
+variable = re.compile(r'\$\{\s*([^}]*?)\s*\}')
+
+
+class TemplateError(ValueError):
+    pass
+
+
+def _getter(expression):
+    path = [int(part) if part.isdigit() else part for part in expression.split('.')]
+
+    def get(scope):
+        value = scope
+
+        for part in path:
+            try:
+                value = value[part]
+            except (KeyError, IndexError, TypeError):
+                raise TemplateError(f'${{{expression}}}: "{part}" not found')
+
+        return value
+
+    return get
+
+
+def _compile(node):
+    '''
+    (True, node) when node has no variables, or (False, function building it from a scope)
+    '''
+    if type(node) is str:
+        return _compile_string(node)
+    elif type(node) is list:
+        steps = _compile_list(node)
+
+        if all(kind == 'value' for kind, payload in steps):
+            return True, node
+
+        return False, lambda scope: _expand(steps, scope)
+    elif type(node) is dict:
+        return _compile_dict(node)
+    else:
+        return True, node
+
+
+def _compile_string(text):
+    parts = variable.split(text)
+
+    if len(parts) == 1:
+        return True, text
+
+    # Just a variable, its value is taken as is
+    if len(parts) == 3 and not parts[0] and not parts[2]:
+        return False, _getter(parts[1])
+
+    # Odd parts are the expressions between literals
+    parts = [_getter(part) if i % 2 else part for i, part in enumerate(parts) if part or i % 2]
+
+    def interpolate(scope):
+        return ''.join(part if part.__class__ is str else str(part(scope)) for part in parts)
+
+    return False, interpolate
+
+
+def _compile_dict(node):
+    entries = [(_compile(key), _compile(value)) for key, value in node.items()]
+
+    if all(key_constant and value_constant for (key_constant, key), (value_constant, value) in entries):
+        return True, node
+
+    def build(scope):
+        return {
+            key if key_constant else key(scope): value if value_constant else value(scope)
+            for (key_constant, key), (value_constant, value) in entries
+        }
+
+    return False, build
+
+
+def _compile_list(items):
+    '''
+    Steps building the list: ('value', item), ('build', function of the scope) or ('each', for_each)
+    '''
+    steps = []
+
+    for item in items:
+        if type(item) is dict and 'for_each' in item:
+            steps.append(('each', _compile_for_each(item)))
+        else:
+            constant, value = _compile(item)
+            steps.append(('value' if constant else 'build', value))
+
+    return steps
+
+
+def _compile_for_each(entry):
+    unknown = set(entry) - {'for_each', 'as', 'index', 'do'}
+    if unknown:
+        raise TemplateError(f'for_each: unknown entries {", ".join(map(str, sorted(unknown)))}')
+
+    source = entry['for_each']
+    if type(source) is not str:
+        raise TemplateError(f'for_each: must name a list, like ${{orders}}, its "{source}"')
+
+    match = variable.fullmatch(source)
+    body = entry.get('do') or []
+    if type(body) is not list:
+        raise TemplateError('for_each: "do" must be a list')
+
+    return _getter(match.group(1) if match else source), entry.get('as', 'item'), entry.get('index'), _compile_list(body)
+
+
+def _iterate(for_each, scope):
+    '''
+    Scope of each iteration of for_each
+    '''
+    items, name, index, steps = for_each
+    values = items(scope)
+
+    if type(values) is not list:
+        raise TemplateError(f'for_each: "{name}" must iterate over a list, its "{type(values).__name__}"')
+
+    for i, value in enumerate(values):
+        child = dict(scope)
+        child[name] = value
+        if index:
+            child[index] = i
+
+        yield child, steps
+
+
+def _expand(steps, scope):
+    result = []
+
+    for kind, payload in steps:
+        if kind == 'value':
+            result.append(payload)
+        elif kind == 'build':
+            result.append(payload(scope))
+        else:
+            for child, child_steps in _iterate(payload, scope):
+                result.extend(_expand(child_steps, child))
+
+    return result
+
+
+def _expand_fields(steps, scope, fields):
+    '''
+    Appends (constant, field) of each top level field to fields
+    '''
+    for kind, payload in steps:
+        if kind == 'value':
+            fields.append((True, payload))
+        elif kind == 'build':
+            fields.append((False, payload(scope)))
+        else:
+            for child, child_steps in _iterate(payload, scope):
+                _expand_fields(child_steps, child, fields)
+
+
+class Template(object):
+    '''
+    A compiled template, rendered for a data record (usually a dict) with render or render_to. It can be rendered
+    any number of times, from several threads.
+    '''
+
+    def __init__(self, document, components=None):
+        if type(document) is not list:
+            raise TemplateError('A template must be a list of fields')
+
+        self._steps = _compile_list(document)
+        self._components = components or plugins.registry
+        # HTML of top level fields without variables, by id, as [not last, last]
+        self._html = {}
+
+    def expand(self, data):
+        '''
+        The mock for data, as it would be loaded from a file
+        '''
+        fields = []
+        _expand_fields(self._steps, data, fields)
+
+        return [field for constant, field in fields]
+
+    def _constant_html(self, field, is_last):
+        '''
+        HTML of a top level field without variables, or None when it can't be shared by pages, like fields using option
+        catalogs, which are written once on each page
+        '''
+        html = self._html.get(id(field))
+
+        if html is None:
+            html = self._html[id(field)] = [None, None]
+
+        if html[is_last] is None:
+            with io.StringIO() as out:
+                generator = MockGenerator(None, out, components=self._components)
+                generator.generate_root_field(field, is_last)
+                html[is_last] = False if generator._catalogs or generator._defined else out.getvalue()
+
+        return html[is_last] or None
+
+    def render_to(self, data, out):
+        fields = []
+        _expand_fields(self._steps, data, fields)
+
+        generator = MockGenerator(None, out, components=self._components)
+        last = len(fields) - 1
+
+        out.write(MockGenerator.header)
+
+        for i, (constant, field) in enumerate(fields):
+            html = self._constant_html(field, i == last) if constant else None
+
+            if html is None:
+                generator.generate_root_field(field, i == last)
+            else:
+                out.write(html)
+
+        out.write(MockGenerator.footer)
+
+    def render(self, data):
+        with io.StringIO() as out:
+            self.render_to(data, out)
+            return out.getvalue()
+
+
+def load(path, components=None):
+    with open(path, 'r') as f:
+        return Template(yaml.load(f, Loader=loader.Loader), components)
+
+
+def load_records(path):
+    '''
+    Records of a YAML or JSON file: the items of a list, each document of a "---" separated stream, or a single mapping
+    '''
+    with open(path, 'r') as f:
+        documents = list(yaml.load_all(f, Loader=loader.Loader))
+
+    if len(documents) == 1 and type(documents[0]) is list:
+        return documents[0]
+
+    return documents
+
+
+def parse_command_line(argv):
+    parser = argparse.ArgumentParser(prog='mockdown template', description='Renders a mock template once for each data record')
+
+    parser.add_argument('template', help='Mock template file')
+    parser.add_argument('--data', '-d', required=True, help='YAML or JSON records: a list, a "---" separated stream or a single mapping')
+    parser.add_argument('--output', '-o', required=True, help='Output folder, or archive when it ends with .zip, .tar, .tar.gz, .tgz, .tar.bz2 or .tar.xz')
+    parser.add_argument('--name', '-n', default='{index:04d}.html', help='Name of each page, formatted with the record index and the record, like "{record[id]}.html", defaults to "{index:04d}.html"')
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_command_line(argv)
+
+    try:
+        template = load(args.template)
+        records = load_records(args.data)
+    except (OSError, yaml.YAMLError, TemplateError) as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    failures = 0
+
+    with open_writer(args.output) as writer:
+        for index, record in enumerate(records):
+            try:
+                writer.write(args.name.format(index=index, record=record), template.render(record).encode())
+            except Exception as e:
+                print(f'{args.data}: record {index}: {type(e).__name__}: {e}', file=sys.stderr)
+                failures += 1
+
+    return 1 if failures else 0
@@ -9,6 +9,6 @@ setup(name='Mockdown',
       license='GPL3',
       packages=['mockdown'],
       entry_points={
-          'console_scripts': ['mockdown=mockdown.mockdown:main'],
+          'console_scripts': ['mockdown=mockdown.client:main'],
       },
       zip_safe=False)